@@ -155,16 +155,75 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 ASGI_APPLICATION = "backend.asgi.application"
 
+# ----------------------------------------------------
+# CACHE CONFIGURATION
+# ----------------------------------------------------
+# Standings payloads are cached per season results version (league/cache.py).
+# With more than one web worker the cache must be shared, so point REDIS_URL
+# at Redis in production. Without it each process has its own memory cache,
+# so the versions are kept in the database instead (LEAGUE_VERSIONS_IN_DB)
+# and a bump made by one worker is seen by all of them.
+REDIS_URL = os.getenv('REDIS_URL')
+LEAGUE_VERSIONS_IN_DB = not REDIS_URL
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Channel Layers
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer" # Use Redis in production
+# Live-score pushes (league/live.py) go through the channel layer, and the
+# websockets are only served by the ASGI app (see Procfile). The in-memory
+# layer only reaches sockets held by the same process, so with REDIS_URL set
+# the layer is shared through Redis as well.
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [REDIS_URL]},
+        }
     }
-}
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+
+# Tie-breakers applied after points in group tables, in order. Available:
+# goal_diff, goals_for, h2h_points, h2h_goal_diff, h2h_goals_for, fair_play.
+# /api/grouped-standings/?tiebreakers=... overrides this per request.
+LEAGUE_GROUP_TIEBREAKERS = ('goal_diff', 'goals_for')
+
+# Post-save league work (standings rebuilds, standings snapshot builds) runs
+# on a small in-process thread pool after commit; see league/tasks.py.
+LEAGUE_TASK_WORKERS = int(os.getenv('LEAGUE_TASK_WORKERS', '2'))
+LEAGUE_TASKS_INLINE = False
+
+# /api/matches/changes/ does not move its cursor past change-log rows
+# younger than this many seconds, so a row whose insert commits late is
+# not skipped by a poller (league/changes.py).
+LEAGUE_CHANGE_FEED_LAG = 2
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    # JSON stays the default; MessagePack is served on Accept: application/msgpack
+    'DEFAULT_RENDERER_CLASSES': (
+        'league.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'league.renderers.MessagePackRenderer',
+    ),
 }
 
 
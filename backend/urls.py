@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
-from league.views import TeamViewSet, SeasonViewSet, MatchViewSet, NewsViewSet, standings_view
+from league.views import TeamViewSet, SeasonViewSet, MatchViewSet, NewsViewSet, standings_view, standings_as_of_matchday
 from .views import home
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -38,5 +38,6 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/standings/<int:season_id>/', standings_view),
+    path('api/standings/<int:season_id>/matchday/<int:matchday>/', standings_as_of_matchday),
     path('api/standings/', standings_view),
 ]
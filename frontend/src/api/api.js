@@ -38,6 +38,8 @@ export const api = {
   getNews: () => fetchJSON('/news/'),
   getNewsById: (id) => fetchJSON(`/news/${id}/`),
   getStandings: (seasonId) => fetchJSON(`/standings/${seasonId}/`),
+  // knockout tree: { rounds: [{ round, name, matches: [...] }] }
+  getBracket: (seasonId) => fetchJSON(`/bracket/${seasonId}/`),
   getGroupsWithTeams: (seasonId) => fetchJSON(`/groups-with-teams/?season=${seasonId}`),
   // optionally pass a category string (girls|senior_boys|junior_boys)
   getGroupedStandings: (seasonId, category) => {
@@ -4,17 +4,62 @@ import './Bracket.css';
 import './Results.css';
 import usePolling from '../utils/usePolling';
 
-// Helper: group matches by matchday
-const getMatchesByDay = (matches, md) => matches.filter(m => Number(m.matchday) === md || Number(m.matchday) === Number(md));
-
-// Helper: detect placeholder team tokens like WINNER MD22, LOSER etc.
-const isPlaceholder = (teamName) => {
-    if (!teamName) return false;
-    return /WINNER|LOSER/i.test(teamName);
+// Helper: every match of the bracket document, in round order
+const allMatches = (bracket) => (bracket.rounds || []).flatMap(r => r.matches);
+
+// Fallback for seasons whose knockout matches are not linked yet (the bracket
+// document then has no rounds): lay them out by matchday and stage name, and
+// draw connectors from "WINNER 26"-style placeholder names.
+const KNOCKOUT_ROUND_ORDER = ['Round of 32', 'Round of 16', 'Quarterfinal', 'Semifinal', 'Final', 'Third Place'];
+const SOURCE_NAME = /^(WINNER|LOSER)\s+(\d+)/i;
+
+const matchdayRounds = (matches) => {
+    const knockout = (matches || [])
+        .filter(m => m.matchday !== null && m.matchday !== undefined && Number(m.matchday) >= 21)
+        .sort((a, b) => Number(a.matchday) - Number(b.matchday) || a.id - b.id);
+    const byMatchday = {};
+    knockout.forEach(m => { if (!byMatchday[m.matchday]) byMatchday[m.matchday] = m; });
+
+    const feeds = {};
+    const side = (m, key) => {
+        const team = m[`${key}_team`];
+        const name = typeof team === 'object' ? team?.name : team;
+        const source = (name || '').match(SOURCE_NAME);
+        const sourceMatch = source ? byMatchday[Number(source[2])] : null;
+        const outcome = source ? source[1].toLowerCase() : '';
+        if (sourceMatch) (feeds[sourceMatch.id] = feeds[sourceMatch.id] || []).push({ match_id: m.id, side: key, outcome });
+        return {
+            team_id: typeof team === 'object' ? team?.id : null,
+            team_name: name,
+            placeholder: / \(placeholder\)$/.test(name || '') || /^TBD\b/.test(name || ''),
+            label: source ? `${source[1].toUpperCase()} ${source[2]}` : '',
+            source_match_id: sourceMatch ? sourceMatch.id : null,
+            outcome,
+        };
+    };
+    const rows = knockout.map(m => ({
+        id: m.id,
+        matchday: m.matchday,
+        is_played: m.is_played,
+        home_score: m.home_score,
+        away_score: m.away_score,
+        home: side(m, 'home'),
+        away: side(m, 'away'),
+        stage: m.match_stage || 'Knockout',
+    }));
+    rows.forEach(r => {
+        r.feeds = feeds[r.id] || [];
+        const decided = r.is_played && r.home_score !== null && r.away_score !== null && r.home_score !== r.away_score;
+        r.winner_id = decided ? (r.home_score > r.away_score ? r.home : r.away).team_id : null;
+    });
+
+    const names = Array.from(new Set(rows.map(r => r.stage)));
+    names.sort((a, b) => KNOCKOUT_ROUND_ORDER.indexOf(a) - KNOCKOUT_ROUND_ORDER.indexOf(b));
+    return names.map((name, idx) => ({ round: idx + 1, name, matches: rows.filter(r => r.stage === name) }));
 };
 
 export default function Bracket() {
-    const [matches, setMatches] = useState([]);
+    const [bracket, setBracket] = useState({ rounds: [] });
     const [flashMap, setFlashMap] = useState({});
     const prevMatchesRef = useRef({});
     const timeoutRef = useRef(null);
@@ -53,21 +98,26 @@ export default function Bracket() {
         setSeasonsLoadedOnce(false);
         setSeasons([]);
         setSelectedSeason(null);
-        setMatches([]);
+        setBracket({ rounds: [] });
         setMatchesLoadedOnce(false);
         // immediate fetch
         fetchSeasons();
     }, [category, fetchSeasons]);
 
+    // The server keeps the bracket tree cached per season and answers unchanged polls with 304
     const fetchMatchesForSeason = useCallback(async () => {
         if (!selectedSeason) return;
         if (!matchesLoadedOnce) setMatchesLoading(true);
         try {
-            const m = await api.getMatches({ season: selectedSeason });
+            let b = await api.getBracket(selectedSeason);
+            if (!b.rounds || b.rounds.length === 0) {
+                b = { ...b, rounds: matchdayRounds(await api.getMatches({ season: selectedSeason })) };
+            }
+            const m = allMatches(b);
             // detect diffs between prev and incoming matches for bracket display
             const prev = prevMatchesRef.current || {};
             const diffs = {};
-            (m || []).forEach((mm) => {
+            m.forEach((mm) => {
                 const old = prev[mm.id];
                 if (!old) return;
                 const changed = {};
@@ -77,18 +127,18 @@ export default function Bracket() {
             });
 
             if (Object.keys(diffs).length === 0) {
-                setMatches(m || []);
+                setBracket(b);
             } else {
                 if (timeoutRef.current) clearTimeout(timeoutRef.current);
                 setFlashMap(diffs);
                 timeoutRef.current = setTimeout(() => {
-                    setMatches(m || []);
+                    setBracket(b);
                     setFlashMap({});
                     timeoutRef.current = null;
                 }, FLASH_DURATION);
             }
 
-            prevMatchesRef.current = (m || []).reduce((acc, mm) => { acc[mm.id] = mm; return acc; }, {});
+            prevMatchesRef.current = m.reduce((acc, mm) => { acc[mm.id] = mm; return acc; }, {});
         } catch (e) {
             console.error(e);
         } finally {
@@ -104,7 +154,7 @@ export default function Bracket() {
         if (!selectedSeason) return;
         // reset match load flags so loading indicator shows on first load
         setMatchesLoadedOnce(false);
-        setMatches([]);
+        setBracket({ rounds: [] });
         fetchMatchesForSeason();
     }, [selectedSeason, fetchMatchesForSeason]);
 
@@ -138,70 +188,19 @@ export default function Bracket() {
                 return `M ${from.x} ${from.y} C ${from.x + dx} ${from.y} ${to.x - dx} ${to.y} ${to.x} ${to.y}`;
             };
 
-            // Determine logical match groups
-            let qf = [...getMatchesByDay(matches, 22), ...getMatchesByDay(matches, 23), ...getMatchesByDay(matches, 24), ...getMatchesByDay(matches, 25)];
-            let sf = [...getMatchesByDay(matches, 26), ...getMatchesByDay(matches, 27)];
-            let third = [...getMatchesByDay(matches, 28)];
-            let fin = [...getMatchesByDay(matches, 29)];
-
-            // Fallback: if the hardcoded matchday ranges didn't yield knockouts (different competitions may use other matchday numbers),
-            // derive rounds by unique matchday values present. This ensures Junior Boys brackets still populate.
-            const allMd = Array.from(new Set((matches || []).map(m => (m.matchday !== undefined && m.matchday !== null) ? Number(m.matchday) : null).filter(x => x !== null))).sort((a, b) => a - b);
-            if (fin.length === 0 && allMd.length > 0) {
-                // pick last day as final
-                const finalDay = allMd[allMd.length - 1];
-                fin = getMatchesByDay(matches, finalDay);
-                // previous one or two as semis
-                const semiDays = allMd.slice(Math.max(0, allMd.length - 3), allMd.length - 1);
-                sf = [].concat(...semiDays.map(d => getMatchesByDay(matches, d)));
-                // everything before that as quarters
-                const qDays = allMd.slice(0, Math.max(0, allMd.length - 3));
-                qf = [].concat(...qDays.map(d => getMatchesByDay(matches, d)));
-                // third place day if exact match present (second to last when more than 3 rounds)
-                if (allMd.length >= 3) {
-                    const thirdDay = allMd[allMd.length - 2];
-                    third = getMatchesByDay(matches, thirdDay).filter(m => m.match_stage && /third|3rd/i.test(String(m.match_stage)));
-                }
-            }
-
+            // feeder links come with the bracket document: each match lists the slots it feeds
+            const matches = allMatches(bracket);
             const conns = [];
-
-            // connect QF -> SF: [0,1] -> SF0, [2,3] -> SF1
-            if (qf.length >= 4 && sf.length >= 2) {
-                conns.push({ from: qf[0]?.id, to: sf[0]?.id });
-                conns.push({ from: qf[1]?.id, to: sf[0]?.id });
-                conns.push({ from: qf[2]?.id, to: sf[1]?.id });
-                conns.push({ from: qf[3]?.id, to: sf[1]?.id });
-            } else {
-                // fallback: connect in-order
-                for (let i = 0; i < sf.length; i++) {
-                    const sources = qf.slice(i * 2, i * 2 + 2);
-                    sources.forEach((s) => conns.push({ from: s?.id, to: sf[i]?.id }));
-                }
-            }
-
-            // connect SF -> Final
-            if (sf.length >= 2 && fin.length >= 1) {
-                conns.push({ from: sf[0]?.id, to: fin[0]?.id });
-                conns.push({ from: sf[1]?.id, to: fin[0]?.id });
-            } else {
-                sf.forEach(s => conns.push({ from: s?.id, to: fin[0]?.id }));
-            }
-
-            // connect SF -> Third place (losers) if present
-            if (third.length >= 1 && sf.length >= 2) {
-                conns.push({ from: sf[0]?.id, to: third[0]?.id });
-                conns.push({ from: sf[1]?.id, to: third[0]?.id });
-            }
+            matches.forEach((m) => (m.feeds || []).forEach((f) => conns.push({ from: m.id, to: f.match_id })));
 
             // build path strings if positions are available
             const finalConns = conns.map((c, idx) => {
                 const fromPos = pos[c.from];
                 const toPos = pos[c.to];
                 const path = (fromPos && toPos) ? createPath(fromPos, toPos) : '';
-                // reveal if source has a decisive winner
+                // reveal if source has a decided winner
                 const src = matches.find(m => String(m.id) === String(c.from));
-                const revealed = src && src.home_score !== null && src.away_score !== null && src.home_score !== src.away_score;
+                const revealed = Boolean(src && src.winner_id);
                 return { id: `conn-${idx}`, from: c.from, to: c.to, d: path, revealed };
             }).filter(c => c.d);
 
@@ -212,7 +211,7 @@ export default function Bracket() {
         const t = setTimeout(build, 80);
         window.addEventListener('resize', build);
         return () => { clearTimeout(t); window.removeEventListener('resize', build); };
-    }, [matches]);
+    }, [bracket]);
 
     // After connectors render, set stroke lengths for animation
     useEffect(() => {
@@ -274,62 +273,32 @@ export default function Bracket() {
         };
     }, [connectors]);
 
-    const stageMatches = (mds) => {
-        const arr = [];
-        if (Array.isArray(mds)) {
-            mds.forEach(md => arr.push(...getMatchesByDay(matches, md)));
-        } else arr.push(...getMatchesByDay(matches, mds));
-        return arr;
+    // round name of every match, for labelling placeholder slots
+    const roundOf = {};
+    (bracket.rounds || []).forEach(r => r.matches.forEach(m => { roundOf[m.id] = r.name; }));
+
+    const renderSide = (side) => {
+        if (!side.placeholder) return side.team_name;
+        if (!side.source_match_id) return (<span className="placeholder-pill">{side.label || 'TBD'}</span>);
+        const descriptor = side.outcome === 'loser' ? 'Loser' : 'Winner';
+        return (<span className="placeholder-pill">{descriptor} — {roundOf[side.source_match_id] || 'Knockout'}</span>);
     };
 
     const renderBox = (m) => (
         <div key={m.id} className="br-match" ref={(el) => { boxRefs.current[m.id] = el; }}>
             <div className="br-team br-home">
-                {(() => {
-                    const name = typeof m.home_team === 'object' ? m.home_team.name : m.home_team;
-                    if (isPlaceholder(name)) {
-                        // build friendly label
-                        const digits = (name.match(/(\d{1,3})/) || [null])[0];
-                        const num = digits ? parseInt(digits, 10) : null;
-                        const qfMap = { 22: 'A', 23: 'B', 24: 'C', 25: 'D' };
-                        const sfMap = { 26: 'A', 27: 'B' };
-                        let stageLabel = null; let slot = '';
-                        if (num && qfMap[num]) { stageLabel = 'Quarterfinal'; slot = ` ${qfMap[num]}`; }
-                        else if (num && sfMap[num]) { stageLabel = 'Semifinal'; slot = ` ${sfMap[num]}`; }
-                        else if (num === 28) stageLabel = 'Third Place';
-                        else if (num === 29) stageLabel = 'Final';
-                        const descriptor = /WINNER/i.test(name) ? 'Winner' : (/LOSER/i.test(name) ? 'Loser' : 'TBD');
-                        return (<span className="placeholder-pill">{descriptor} — {stageLabel ? `${stageLabel}${slot}` : 'Knockout'}</span>);
-                    }
-                    return name;
-                })()} <span className={`score ${flashMap[m.id]?.home ? 'score-flash' : ''}`}>{m.home_score ?? '-'}</span>
+                {renderSide(m.home)} <span className={`score ${flashMap[m.id]?.home ? 'score-flash' : ''}`}>{m.home_score ?? '-'}</span>
             </div>
             <div className="br-team br-away">
-                {(() => {
-                    const name = typeof m.away_team === 'object' ? m.away_team.name : m.away_team;
-                    if (isPlaceholder(name)) {
-                        const digits = (name.match(/(\d{1,3})/) || [null])[0];
-                        const num = digits ? parseInt(digits, 10) : null;
-                        const qfMap = { 22: 'A', 23: 'B', 24: 'C', 25: 'D' };
-                        const sfMap = { 26: 'A', 27: 'B' };
-                        let stageLabel = null; let slot = '';
-                        if (num && qfMap[num]) { stageLabel = 'Quarterfinal'; slot = ` ${qfMap[num]}`; }
-                        else if (num && sfMap[num]) { stageLabel = 'Semifinal'; slot = ` ${sfMap[num]}`; }
-                        else if (num === 28) stageLabel = 'Third Place';
-                        else if (num === 29) stageLabel = 'Final';
-                        const descriptor = /WINNER/i.test(name) ? 'Winner' : (/LOSER/i.test(name) ? 'Loser' : 'TBD');
-                        return (<span className="placeholder-pill">{descriptor} — {stageLabel ? `${stageLabel}${slot}` : 'Knockout'}</span>);
-                    }
-                    return name;
-                })()} <span className={`score ${flashMap[m.id]?.away ? 'score-flash' : ''}`}>{m.away_score ?? '-'}</span>
+                {renderSide(m.away)} <span className={`score ${flashMap[m.id]?.away ? 'score-flash' : ''}`}>{m.away_score ?? '-'}</span>
             </div>
         </div>
     );
 
-    const qf = stageMatches([22, 23, 24, 25]);
-    const sf = stageMatches([26, 27]);
-    const third = stageMatches(28);
-    const fin = stageMatches(29);
+    // one column per round; the third-place match sits under the semifinals as before
+    const columns = (bracket.rounds || []).filter(r => r.name !== 'Third Place');
+    const third = (bracket.rounds || []).find(r => r.name === 'Third Place');
+    const thirdColumn = Math.max(0, columns.length - 2);
 
     return (
         <div className="bracket-root" style={{ padding: 24 }}>
@@ -364,22 +333,18 @@ export default function Bracket() {
                 <div className="loading">Loading bracket <span className="loading-dots"><span></span><span></span><span></span></span></div>
             ) : (
                 <div className="bracket-canvas" ref={containerRef}>
-                    <div className="col col-qf">
-                        <h4>Quarterfinals</h4>
-                        {qf.map(renderBox)}
-                    </div>
-
-                    <div className="col col-sf">
-                        <h4>Semifinals</h4>
-                        {sf.map(renderBox)}
-                        <h4 style={{ marginTop: 18 }}>Third Place</h4>
-                        {third.map(renderBox)}
-                    </div>
-
-                    <div className="col col-final">
-                        <h4>Final</h4>
-                        {fin.map(renderBox)}
-                    </div>
+                    {columns.map((r, idx) => (
+                        <div key={`${r.round}-${r.name}`} className="col">
+                            <h4>{r.name}</h4>
+                            {r.matches.map(renderBox)}
+                            {third && idx === thirdColumn && (
+                                <>
+                                    <h4 style={{ marginTop: 18 }}>{third.name}</h4>
+                                    {third.matches.map(renderBox)}
+                                </>
+                            )}
+                        </div>
+                    ))}
 
                     <svg className="bracket-svg" ref={svgRef} xmlns="http://www.w3.org/2000/svg">
                         {connectors.map(c => (
@@ -100,13 +100,19 @@ export default function Home() {
   const fetchMatches = async () => {
     if (!matchesLoadedOnce) setMatchesLoading(true);
     try {
-      const data = await api.getMatches();
       const today = new Date();
       today.setHours(0, 0, 0, 0);
       const tomorrow = new Date(today);
       tomorrow.setDate(tomorrow.getDate() + 1);
       const dayAfter = new Date(tomorrow);
       dayAfter.setDate(dayAfter.getDate() + 1);
+      // only fetch around today/tomorrow; a day of margin each side covers timezone offsets
+      const isoDay = (d, offset) => {
+        const x = new Date(d);
+        x.setDate(x.getDate() + offset);
+        return `${x.getFullYear()}-${String(x.getMonth() + 1).padStart(2, '0')}-${String(x.getDate()).padStart(2, '0')}`;
+      };
+      const data = await api.getMatches({ from: isoDay(today, -1), to: isoDay(dayAfter, 0) });
 
       const todayMatches = (data || []).filter(match => {
         const matchDate = new Date(match.match_date);
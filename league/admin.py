@@ -1,16 +1,19 @@
 from django.contrib import admin
 from django.forms.models import BaseInlineFormSet
-from .models import Team, Season, Match, News, Group, TeamGroup
+from .models import Team, Season, Match, News, Group, TeamGroup, BracketSlot
 from .models_rbac import UserRole, Permission
 from django.urls import path
 from django.shortcuts import render, redirect
 from django import forms
 from django.contrib import messages
-import difflib
-import openpyxl
-from datetime import datetime
+import csv
+import itertools
+from django.http import StreamingHttpResponse
 from django.template.response import TemplateResponse
-from django.core.management import call_command
+from .tasks import schedule_standings_recompute
+from .live import broadcast_match_update
+from .bracket import advance_bracket
+from .imports import MATCH_ERROR_FIELDS, import_match_rows, stream_rows
 from django.utils import timezone
 
 
@@ -79,6 +82,21 @@ class TeamAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Season)
+
+
+@admin.register(BracketSlot)
+class BracketSlotAdmin(admin.ModelAdmin):
+	list_display = ('match', 'side', 'label', 'source_match', 'outcome')
+	list_filter = ('season',)
+	raw_id_fields = ('match', 'source_match')
+
+
+class _Echo:
+	"""File-like object for csv.writer that hands each line back instead of buffering it."""
+	def write(self, value):
+		return value
+
+
 @admin.register(Match)
 class MatchAdmin(admin.ModelAdmin):
 	list_display = ('season', 'home_team', 'away_team', 'match_date', 'venue', 'current_period', 'is_played', 'void')
@@ -104,188 +122,28 @@ class MatchAdmin(admin.ModelAdmin):
 			if not f:
 				messages.error(request, 'No file uploaded')
 				return redirect('..')
+			# Expect header row: Season, Home Team, Away Team, Match Date[, Matchday, Venue, Match Time]
 			try:
-				wb = openpyxl.load_workbook(f)
-				sheet = wb.active
+				rows = stream_rows(f)
+				header = next(rows, None)
 			except Exception as e:
 				messages.error(request, f'Invalid Excel file: {e}')
 				return redirect('..')
-
-			# Expect header row: Season, Home Team, Away Team, Match Date, Venue
-			rows = list(sheet.iter_rows(min_row=1, values_only=True))
-			if not rows:
-				messages.error(request, 'Excel file is empty')
-				return redirect('..')
-			header = [str(h).strip() if h is not None else '' for h in rows[0]]
-			required = ['Season', 'Home Team', 'Away Team', 'Match Date']
-			# 'Match Time' column is optional. We expect a single 'Match Date' column which may include time (e.g. '2025-02-12 16:00') or be an Excel datetime.
-			has_time_col = any(h.lower() == 'match time' for h in header)
-			has_matchday_col = any(h.lower() == 'matchday' for h in header)
-			if not all(any(r.lower() == h.lower() for h in header) for r in required):
-				messages.error(request, f'Header must include: {required}. Found: {header}')
+			try:
+				created, error_rows = import_match_rows(itertools.chain([header], rows) if header is not None else rows)
+			except ValueError as e:
+				messages.error(request, str(e))
 				return redirect('..')
 
-			created = 0
-			errors = []
-			error_rows = []
-			for i, row in enumerate(rows[1:], start=2):
-				data = dict(zip(header, row))
-				# Initialize matchday and venue early so error handling can reference them
-				matchday_val = data.get('Matchday') if has_matchday_col else None
-				venue = data.get('Venue') or ''
-				season_val = data.get('Season')
-				home_name = data.get('Home Team')
-				away_name = data.get('Away Team')
-				date_val = data.get('Match Date')
-				time_val = data.get('Match Time') if has_time_col else None
-				# Require Match Date (single column). Time is optional if included in Match Date or as a separate Match Time column.
-				if not date_val or str(date_val).strip() == '':
-					errors.append(f'Row {i}: Match Date is required and must not be blank.')
-					error_rows.append({
-						'row': i,
-						'season': season_val,
-						'home': home_name,
-						'away': away_name,
-						'match_date': date_val,
-						'match_time': time_val if time_val is not None else '',
-						'matchday': matchday_val,
-						'venue': venue,
-						'error': 'Match Date is required and must not be blank.'
-					})
-					continue
-
-
-				# Only accept 'd/m/Y h:mm:ss AM/PM' format (e.g. '6/12/2025 4:00:00 PM')
-				match_dt = None
-				s_date = str(date_val).strip()
-				try:
-					match_dt = datetime.strptime(s_date, '%d/%m/%Y %I:%M:%S %p')
-				except Exception:
-					errors.append(f"Row {i}: invalid date/time format (must be 'd/m/Y h:mm:ss AM/PM', got '{s_date}')")
-					error_rows.append({
-						'row': i,
-						'season': season_val,
-						'home': home_name,
-						'away': away_name,
-						'match_date': date_val,
-						'match_time': time_val if time_val is not None else '',
-						'matchday': matchday_val,
-						'venue': venue,
-						'error': f"invalid date/time format (must be 'd/m/Y h:mm:ss AM/PM', got '{s_date}')"
-					})
-					continue
-
-				# ensure matchday and venue values
-				matchday_val = data.get('Matchday') if has_matchday_col else None
-				venue = data.get('Venue') or ''
-
-				# resolve season
-				season = None
-				if season_val is None:
-					errors.append(f'Row {i}: missing Season')
-					continue
-				try:
-					sid = int(season_val)
-					season = Season.objects.filter(id=sid).first()
-				except Exception:
-					season = Season.objects.filter(name__iexact=str(season_val)).first()
-				if not season:
-					errors.append(f'Row {i}: season not found ({season_val})')
-					continue
-
-				# resolve teams
-				home = Team.objects.filter(name__iexact=str(home_name).strip()).first()
-				away = Team.objects.filter(name__iexact=str(away_name).strip()).first()
-				# If exact match not found, try fuzzy suggestions to help admin fix import
-				if not home:
-					existing = list(Team.objects.values_list('name', flat=True))
-					close_home = difflib.get_close_matches(str(home_name).strip(), existing, n=3, cutoff=0.82)
-					errors.append(f'Row {i}: home team not found (home={home_name})')
-					error_rows.append({
-						'row': i,
-						'season': season_val,
-						'home': home_name,
-						'away': away_name,
-						'match_date': date_val,
-						'match_time': time_val,
-						'matchday': matchday_val,
-						'venue': venue,
-						'error': f'Home team not found. Suggestions: {close_home}'
-					})
-					continue
-				if not away:
-					existing = list(Team.objects.values_list('name', flat=True))
-					close_away = difflib.get_close_matches(str(away_name).strip(), existing, n=3, cutoff=0.82)
-					errors.append(f'Row {i}: away team not found (away={away_name})')
-					error_rows.append({
-						'row': i,
-						'season': season_val,
-						'home': home_name,
-						'away': away_name,
-						'match_date': date_val,
-						'match_time': time_val,
-						'matchday': matchday_val,
-						'venue': venue,
-						'error': f'Away team not found. Suggestions: {close_away}'
-					})
-					continue
-
-
-
-				# create match
-				try:
-					match_kwargs = dict(
-						season=season,
-						home_team=home,
-						away_team=away,
-						match_date=match_dt,
-						venue=venue,
-					)
-					if matchday_val is not None and str(matchday_val).strip() != '':
-						try:
-							match_kwargs['matchday'] = int(matchday_val)
-						except Exception:
-							match_kwargs['matchday'] = None
-					Match.objects.create(**match_kwargs)
-					created += 1
-				except Exception as e:
-					err = f'Row {i}: failed to create match: {e}'
-					errors.append(err)
-					error_rows.append({
-						'row': i,
-						'season': season_val,
-						'home': home_name,
-						'away': away_name,
-						'match_date': date_val,
-						'match_time': time_val,
-						'matchday': matchday_val,
-						'venue': venue,
-						'error': str(e),
-					})
-
-			msg = f'Imported {created} matches.'
-			if errors:
-				# Build CSV of errors and return as attachment so admin can download
-				import csv
-				import io
-
-				output = io.StringIO()
-				writer = csv.DictWriter(output, fieldnames=['row', 'season', 'home', 'away', 'match_date', 'match_time', 'matchday', 'venue', 'error'])
-				writer.writeheader()
-				for er in error_rows:
-					writer.writerow(er)
-				csv_data = output.getvalue()
-				output.close()
-
-				response = render(request, 'admin/message.html', {'message': msg + ' Some rows had errors. Download will start.'})
-				# Return CSV as attachment
-				from django.http import HttpResponse
-				resp = HttpResponse(csv_data, content_type='text/csv')
+			if error_rows:
+				# Stream the rows that failed as a CSV so the admin can fix and re-import them
+				writer = csv.DictWriter(_Echo(), fieldnames=MATCH_ERROR_FIELDS)
+				lines = itertools.chain([writer.writeheader()], (writer.writerow(er) for er in error_rows))
+				resp = StreamingHttpResponse(lines, content_type='text/csv')
 				resp['Content-Disposition'] = 'attachment; filename="match_import_errors.csv"'
 				return resp
-			else:
-				messages.success(request, msg)
-				return redirect('..')
+			messages.success(request, f'Imported {created} matches.')
+			return redirect('..')
 
 		# GET -> redirect to changelist
 		return redirect('..')
@@ -316,8 +174,7 @@ class MatchAdmin(admin.ModelAdmin):
 		return TemplateResponse(request, 'admin/league/bracket.html', context)
 
 	def resolve_placeholder(self, request, match_id):
-		"""Resolve placeholders for a single source match (by pk)."""
-		from . import signals
+		"""Fill the bracket slots fed by a single source match (by pk)."""
 		from .models import Match
 		try:
 			m = Match.objects.get(pk=match_id)
@@ -328,34 +185,18 @@ class MatchAdmin(admin.ModelAdmin):
 		# If a forced winner was provided in query string, apply it
 		force = request.GET.get('force')
 		if force in ('home', 'away'):
-			# determine winner and loser
-			winner = m.home_team if force == 'home' else m.away_team
-			loser = m.away_team if force == 'home' else m.home_team
+			outcome = (m.home_team_id, m.away_team_id) if force == 'home' else (m.away_team_id, m.home_team_id)
 			try:
-				# perform replacement directly
-				from .models import Team, Match
-				matchnum = getattr(m, 'matchday', None)
-				if matchnum:
-					wp = Team.objects.filter(name=f"WINNER {matchnum} (placeholder)").first()
-					if wp:
-						Match.objects.filter(season=m.season, home_team=wp).update(home_team=winner)
-						Match.objects.filter(season=m.season, away_team=wp).update(away_team=winner)
-					lp = Team.objects.filter(name=f"LOSER {matchnum} (placeholder)").first()
-					if lp:
-						Match.objects.filter(season=m.season, home_team=lp).update(home_team=loser)
-						Match.objects.filter(season=m.season, away_team=lp).update(away_team=loser)
-					# delete placeholders
-					Team.objects.filter(name__icontains=f"WINNER {matchnum} (placeholder)").delete()
-					Team.objects.filter(name__icontains=f"LOSER {matchnum} (placeholder)").delete()
-				call_command('recompute_standings')
+				advance_bracket(m, outcome=outcome)
+				schedule_standings_recompute(m.season_id)
 				self.message_user(request, f"Forced winner applied for match {m.id}.", level=messages.SUCCESS)
 			except Exception as e:
 				self.message_user(request, f"Failed to force winner: {e}", level=messages.ERROR)
 			return redirect('..')
 		else:
 			try:
-				signals._replace_placeholders_for_match(m)
-				call_command('recompute_standings')
+				advance_bracket(m)
+				schedule_standings_recompute(m.season_id)
 				self.message_user(request, f"Resolved placeholders for match {m.id}.", level=messages.SUCCESS)
 			except Exception as e:
 				self.message_user(request, f"Failed to resolve placeholders: {e}", level=messages.ERROR)
@@ -375,6 +216,7 @@ class MatchAdmin(admin.ModelAdmin):
 				awarded_team = form.cleaned_data['awarded_to']
 				reason = form.cleaned_data['reason']
 				updated = 0
+				season_ids = set()
 				for match in queryset:
 					# backup original scores if fields exist
 					orig_home = getattr(match, 'home_score', None)
@@ -421,11 +263,14 @@ class MatchAdmin(admin.ModelAdmin):
 							match.played = True
 
 					match.save()
+					broadcast_match_update(match, 'awarded')
 					updated += 1
+					season_ids.add(match.season_id)
 
-				# recompute standings
+				# recompute standings for the affected seasons (runs in the background)
 				try:
-					call_command('recompute_standings')
+					for season_id in season_ids:
+						schedule_standings_recompute(season_id)
 				except Exception:
 					pass
 
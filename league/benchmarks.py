@@ -0,0 +1,266 @@
+"""Synthetic leagues and timed hot paths for the `benchmark_hotpaths` command.
+
+Everything here is deterministic for a given seed so numbers from two
+commits can be compared. Data is written with bulk_create (no signals)
+and the stored standings are rebuilt afterwards, the same state a real
+season reaches through the Match signals.
+"""
+import io
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .bracket import link_bracket
+from .models import Group, Match, Season, Team, TeamGroup
+from .standings import rebuild_season_standings
+
+CATEGORIES = [key for key, _ in Season.CATEGORY_CHOICES]
+GROUP_NAMES = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# Group.name is a single character, so this is also the cap on groups per season
+GROUP_ALPHABET = GROUP_NAMES + GROUP_NAMES.lower() + '0123456789'
+
+# (code, home token, away token, matchday) mirroring generate_knockout_bracket
+KNOCKOUT_LAYOUT = [
+    ('QF1', 'A1', 'B2', 22),
+    ('QF2', 'C1', 'D2', 23),
+    ('QF3', 'B1', 'A2', 24),
+    ('QF4', 'D1', 'C2', 25),
+    ('SF1', 'WINNER 22', 'WINNER 23', 26),
+    ('SF2', 'WINNER 24', 'WINNER 25', 27),
+    ('3rd', 'LOSER 26', 'LOSER 27', 28),
+    ('Final', 'WINNER 26', 'WINNER 27', 29),
+]
+
+
+def _group_name(index):
+    # past Z fall back to lowercase, then digits
+    return GROUP_ALPHABET[index]
+
+
+def build_league(seed=0, seasons=3, groups=4, teams_per_group=4, legs=1, max_matches=10000, played_ratio=0.8):
+    """Create `seasons` seasons (cycling through the categories) with group
+    round-robins and an 8-team knockout bracket each.
+
+    Returns a summary dict with the created season ids and counts; raises
+    ValueError for more groups than there are single-character group names.
+    """
+    if groups > len(GROUP_ALPHABET):
+        raise ValueError(f'At most {len(GROUP_ALPHABET)} groups per season (got {groups})')
+    rnd = random.Random(seed)
+    start = timezone.now() - timedelta(days=120)
+    placeholders = {}
+    for label in ('WINNER 22', 'WINNER 23', 'WINNER 24', 'WINNER 25', 'WINNER 26', 'WINNER 27', 'LOSER 26', 'LOSER 27'):
+        name = f'{label} (placeholder)'
+        placeholders[label], _ = Team.objects.get_or_create(name=name, defaults={'short_name': name[:20], 'archived': True})
+
+    season_ids = []
+    total_matches = 0
+    budget = max_matches
+    for s_index in range(seasons):
+        category = CATEGORIES[s_index % len(CATEGORIES)]
+        season = Season.objects.create(
+            name=f'BENCH {s_index} {category.replace("_", " ").upper()}',
+            start_date=start.date(),
+            category=category,
+        )
+        season_ids.append(season.id)
+
+        group_objs = Group.objects.bulk_create([
+            Group(name=_group_name(g), category=category, season=season) for g in range(groups)
+        ])
+        teams = Team.objects.bulk_create([
+            Team(name=f'B{s_index} {category} G{g} T{t}', short_name=f'G{g}T{t}')
+            for g in range(groups) for t in range(teams_per_group)
+        ])
+        members = {}
+        team_groups = []
+        for g, group in enumerate(group_objs):
+            members[g] = teams[g * teams_per_group:(g + 1) * teams_per_group]
+            team_groups.extend(TeamGroup(team=t, group=group, season=season) for t in members[g])
+        TeamGroup.objects.bulk_create(team_groups)
+
+        matches = []
+        for leg in range(legs):
+            for g, group_teams in members.items():
+                for i, home in enumerate(group_teams):
+                    for away in group_teams[i + 1:]:
+                        if leg % 2:
+                            home, away = away, home
+                        matchday = 1 + (len(matches) % 20)
+                        played = rnd.random() < played_ratio
+                        matches.append(Match(
+                            season=season,
+                            home_team=home,
+                            away_team=away,
+                            match_date=start + timedelta(days=matchday, hours=rnd.randint(0, 8)),
+                            matchday=matchday,
+                            home_score=rnd.randint(0, 4) if played else None,
+                            away_score=rnd.randint(0, 4) if played else None,
+                            is_played=played,
+                            venue=f'Pitch {rnd.randint(1, 4)}',
+                        ))
+        matches = matches[:max(budget - len(KNOCKOUT_LAYOUT), 0)]
+
+        # knockout bracket: QFs played between group qualifiers, later rounds on placeholders
+        seeds = {}
+        for g in range(min(groups, 4)):
+            seeds[f'{GROUP_NAMES[g]}1'] = members[g][0]
+            seeds[f'{GROUP_NAMES[g]}2'] = members[g][1 % teams_per_group]
+        for code, home_tok, away_tok, matchday in KNOCKOUT_LAYOUT:
+            home = seeds.get(home_tok) or placeholders.get(home_tok)
+            away = seeds.get(away_tok) or placeholders.get(away_tok)
+            if home is None or away is None:
+                continue
+            played = matchday <= 25
+            home_score = rnd.randint(0, 3) if played else None
+            away_score = (home_score + 1) % 4 if played else None
+            matches.append(Match(
+                season=season,
+                home_team=home,
+                away_team=away,
+                match_date=start + timedelta(days=matchday + 10),
+                matchday=matchday,
+                home_score=home_score,
+                away_score=away_score,
+                is_played=played,
+            ))
+        Match.objects.bulk_create(matches, batch_size=500)
+        link_bracket(season.id, [(matchday, home_tok, away_tok) for _, home_tok, away_tok, matchday in KNOCKOUT_LAYOUT])
+        total_matches += len(matches)
+        budget -= len(matches)
+
+        rebuild_season_standings(season.id)
+
+    return {
+        'season_ids': season_ids,
+        'seasons': seasons,
+        'groups': groups,
+        'teams_per_group': teams_per_group,
+        'matches': total_matches,
+    }
+
+
+def time_case(func, repeat=5):
+    """Run `func` `repeat` times, each inside a rolled-back transaction.
+
+    Returns timings in milliseconds plus the query count of the first run.
+    Rolling back keeps every run on identical data and means on_commit
+    hooks (background tasks) never fire.
+    """
+    timings = []
+    queries = None
+    for i in range(repeat):
+        cache.clear()
+        with transaction.atomic():
+            if i == 0:
+                with CaptureQueriesContext(connection) as ctx:
+                    t0 = time.perf_counter()
+                    func()
+                    timings.append((time.perf_counter() - t0) * 1000)
+                queries = len(ctx.captured_queries)
+            else:
+                t0 = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - t0) * 1000)
+            transaction.set_rollback(True)
+    return {
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': queries,
+        'repeat': repeat,
+    }
+
+
+def hot_paths(season_id):
+    """Name -> zero-argument callable for each benchmarked hot path."""
+    from rest_framework.test import APIRequestFactory
+
+    from .utils import compute_standings
+    from .standings import get_standings, season_standings
+    from .views import MatchViewSet, bracket_view, grouped_standings, standings_view
+
+    factory = APIRequestFactory()
+    match_list = MatchViewSet.as_view({'get': 'list'})
+
+    def render(view, request, **kwargs):
+        response = view(request, **kwargs)
+        response.render()
+        return response
+
+    return {
+        'compute_standings': lambda: compute_standings(season_id),
+        'season_standings_sql': lambda: season_standings(season_id),
+        'get_standings_stored': lambda: get_standings(season_id),
+        'standings_view': lambda: render(standings_view, factory.get(f'/api/standings/{season_id}/'), season_id=season_id),
+        'grouped_standings': lambda: render(grouped_standings, factory.get('/api/grouped-standings/', {'season': season_id})),
+        'match_list': lambda: render(match_list, factory.get('/api/matches/', {'season': season_id})),
+        'bracket_tree': lambda: render(bracket_view, factory.get(f'/api/bracket/{season_id}/'), season_id=season_id),
+        'populate_next_stage': lambda: call_command('populate_next_stage', season=season_id, stdout=io.StringIO()),
+    }
+
+
+def encode_cases(season_id):
+    """Name -> (renderer, data) for timing response encoding on its own.
+
+    The data is fetched once through the real views so only the encoder
+    is measured.
+    """
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIRequestFactory
+
+    from .renderers import FastJSONRenderer, MessagePackRenderer
+    from .views import MatchViewSet, grouped_standings
+
+    factory = APIRequestFactory()
+    payloads = {
+        'match_list': MatchViewSet.as_view({'get': 'list'})(factory.get('/api/matches/', {'season': season_id})).data,
+        'grouped_standings': grouped_standings(factory.get('/api/grouped-standings/', {'season': season_id})).data,
+    }
+    renderers = {'json': JSONRenderer(), 'fast_json': FastJSONRenderer(), 'msgpack': MessagePackRenderer()}
+    return {
+        f'encode_{endpoint}_{name}': (renderer, data)
+        for endpoint, data in payloads.items()
+        for name, renderer in renderers.items()
+    }
+
+
+def hot_queries(season_id, team_id, team_name):
+    """Name -> (queryset, tables that must not be sequentially scanned, vendors or None).
+
+    One entry per access path the composite indexes are meant to serve;
+    `check_query_plans` runs EXPLAIN on each. `vendors` limits a check to
+    backends whose lookup can use the index at all (SQLite compiles
+    iexact to LIKE, which no index serves).
+    """
+    from .models import BracketSlot, MatchChange, TeamStanding
+
+    now = timezone.now()
+    return {
+        'standings_played': (Match.objects.filter(season_id=season_id, is_played=True).values('id'), ['league_match'], None),
+        'bracket_rounds': (Match.objects.filter(season_id=season_id, matchday__gte=22).order_by('matchday', 'match_date'), ['league_match'], None),
+        'next_stage_round': (Match.objects.filter(season_id=season_id, matchday=22), ['league_match'], None),
+        'placeholder_home': (Match.objects.filter(season_id=season_id, home_team_id=team_id).values('id'), ['league_match'], None),
+        'placeholder_away': (Match.objects.filter(season_id=season_id, away_team_id=team_id).values('id'), ['league_match'], None),
+        'bracket_feeds': (
+            BracketSlot.objects.filter(source_match_id=Match.objects.filter(season_id=season_id, matchday=22).values('id')[:1]),
+            ['league_bracketslot'], None,
+        ),
+        'season_list': (Match.objects.filter(season_id=season_id).order_by('matchday', 'match_date'), ['league_match'], None),
+        'list_page': (Match.objects.order_by('matchday', 'match_date', 'id')[:100], ['league_match'], None),
+        'upcoming_page': (
+            Match.objects.filter(is_played=False, void=False, match_date__gte=now).order_by('match_date', 'id')[:100],
+            ['league_match'], None,
+        ),
+        'recent_page': (Match.objects.filter(is_played=True, match_date__lte=now).order_by('-match_date', '-id')[:100], ['league_match'], None),
+        'change_feed': (MatchChange.objects.filter(season_id=season_id, id__gt=0).order_by('id')[:500], ['league_matchchange'], None),
+        'stored_standings': (TeamStanding.objects.filter(season_id=season_id), ['league_teamstanding'], None),
+        'team_by_name': (Team.objects.filter(name__iexact=team_name.lower()), ['league_team'], ('postgresql',)),
+    }
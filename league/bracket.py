@@ -0,0 +1,262 @@
+"""Knockout bracket links and progression.
+
+Each knockout match has a BracketSlot per side saying where its team
+comes from: the winner or loser of an earlier match (`source_match`) or a
+seeded position such as "1ST A". Until the source match is decided the
+side holds a placeholder team ("WINNER 22 (placeholder)"). Completing a
+match fills the slots it feeds by primary key, so no placeholder names are
+looked up and any bracket size works.
+"""
+import re
+
+from django.db import transaction
+
+from .cache import bump_bracket_version_on_commit, bump_results_version_on_commit
+from .changes import record_match_changes
+from .models import BracketSlot, Match, Team
+from .serializers import match_date_display
+
+# The 8-team layout the bracket commands create: (matchday, home token, away token)
+STANDARD_BRACKET = [
+    (22, '1ST A', '2ND B'),
+    (23, '1ST C', '2ND D'),
+    (24, '1ST B', '2ND A'),
+    (25, '1ST D', '2ND C'),
+    (26, 'WINNER 22', 'WINNER 23'),
+    (27, 'WINNER 24', 'WINNER 25'),
+    (28, 'LOSER 26', 'LOSER 27'),
+    (29, 'WINNER 26', 'WINNER 27'),
+]
+
+PLACEHOLDER_SUFFIX = ' (placeholder)'
+
+# Round names counted back from the final
+ROUND_NAMES = ['Final', 'Semifinal', 'Quarterfinal', 'Round of 16', 'Round of 32', 'Round of 64']
+
+_SOURCE_TOKEN = re.compile(r'^(WINNER|LOSER)\s+(\d+)\b', re.IGNORECASE)
+
+
+def parse_source_token(token):
+    """'WINNER 22' -> ('winner', 22); None for seeded tokens like '1ST A'."""
+    found = _SOURCE_TOKEN.match(token.strip())
+    if not found:
+        return None
+    return found.group(1).lower(), int(found.group(2))
+
+
+def placeholder_team(label):
+    """The shared placeholder Team shown until a slot is filled."""
+    name = f'{label}{PLACEHOLDER_SUFFIX}'
+    team, _ = Team.objects.get_or_create(name=name, defaults={'short_name': name[:20], 'archived': True})
+    return team
+
+
+def link_bracket(season_id, fixtures=STANDARD_BRACKET):
+    """Create the slots for a bracket laid out by matchday.
+
+    `fixtures` is an iterable of (matchday, home token, away token); the
+    match for each matchday is looked up once. Existing slots are kept.
+    Returns the number of slots written.
+    """
+    fixtures = list(fixtures)
+    matchdays = {md for md, _, _ in fixtures}
+    for _, home_tok, away_tok in fixtures:
+        for token in (home_tok, away_tok):
+            parsed = parse_source_token(token)
+            if parsed:
+                matchdays.add(parsed[1])
+    by_matchday = dict(
+        Match.objects.filter(season_id=season_id, matchday__in=matchdays).values_list('matchday', 'id')
+    )
+    slots = []
+    for matchday, home_tok, away_tok in fixtures:
+        target = by_matchday.get(matchday)
+        if target is None:
+            continue
+        for side, token in ((BracketSlot.HOME, home_tok), (BracketSlot.AWAY, away_tok)):
+            slot = BracketSlot(season_id=season_id, match_id=target, side=side, label=token)
+            parsed = parse_source_token(token)
+            if parsed:
+                slot.outcome = parsed[0]
+                slot.source_match_id = by_matchday.get(parsed[1])
+            slots.append(slot)
+    BracketSlot.objects.bulk_create(slots, ignore_conflicts=True)
+    bump_bracket_version_on_commit(season_id)
+    return len(slots)
+
+
+def match_outcome(match):
+    """(winner_id, loser_id) of a decided match, else None.
+
+    Decided by the score, then by penalties, then by `awarded_to`.
+    """
+    home, away = match.home_team_id, match.away_team_id
+    hs = match.home_score or 0
+    as_ = match.away_score or 0
+    if hs != as_:
+        return (home, away) if hs > as_ else (away, home)
+    ph, pa = match.penalty_home, match.penalty_away
+    if ph is not None and pa is not None and ph != pa:
+        return (home, away) if ph > pa else (away, home)
+    if match.awarded_to_id in (home, away):
+        return (home, away) if match.awarded_to_id == home else (away, home)
+    return None
+
+
+def advance_brackets(matches, outcomes=None):
+    """Put the winners and losers of `matches` into the slots they feed.
+
+    One query reads the fed slots with their target matches and one
+    bulk_update writes every dependent, so the cost does not grow with the
+    bracket and no Match signals fire (progression cannot re-enter itself).
+    `outcomes` maps match id -> (winner_id, loser_id) to override the
+    computed result, e.g. when an admin forces a winner. Dependent matches
+    already played are left alone. Returns the ids of the matches changed.
+    """
+    outcomes = outcomes or {}
+    teams = {}
+    for match in matches:
+        outcome = outcomes.get(match.pk) or match_outcome(match)
+        if outcome is not None:
+            teams[match.pk] = {BracketSlot.WINNER: outcome[0], BracketSlot.LOSER: outcome[1]}
+    if not teams:
+        return []
+
+    with transaction.atomic():
+        slots = (
+            BracketSlot.objects.filter(source_match_id__in=teams, match__is_played=False)
+            .select_related('match')
+            .only('side', 'outcome', 'source_match_id', 'match__season_id', 'match__home_team_id', 'match__away_team_id')
+            .select_for_update(of=('match',))
+        )
+        changed = {}
+        for slot in slots:
+            target = changed.get(slot.match_id, slot.match)
+            field = f'{slot.side}_team_id'
+            team_id = teams[slot.source_match_id][slot.outcome]
+            if getattr(target, field) != team_id:
+                setattr(target, field, team_id)
+                changed[slot.match_id] = target
+        if changed:
+            Match.objects.bulk_update(changed.values(), ['home_team', 'away_team'])
+            record_match_changes((m.id, m.season_id) for m in changed.values())
+            seasons = {m.season_id for m in changed.values()}
+            bump_results_version_on_commit(*seasons)
+            bump_bracket_version_on_commit(*seasons)
+    return list(changed)
+
+
+def advance_bracket(match, outcome=None):
+    """advance_brackets() for a single match."""
+    return advance_brackets([match], {match.pk: outcome} if outcome else None)
+
+
+def advance_season(season_id):
+    """Re-apply every decided match of a season that feeds a slot."""
+    sources = (
+        Match.objects.filter(season_id=season_id, is_played=True, feeds__isnull=False)
+        .distinct()
+    )
+    return advance_brackets(sources)
+
+
+def _side(match, slot, side):
+    team = match.home_team if side == BracketSlot.HOME else match.away_team
+    return {
+        'team_id': team.id,
+        'team_name': team.name,
+        'placeholder': team.name.endswith(PLACEHOLDER_SUFFIX),
+        'label': slot.label if slot else '',
+        'source_match_id': slot.source_match_id if slot else None,
+        'outcome': slot.outcome if slot else '',
+    }
+
+
+def slot_rounds(slots):
+    """{match_id: (round, name)} for one season's bracket, from its slots alone.
+
+    A match fed by no other match is in round 1, every other match is one
+    round after its latest feeder; names count back from the last round
+    (ROUND_NAMES). A last-round match whose slots take losers is the
+    third-place match. Source matches without slots of their own (a
+    partial layout) are included as first-round matches.
+    """
+    by_target = {(s.match_id, s.side): s for s in slots}
+    feeders = {}
+    for s in slots:
+        if s.source_match_id:
+            feeders.setdefault(s.match_id, []).append(s.source_match_id)
+    match_ids = {s.match_id for s in slots} | {src for sources in feeders.values() for src in sources}
+
+    depth = {}
+
+    def depth_of(match_id, seen=()):
+        if match_id not in depth:
+            sources = [src for src in feeders.get(match_id, []) if src not in seen]
+            depth[match_id] = 1 + max((depth_of(src, seen + (match_id,)) for src in sources), default=0)
+        return depth[match_id]
+
+    for match_id in match_ids:
+        depth_of(match_id)
+    last = max(depth.values(), default=0)
+
+    def round_name(match_id):
+        d = depth[match_id]
+        # by the slot outcome, not the feeders: a partial layout (only the
+        # third-place match and final) has no feeder matches at all
+        sides = (by_target.get((match_id, side)) for side in (BracketSlot.HOME, BracketSlot.AWAY))
+        if d == last and any(s is not None and s.outcome == BracketSlot.LOSER for s in sides):
+            return 'Third Place'
+        back = last - d
+        return ROUND_NAMES[back] if back < len(ROUND_NAMES) else f'Round {d}'
+
+    return {match_id: (depth[match_id], round_name(match_id)) for match_id in match_ids}
+
+
+def bracket_tree(season_id):
+    """The season's knockout bracket as one document for the bracket page.
+
+    Rounds come from `slot_rounds`. Each match lists its two sides (team
+    or placeholder, the slot label and feeder) and the slots its winner
+    and loser go on to. Two queries, whatever the bracket size.
+    """
+    slots = list(BracketSlot.objects.filter(season_id=season_id))
+    match_ids = {s.match_id for s in slots} | {s.source_match_id for s in slots if s.source_match_id}
+    matches = {
+        m.id: m for m in Match.objects.filter(id__in=match_ids).select_related('home_team', 'away_team')
+    }
+    by_target = {(s.match_id, s.side): s for s in slots}
+    feeds = {}
+    for s in slots:
+        if s.source_match_id in matches:
+            feeds.setdefault(s.source_match_id, []).append(
+                {'match_id': s.match_id, 'side': s.side, 'outcome': s.outcome}
+            )
+    rounds_of = slot_rounds(slots)
+
+    rounds = {}
+    for match in sorted(matches.values(), key=lambda m: (m.matchday or 0, m.match_date, m.id)):
+        outcome = match_outcome(match) if match.is_played else None
+        depth, name = rounds_of[match.id]
+        rounds.setdefault((depth, name == 'Third Place', name), []).append({
+            'id': match.id,
+            'matchday': match.matchday,
+            'match_date': match_date_display(match.match_date),
+            'is_played': match.is_played,
+            'void': match.void,
+            'home_score': match.home_score,
+            'away_score': match.away_score,
+            'penalty_home': match.penalty_home,
+            'penalty_away': match.penalty_away,
+            'winner_id': outcome[0] if outcome else None,
+            'home': _side(match, by_target.get((match.id, BracketSlot.HOME)), BracketSlot.HOME),
+            'away': _side(match, by_target.get((match.id, BracketSlot.AWAY)), BracketSlot.AWAY),
+            'feeds': feeds.get(match.id, []),
+        })
+    return {
+        'season_id': season_id,
+        'rounds': [
+            {'round': d, 'name': name, 'matches': round_matches}
+            for (d, _, name), round_matches in sorted(rounds.items())
+        ],
+    }
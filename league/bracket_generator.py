@@ -0,0 +1,308 @@
+"""Knockout bracket generation for any power-of-two size.
+
+`plan_bracket` lays out the fixtures of a 4/8/16/32 team bracket (tokens
+only, no database access); `generate_bracket` resolves the seeded tokens
+from the group tables in one pass, dates the rounds, diffs the plan
+against the knockout matches the season already has and, unless it is a
+dry run, writes every new or changed match and the slot links in one
+transaction with bulk operations.
+
+Tokens follow the bracket commands: "1ST A" / "2ND B" (group position),
+"SEED 3" (ranked across groups) and "WINNER 22" / "LOSER 26" (result of
+the match on that matchday). Every knockout match has its own matchday.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .bracket import PLACEHOLDER_SUFFIX, ROUND_NAMES, advance_season, link_bracket, parse_source_token
+from .cache import bump_results_version_on_commit
+from .changes import record_match_changes
+from .models import BracketSlot, Match, Team
+from .snapshots import invalidate_snapshots
+from .standings import grouped_standings_tables, refresh_team_standings
+from .tasks import schedule_snapshot_build
+from .utils import standings_sort_key
+
+BRACKET_SIZES = (4, 8, 16, 32)
+SEEDINGS = ('cross', 'ranked')
+FIRST_KNOCKOUT_MATCHDAY = 22
+DEFAULT_KICKOFF = time(14, 0)
+
+
+def ordinal(n):
+    return {1: '1ST', 2: '2ND', 3: '3RD'}.get(n, f'{n}TH')
+
+
+def seed_order(size):
+    """Bracket positions of seeds 1..size so the top seeds meet as late as possible.
+
+    seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+    """
+    order = [1]
+    while len(order) < size:
+        n = len(order) * 2
+        order = [s for seed in order for s in (seed, n + 1 - seed)]
+    return order
+
+
+def first_round_pairs(size, seeding, group_names):
+    """(home token, away token) pairs of the first round, in bracket order.
+
+    'cross': group winners against the runners-up of the paired group, the
+    two teams of a group in opposite halves (A1-B2, C1-D2 | B1-A2, D1-C2);
+    needs size == 2 * number of groups and an even number of groups.
+    'ranked': qualifiers ranked across groups as SEED 1..size, placed so
+    seeds 1 and 2 can only meet in the final.
+    """
+    if seeding == 'cross':
+        groups = list(group_names)
+        if len(groups) * 2 != size or len(groups) % 2:
+            raise ValueError(
+                f'Cross seeding needs an even number of groups with two qualifiers each '
+                f'({size // 2} groups for a {size}-team bracket, found {len(groups)})'
+            )
+        pairs = list(zip(groups[::2], groups[1::2]))
+        top = [(f'1ST {x}', f'2ND {y}') for x, y in pairs]
+        bottom = [(f'1ST {y}', f'2ND {x}') for x, y in pairs]
+        return top + bottom
+    if seeding == 'ranked':
+        order = seed_order(size)
+        return [(f'SEED {order[i]}', f'SEED {order[i + 1]}') for i in range(0, size, 2)]
+    raise ValueError(f"Unknown seeding '{seeding}' (choose from {', '.join(SEEDINGS)})")
+
+
+def plan_bracket(size, seeding='cross', group_names=(), first_matchday=FIRST_KNOCKOUT_MATCHDAY, third_place=True):
+    """Fixtures of a knockout bracket, earliest round first.
+
+    Returns a list of dicts with matchday, round (index from 0), name,
+    home and away tokens. The third-place match (losers of the semis)
+    comes just before the final.
+    """
+    if size not in BRACKET_SIZES:
+        raise ValueError(f"Bracket size must be one of {', '.join(map(str, BRACKET_SIZES))}")
+    rounds = size.bit_length() - 1
+    fixtures = []
+    matchday = first_matchday
+    previous = []
+    for r in range(rounds):
+        name = ROUND_NAMES[rounds - 1 - r]
+        if r == 0:
+            pairs = first_round_pairs(size, seeding, group_names)
+        else:
+            pairs = [(f'WINNER {previous[i]}', f'WINNER {previous[i + 1]}') for i in range(0, len(previous), 2)]
+        if r == rounds - 1 and third_place and len(previous) == 2:
+            fixtures.append({
+                'matchday': matchday, 'round': r, 'name': 'Third Place',
+                'home': f'LOSER {previous[0]}', 'away': f'LOSER {previous[1]}',
+            })
+            matchday += 1
+        current = []
+        for home, away in pairs:
+            fixtures.append({'matchday': matchday, 'round': r, 'name': name, 'home': home, 'away': away})
+            current.append(matchday)
+            matchday += 1
+        previous = current
+    return fixtures
+
+
+def schedule(fixtures, start, kickoffs=(), round_gap_days=2):
+    """Date the fixtures in place: one kickoff slot per match, as many matches
+    a day as there are kickoffs (default: the start time), and each round
+    starting `round_gap_days` after the previous round's last day. The
+    third-place match is part of the final's round."""
+    kickoffs = list(kickoffs) or [start.time()]
+    day = start.date()
+    slot = 0
+    current_round = None
+    for fixture in fixtures:
+        if current_round is not None and fixture['round'] != current_round:
+            day += timedelta(days=round_gap_days)
+            slot = 0
+        elif slot == len(kickoffs):
+            day += timedelta(days=1)
+            slot = 0
+        current_round = fixture['round']
+        fixture['date'] = datetime.combine(day, kickoffs[slot], tzinfo=start.tzinfo)
+        slot += 1
+    return fixtures
+
+
+def group_qualifiers(season_id, per_group):
+    """Resolve the seeded tokens of a season from its group tables in one pass.
+
+    Returns ({token: team_id}, pending) where the tokens are "1ST A"-style
+    positions for the top `per_group` of every group plus "SEED n" for
+    those qualifiers ranked across groups (position, then the usual
+    standings order), and `pending` holds the tokens that can still change
+    because a group has matches left to play (every SEED token then).
+    """
+    tables = grouped_standings_tables(season_id)
+    group_of = {row['team_id']: t['group']['name'] for t in tables for row in t['standings']}
+    open_groups = set()
+    open_matches = Match.objects.filter(season_id=season_id, is_played=False, void=False).values_list('home_team_id', 'away_team_id')
+    for home, away in open_matches:
+        if home in group_of and group_of[home] == group_of.get(away):
+            open_groups.add(group_of[home])
+
+    tokens = {}
+    pending = set()
+    ranked = []
+    for table in tables:
+        group = table['group']['name']
+        for position, row in enumerate(table['standings'][:per_group], start=1):
+            token = f'{ordinal(position)} {group}'
+            tokens[token] = row['team_id']
+            if group in open_groups:
+                pending.add(token)
+            ranked.append(((position,) + standings_sort_key(row), row['team_id']))
+    ranked.sort()
+    for seed, (_, team_id) in enumerate(ranked, start=1):
+        tokens[f'SEED {seed}'] = team_id
+        if open_groups:
+            pending.add(f'SEED {seed}')
+    return tokens, pending
+
+
+def generate_bracket(season, size=8, seeding='cross', start=None, kickoffs=(), round_gap_days=2, dates=None,
+                     first_matchday=None, third_place=True, resolve_incomplete=False, dry_run=False):
+    """Plan, diff and (unless dry_run) write a season's knockout bracket.
+
+    Returns a list of diff rows: dicts with matchday, name, action
+    ('create', 'update', 'keep' or 'played'), the planned fixture and the
+    existing match (or None). Played matches are never changed, and a side
+    already filled by bracket progression keeps its team. Dates of
+    existing matches are only changed when a date plan (start or dates) is
+    given. Raises ValueError for an impossible plan.
+    """
+    groups = [t['group']['name'] for t in grouped_standings_tables(season.id)]
+    bracket_match_ids = BracketSlot.objects.filter(season_id=season.id).values_list('match_id', flat=True)
+    if first_matchday is None:
+        group_top = (
+            Match.objects.filter(season_id=season.id).exclude(id__in=bracket_match_ids)
+            .aggregate(top=Max('matchday'))['top']
+        )
+        first_matchday = max(FIRST_KNOCKOUT_MATCHDAY, (group_top or 0) + 1)
+    fixtures = plan_bracket(size, seeding, groups, first_matchday, third_place)
+
+    matchdays = [f['matchday'] for f in fixtures]
+    existing = {}
+    for match in Match.objects.filter(season_id=season.id, matchday__in=matchdays).select_related('home_team', 'away_team').order_by('id'):
+        existing.setdefault(match.matchday, match)
+
+    # date plan; without one, existing matches keep their dates
+    dated = bool(dates) or start is not None
+    if dates:
+        if len(dates) != len(fixtures):
+            raise ValueError(f'{len(fixtures)} dates needed, {len(dates)} given')
+        for fixture, when in zip(fixtures, dates):
+            fixture['date'] = timezone.make_aware(when) if settings.USE_TZ and timezone.is_naive(when) else when
+    else:
+        if start is None:
+            last = Match.objects.filter(season_id=season.id).exclude(matchday__in=matchdays).aggregate(last=Max('match_date'))['last']
+            day = (last or timezone.now()).date() + timedelta(days=1)
+            start = datetime.combine(day, kickoffs[0] if kickoffs else DEFAULT_KICKOFF)
+        if settings.USE_TZ and timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        schedule(fixtures, start, kickoffs, round_gap_days)
+
+    # resolve the seeded tokens; anything unresolved plays as a placeholder for now
+    per_group = 2 if seeding == 'cross' else -(-size // max(len(groups), 1))
+    tokens, pending = group_qualifiers(season.id, per_group)
+    names = set()
+    for fixture in fixtures:
+        for side in ('home', 'away'):
+            token = fixture[side]
+            team_id = None
+            if parse_source_token(token) is None and (resolve_incomplete or token not in pending):
+                team_id = tokens.get(token)
+            fixture[f'{side}_team_id'] = team_id
+            if team_id is None:
+                names.add(f'{token}{PLACEHOLDER_SUFFIX}')
+    placeholders = dict(Team.objects.filter(name__in=names).values_list('name', 'id'))
+
+    team_names = dict(Team.objects.filter(
+        id__in={f[f'{s}_team_id'] for f in fixtures for s in ('home', 'away')} - {None}
+    ).values_list('id', 'name'))
+
+    diff = []
+    for fixture in fixtures:
+        match = existing.get(fixture['matchday'])
+        for side in ('home', 'away'):
+            current = getattr(match, f'{side}_team') if match else None
+            if fixture[f'{side}_team_id'] is not None:
+                fixture[f'{side}_name'] = team_names[fixture[f'{side}_team_id']]
+            elif parse_source_token(fixture[side]) and current and not current.name.endswith(PLACEHOLDER_SUFFIX):
+                # already filled by bracket progression
+                fixture[f'{side}_name'], fixture[f'{side}_team_id'] = current.name, current.id
+            else:
+                fixture[f'{side}_name'] = f"{fixture[side]}{PLACEHOLDER_SUFFIX}"
+                fixture[f'{side}_team_id'] = placeholders.get(fixture[f'{side}_name'])
+        if match is None:
+            action = 'create'
+        elif match.is_played:
+            action = 'played'
+        elif (
+            (match.home_team.name, match.away_team.name) != (fixture['home_name'], fixture['away_name'])
+            or (dated and match.match_date != fixture['date'])
+        ):
+            action = 'update'
+        else:
+            action = 'keep'
+        diff.append({'matchday': fixture['matchday'], 'name': fixture['name'], 'action': action, 'fixture': fixture, 'match': match})
+
+    if dry_run:
+        return diff
+
+    with transaction.atomic():
+        missing = sorted(names - set(placeholders))
+        if missing:
+            Team.objects.bulk_create(
+                [Team(name=name, short_name=name[:20], archived=True) for name in missing],
+                ignore_conflicts=True,
+            )
+            placeholders.update(Team.objects.filter(name__in=missing).values_list('name', 'id'))
+        for row in diff:
+            fixture = row['fixture']
+            for side in ('home', 'away'):
+                fixture[f'{side}_team_id'] = fixture[f'{side}_team_id'] or placeholders[fixture[f'{side}_name']]
+
+        to_create = [
+            Match(
+                season=season, matchday=row['matchday'], match_date=row['fixture']['date'],
+                home_team_id=row['fixture']['home_team_id'], away_team_id=row['fixture']['away_team_id'],
+            )
+            for row in diff if row['action'] == 'create'
+        ]
+        to_update = []
+        touched_teams = set()
+        for row in diff:
+            if row['action'] != 'update':
+                continue
+            match, fixture = row['match'], row['fixture']
+            touched_teams.update((match.home_team_id, match.away_team_id))
+            match.home_team_id = fixture['home_team_id']
+            match.away_team_id = fixture['away_team_id']
+            if dated:
+                match.match_date = fixture['date']
+            to_update.append(match)
+        Match.objects.bulk_create(to_create)
+        if to_update:
+            Match.objects.bulk_update(to_update, ['home_team', 'away_team', 'match_date'])
+        written = to_create + to_update
+        if written:
+            record_match_changes((m.id, m.season_id) for m in written)
+            touched_teams.update(t for m in written for t in (m.home_team_id, m.away_team_id))
+            refresh_team_standings(season.id, touched_teams)
+            invalidate_snapshots(season.id, min(m.matchday for m in written))
+            schedule_snapshot_build(season.id)
+            bump_results_version_on_commit(season.id)
+
+        BracketSlot.objects.filter(season_id=season.id).delete()
+        link_bracket(season.id, [(f['matchday'], f['home'], f['away']) for f in fixtures])
+        # refill the fed sides from the matches already decided under the new links
+        advance_season(season.id)
+    return diff
@@ -0,0 +1,134 @@
+"""Per-season results versions and the payload cache keyed on them.
+
+Every Match (or group membership) change in a season bumps that season's
+results version. Read endpoints cache their computed payload under
+(endpoint, season, version) and use the version as a strong ETag, so an
+idle poll is a cache lookup and a matching If-None-Match is a 304.
+
+The knockout bracket has its own bracket version, bumped only when a
+match that is part of the season's bracket (or a slot link) changes, so
+group-stage results do not throw the bracket document away.
+
+Versions live in the cache when it is shared between processes (Redis).
+With a per-process cache (LocMemCache) a bump would only reach the
+worker that made it, so LEAGUE_VERSIONS_IN_DB keeps the counters on the
+Season row instead: every worker then agrees on the version, and a
+payload cached by one process is only ever served for the version it
+was computed at.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+VERSION_KEY = 'league:results-version:{season_id}'
+BRACKET_VERSION_KEY = 'league:bracket-version:{season_id}'
+PAYLOAD_KEY = 'league:payload:{name}:{season_id}:{version}'
+PAYLOAD_TIMEOUT = 60 * 60
+# payloads in a per-process cache are only dropped by expiry, so keep them briefly
+LOCAL_PAYLOAD_TIMEOUT = 60
+
+
+def _versions_in_db():
+    return getattr(settings, 'LEAGUE_VERSIONS_IN_DB', False)
+
+
+def _db_versions(field, season_ids):
+    from .models import Season
+
+    found = dict(Season.objects.filter(id__in=season_ids).values_list('id', field))
+    return [found.get(sid, 0) for sid in season_ids]
+
+
+def _db_bump(field, season_id):
+    from .models import Season
+
+    Season.objects.filter(id=season_id).update(**{field: F(field) + 1})
+
+
+def _initial_version():
+    # Millisecond clock: if the version key is evicted, the new one cannot
+    # collide with versions that still have payloads cached.
+    return int(time.time() * 1000)
+
+
+def _version(key):
+    return cache.get_or_set(key, _initial_version, timeout=None)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def results_version(season_id):
+    if _versions_in_db():
+        return _db_versions('results_version', [season_id])[0]
+    return _version(VERSION_KEY.format(season_id=season_id))
+
+
+def results_versions(season_ids):
+    """Current versions of several seasons with a single cache (or database) round-trip."""
+    if _versions_in_db():
+        return _db_versions('results_version', list(season_ids))
+    keys = {sid: VERSION_KEY.format(season_id=sid) for sid in season_ids}
+    found = cache.get_many(keys.values())
+    versions = []
+    for sid, key in keys.items():
+        if key not in found:
+            found[key] = results_version(sid)
+        versions.append(found[key])
+    return versions
+
+
+def bump_results_version(season_id):
+    if not season_id:
+        return
+    if _versions_in_db():
+        _db_bump('results_version', season_id)
+    else:
+        _bump(VERSION_KEY.format(season_id=season_id))
+
+
+def bump_results_version_on_commit(*season_ids):
+    """Bump after the surrounding transaction commits (immediately in autocommit)."""
+    for season_id in {sid for sid in season_ids if sid}:
+        transaction.on_commit(lambda sid=season_id: bump_results_version(sid))
+
+
+def bracket_version(season_id):
+    if _versions_in_db():
+        return _db_versions('bracket_version', [season_id])[0]
+    return _version(BRACKET_VERSION_KEY.format(season_id=season_id))
+
+
+def bump_bracket_version(season_id):
+    if not season_id:
+        return
+    if _versions_in_db():
+        _db_bump('bracket_version', season_id)
+    else:
+        _bump(BRACKET_VERSION_KEY.format(season_id=season_id))
+
+
+def bump_bracket_version_on_commit(*season_ids):
+    for season_id in {sid for sid in season_ids if sid}:
+        transaction.on_commit(lambda sid=season_id: bump_bracket_version(sid))
+
+
+def season_etag(name, season_id, version):
+    return f'"{name}-{season_id}-{version}"'
+
+
+def cached_payload(name, season_id, version, compute):
+    """Return the payload for (name, season, version), computing it on a miss."""
+    key = PAYLOAD_KEY.format(name=name, season_id=season_id, version=version)
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, LOCAL_PAYLOAD_TIMEOUT if _versions_in_db() else PAYLOAD_TIMEOUT)
+    return data
@@ -0,0 +1,95 @@
+"""Match change feed (`/api/matches/changes/?since=<cursor>`).
+
+Every Match save or delete appends a MatchChange row; its id is the
+cursor. A client keeps the last cursor it saw and asks for everything
+after it, getting the current state of changed matches plus the ids of
+deleted ones, instead of re-downloading the full match list.
+
+Queryset updates bypass the signals, so code that rewrites matches in
+bulk goes through `tracked_update` (or calls `record_match_changes`).
+
+An id handed out inside a long transaction only becomes visible when
+that transaction commits, by which time a poller may already have
+passed it. So the log rows are inserted once the writing transaction
+has committed, and the cursor is held back behind rows younger than
+LEAGUE_CHANGE_FEED_LAG seconds, which covers the insert itself racing
+another one.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Match, MatchChange
+
+
+def record_match_changes(matches, deleted=False):
+    """Log changes for an iterable of (match_id, season_id) pairs once the transaction commits."""
+    rows = [
+        MatchChange(match_id=match_id, season_id=season_id, deleted=deleted)
+        for match_id, season_id in dict.fromkeys(matches)
+    ]
+    if rows:
+        transaction.on_commit(lambda: MatchChange.objects.bulk_create(rows))
+
+
+def tracked_update(queryset, **values):
+    """queryset.update(**values) that also records the touched matches."""
+    touched = list(queryset.values_list('id', 'season_id'))
+    if not touched:
+        return 0
+    updated = Match.objects.filter(id__in=[mid for mid, _ in touched]).update(**values)
+    record_match_changes(touched)
+    return updated
+
+
+def _unsettled(qs):
+    """Id of the oldest row of `qs` still inside the commit lag, or None."""
+    lag = getattr(settings, 'LEAGUE_CHANGE_FEED_LAG', 0)
+    if lag <= 0:
+        return None
+    cutoff = timezone.now() - timedelta(seconds=lag)
+    return qs.filter(changed_at__gt=cutoff).order_by('id').values_list('id', flat=True).first()
+
+
+def current_cursor():
+    young = _unsettled(MatchChange.objects.all())
+    if young is not None:
+        return young - 1
+    last = MatchChange.objects.order_by('-id').values_list('id', flat=True).first()
+    return last or 0
+
+
+def cursor_expired(since):
+    """True when rows after `since` have been pruned, so the client must resync."""
+    if since <= 0:
+        return False
+    oldest = MatchChange.objects.order_by('id').values_list('id', flat=True).first()
+    return oldest is not None and oldest > since + 1 and not MatchChange.objects.filter(id__lte=since).exists()
+
+
+def changes_since(since, season_id=None, limit=500):
+    """Collapse the log after `since` into (changed_ids, deleted_ids, cursor, has_more).
+
+    Only the latest entry per match counts, so a match edited ten times is
+    returned once and a match created then deleted is a tombstone. Rows
+    from the oldest one inside the commit lag on are left for the next poll.
+    """
+    qs = MatchChange.objects.filter(id__gt=since)
+    if season_id is not None:
+        qs = qs.filter(season_id=season_id)
+    young = _unsettled(qs)
+    if young is not None:
+        qs = qs.filter(id__lt=young)
+    rows = list(qs.order_by('id').values_list('id', 'match_id', 'deleted')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {}
+    for _, match_id, deleted in rows:
+        latest.pop(match_id, None)
+        latest[match_id] = deleted
+    changed = [mid for mid, deleted in latest.items() if not deleted]
+    removed = [mid for mid, deleted in latest.items() if deleted]
+    cursor = rows[-1][0] if rows else since
+    return changed, removed, cursor, has_more
@@ -0,0 +1,44 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .live import match_group, season_group
+
+
+class _LiveConsumer(AsyncJsonWebsocketConsumer):
+    """Read-only subscription: join one group and forward its deltas.
+
+    The group is named by `group_for` applied to the `url_kwarg` route
+    argument, the season group unless a subclass picks another pair.
+    """
+
+    group_for = staticmethod(season_group)
+    url_kwarg = 'season_id'
+
+    def get_group(self):
+        return self.group_for(self.scope['url_route']['kwargs'][self.url_kwarg])
+
+    async def connect(self):
+        self.group = self.get_group()
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # clients only listen; answer pings so they can detect stale sockets
+        if isinstance(content, dict) and content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    async def match_update(self, message):
+        await self.send_json(message['data'])
+
+
+class LiveSeasonConsumer(_LiveConsumer):
+    """Score/period deltas for every match of a season."""
+
+
+class LiveMatchConsumer(_LiveConsumer):
+    """Score/period deltas for a single match."""
+
+    group_for = staticmethod(match_group)
+    url_kwarg = 'match_id'
@@ -0,0 +1,295 @@
+"""Bulk spreadsheet imports (teams into groups, and match fixtures).
+
+Workbooks are read in openpyxl's read-only mode, which streams rows
+from the file instead of building every cell in memory. Everything a
+row is checked against (seasons, groups, team names) is loaded into
+dictionaries once before the first row, so a row costs no queries. The
+writes are collected per batch and go out with bulk_create inside one
+transaction. bulk_create sends no signals, so the standings, snapshot
+and cache bookkeeping the TeamGroup receivers would have done happens
+once per season at the end.
+"""
+import difflib
+import math
+from collections import defaultdict
+from datetime import datetime
+
+import openpyxl
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_results_version_on_commit
+from .changes import record_match_changes
+from .models import Group, Match, Season, Team, TeamGroup
+from .snapshots import invalidate_snapshots
+from .standings import refresh_team_standings
+from .tasks import schedule_snapshot_build
+
+BATCH_SIZE = 500
+
+# get_close_matches() settings for flagging near-duplicate team names
+DUPLICATE_CUTOFF = 0.82
+DUPLICATE_SUGGESTIONS = 3
+
+# The only Match Date text the fixture import accepts, e.g. '6/12/2025 4:00:00 PM'
+MATCH_DATE_FORMAT = '%d/%m/%Y %I:%M:%S %p'
+
+MATCH_ERROR_FIELDS = ['row', 'season', 'home', 'away', 'match_date', 'match_time', 'matchday', 'venue', 'error']
+
+
+def stream_rows(file_obj):
+    """Yield the active sheet's rows as value tuples, header first."""
+    wb = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _key(name):
+    return str(name).strip().casefold()
+
+
+class TeamNames:
+    """Existing team names for exact (case-insensitive) and near-duplicate lookups.
+
+    Names are bucketed by length: two strings of lengths a <= b can only
+    reach a difflib ratio of 2a / (a + b), so a name is compared just with
+    the buckets that could clear the cutoff instead of every team.
+    """
+
+    def __init__(self, teams):
+        self.by_key = {}
+        self.by_length = defaultdict(list)
+        for team in teams:
+            self.by_key.setdefault(_key(team.name), team)
+            self.by_length[len(team.name)].append(team.name)
+        self._close = {}
+
+    def get(self, name):
+        return self.by_key.get(_key(name))
+
+    def add(self, team):
+        self.by_key.setdefault(_key(team.name), team)
+
+    def close_matches(self, name, n=DUPLICATE_SUGGESTIONS, cutoff=DUPLICATE_CUTOFF):
+        name = str(name).strip()
+        if name not in self._close:
+            size = len(name)
+            lo = math.ceil(size * cutoff / (2 - cutoff))
+            hi = math.floor(size * (2 - cutoff) / cutoff)
+            candidates = [c for length in range(lo, hi + 1) for c in self.by_length.get(length, ())]
+            self._close[name] = difflib.get_close_matches(name, candidates, n=n, cutoff=cutoff)
+        return self._close[name]
+
+
+def import_team_rows(rows):
+    """Import (Team Name, Category, Season, Group) rows into group memberships.
+
+    `rows` yields the header first, then value tuples (see stream_rows).
+    A team whose name matches an existing one (ignoring case) is reused;
+    a new name close to an existing one is reported as a suspected
+    duplicate instead of being created. Returns one result per row
+    ({'team', 'status', 'reason', 'suggestions'}), or raises ValueError
+    when the header is missing a column.
+    """
+    rows = iter(rows)
+    header = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+    required_cols = ['Team Name', 'Category', 'Season', 'Group']
+    if not all(col in header for col in required_cols):
+        raise ValueError(f'Missing required columns. Found: {header}')
+    index = {col: header.index(col) for col in required_cols}
+
+    seasons = {}
+    for season in Season.objects.order_by('id'):
+        seasons.setdefault((season.name, season.category), season)
+    groups = {(g.season_id, g.name): g for g in Group.objects.order_by('id')}
+    names = TeamNames(Team.objects.only('id', 'name'))
+
+    results = []
+    joined = defaultdict(set)
+    with transaction.atomic():
+        batch = []
+        for row in rows:
+            values = {col: row[i] if i < len(row) else None for col, i in index.items()}
+            team_name = values['Team Name']
+            category, season_name, group_name = values['Category'], values['Season'], values['Group']
+            if not all([team_name, category, season_name, group_name]):
+                if any(v is not None for v in row):
+                    results.append({'team': team_name, 'status': 'skipped', 'reason': 'Missing data'})
+                continue
+            team_name, group_name = str(team_name).strip(), str(group_name).strip()
+
+            team = names.get(team_name)
+            if team is None:
+                close = names.close_matches(team_name)
+                if close:
+                    results.append({'team': team_name, 'status': 'duplicate_suspected', 'reason': 'Similar team exists', 'suggestions': close})
+                    continue
+
+            season = seasons.get((str(season_name).strip(), str(category).strip()))
+            if not season:
+                results.append({'team': team_name, 'status': 'skipped', 'reason': 'Season not found'})
+                continue
+
+            batch.append((team_name, season, group_name))
+            results.append({'team': team_name, 'status': 'imported'})
+            if len(batch) >= BATCH_SIZE:
+                _write_memberships(batch, names, groups, joined)
+                batch = []
+        _write_memberships(batch, names, groups, joined)
+
+        for season_id, team_ids in joined.items():
+            refresh_team_standings(season_id, team_ids)
+            invalidate_snapshots(season_id, None)
+            schedule_snapshot_build(season_id)
+        bump_results_version_on_commit(*joined)
+    return results
+
+
+def _write_memberships(batch, names, groups, joined):
+    """Create the missing teams and groups of a batch, then its TeamGroup rows."""
+    new_teams = {}
+    new_groups = {}
+    for team_name, season, group_name in batch:
+        if names.get(team_name) is None:
+            new_teams.setdefault(_key(team_name), Team(name=team_name, short_name=team_name[:20]))
+        if (season.id, group_name) not in groups:
+            new_groups.setdefault((season.id, group_name), Group(name=group_name, category=season.category, season=season))
+    for team in Team.objects.bulk_create(new_teams.values()):
+        names.add(team)
+    for group in Group.objects.bulk_create(new_groups.values()):
+        groups[(group.season_id, group.name)] = group
+
+    memberships = {}
+    for team_name, season, group_name in batch:
+        team = names.get(team_name)
+        group = groups[(season.id, group_name)]
+        memberships[(team.id, group.id)] = TeamGroup(team=team, group=group, season=season)
+        joined[season.id].add(team.id)
+    # a team already in the group is left as it is
+    TeamGroup.objects.bulk_create(memberships.values(), ignore_conflicts=True)
+
+
+def _match_date(value):
+    """A cell's kickoff: an Excel datetime as is, else text in MATCH_DATE_FORMAT."""
+    if isinstance(value, datetime):
+        match_dt = value
+    else:
+        match_dt = datetime.strptime(str(value).strip(), MATCH_DATE_FORMAT)
+    if settings.USE_TZ and timezone.is_naive(match_dt):
+        match_dt = timezone.make_aware(match_dt)
+    return match_dt
+
+
+def import_match_rows(rows):
+    """Create the fixtures in (Season, Home Team, Away Team, Match Date[, Matchday, Venue]) rows.
+
+    `rows` yields the header first (column names are matched ignoring
+    case), then value tuples. Season is an id or a name, teams are
+    matched by name ignoring case; an unknown team is reported with the
+    closest existing names. Valid rows are written in batches with
+    bulk_create inside one transaction. Returns (created, error_rows),
+    error_rows being dicts with MATCH_ERROR_FIELDS; raises ValueError when
+    the file is empty or the header is missing a column.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        raise ValueError('Excel file is empty')
+    found = [str(h).strip() if h is not None else '' for h in first]
+    header = [h.lower() for h in found]
+    required = ['Season', 'Home Team', 'Away Team', 'Match Date']
+    if not all(col.lower() in header for col in required):
+        raise ValueError(f'Header must include: {required}. Found: {found}')
+    columns = {
+        field: header.index(col) if col in header else None
+        for field, col in (
+            ('season', 'season'), ('home', 'home team'), ('away', 'away team'), ('match_date', 'match date'),
+            ('match_time', 'match time'), ('matchday', 'matchday'), ('venue', 'venue'),
+        )
+    }
+
+    seasons = {}
+    for season in Season.objects.order_by('id'):
+        seasons[str(season.id)] = season
+        seasons.setdefault(_key(season.name), season)
+    names = TeamNames(Team.objects.only('id', 'name'))
+
+    created = 0
+    error_rows = []
+    touched = defaultdict(lambda: {'teams': set(), 'matchdays': set()})
+    with transaction.atomic():
+        batch = []
+        for i, row in enumerate(rows, start=2):
+            if all(v is None or str(v).strip() == '' for v in row):
+                continue
+            data = {field: row[index] if index is not None and index < len(row) else None for field, index in columns.items()}
+            data['venue'] = data['venue'] or ''
+
+            def error(message):
+                error_rows.append(dict(data, row=i, match_time=data['match_time'] if data['match_time'] is not None else '', error=message))
+
+            if data['match_date'] is None or str(data['match_date']).strip() == '':
+                error('Match Date is required and must not be blank.')
+                continue
+            try:
+                match_dt = _match_date(data['match_date'])
+            except ValueError:
+                error(f"invalid date/time format (must be 'd/m/Y h:mm:ss AM/PM', got '{str(data['match_date']).strip()}')")
+                continue
+
+            if data['season'] is None:
+                error('Missing Season.')
+                continue
+            season = seasons.get(str(data['season']).strip()) or seasons.get(_key(data['season']))
+            if not season:
+                error(f"Season not found ({data['season']}).")
+                continue
+
+            home = names.get(data['home']) if data['home'] is not None else None
+            if not home:
+                error(f"Home team not found. Suggestions: {names.close_matches(data['home'] or '')}")
+                continue
+            away = names.get(data['away']) if data['away'] is not None else None
+            if not away:
+                error(f"Away team not found. Suggestions: {names.close_matches(data['away'] or '')}")
+                continue
+
+            matchday = None
+            if data['matchday'] is not None and str(data['matchday']).strip() != '':
+                try:
+                    matchday = int(data['matchday'])
+                except (TypeError, ValueError):
+                    matchday = None
+            batch.append(Match(
+                season=season, home_team=home, away_team=away, match_date=match_dt,
+                venue=str(data['venue']), matchday=matchday,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                created += _write_matches(batch, touched)
+                batch = []
+        created += _write_matches(batch, touched)
+
+        for season_id, seen in touched.items():
+            # participants count as season members, so new ones need a standings row
+            refresh_team_standings(season_id, seen['teams'])
+            if seen['matchdays']:
+                invalidate_snapshots(season_id, min(seen['matchdays']))
+                schedule_snapshot_build(season_id)
+        bump_results_version_on_commit(*touched)
+    return created, error_rows
+
+
+def _write_matches(batch, touched):
+    """bulk_create a batch of fixtures and log them in the change feed."""
+    if not batch:
+        return 0
+    created = Match.objects.bulk_create(batch)
+    record_match_changes((m.id, m.season_id) for m in created)
+    for m in created:
+        touched[m.season_id]['teams'].update((m.home_team_id, m.away_team_id))
+        if m.matchday is not None:
+            touched[m.season_id]['matchdays'].add(m.matchday)
+    return len(created)
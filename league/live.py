@@ -0,0 +1,59 @@
+"""Live score broadcasts over the Channels layer.
+
+Result-entry code calls `broadcast_match_update(match)` after saving; the
+delta is sent once the transaction commits to the match's season group and
+its own match group, where LiveSeasonConsumer / LiveMatchConsumer forward
+it to subscribed clients.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_TYPE = 'match.update'
+
+
+def season_group(season_id):
+    return f'league.season.{season_id}'
+
+
+def match_group(match_id):
+    return f'league.match.{match_id}'
+
+
+def match_delta(match, event='score'):
+    """Compact payload with just the fields a live scoreboard redraws."""
+    return {
+        'event': event,
+        'match': match.pk,
+        'season': match.season_id,
+        'home_score': match.home_score,
+        'away_score': match.away_score,
+        'penalty_home': match.penalty_home,
+        'penalty_away': match.penalty_away,
+        'period': match.current_period,
+        'is_played': match.is_played,
+        'awarded': match.awarded,
+    }
+
+
+def _send(delta):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    message = {'type': MESSAGE_TYPE, 'data': delta}
+    try:
+        async_to_sync(layer.group_send)(season_group(delta['season']), message)
+        async_to_sync(layer.group_send)(match_group(delta['match']), message)
+    except Exception:
+        # a missing or unreachable layer must never fail result entry
+        logger.exception('Live broadcast for match %s failed', delta['match'])
+
+
+def broadcast_match_update(match, event='score'):
+    """Send the match's delta to live subscribers after the transaction commits."""
+    delta = match_delta(match, event)
+    transaction.on_commit(lambda: _send(delta))
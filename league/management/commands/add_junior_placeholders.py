@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 
+from league.bracket import STANDARD_BRACKET, link_bracket
 from league.models import Season, Team, Match
 
 
@@ -39,3 +40,6 @@ class Command(BaseCommand):
         else:
             mF = Match.objects.create(season=s, home_team=homeF, away_team=awayF, match_date=now + timedelta(days=2), matchday=29)
             self.stdout.write(self.style.SUCCESS(f'Created final match id {mF.id}'))
+
+        # link the slots so semifinal results fill these matches by primary key
+        link_bracket(s.id, [row for row in STANDARD_BRACKET if row[0] in (28, 29)])
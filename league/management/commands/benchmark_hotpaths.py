@@ -0,0 +1,156 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the standings, bracket and match-list hot paths, and response encoding, on synthetic leagues. '
+            'Runs against a throwaway test database; the configured database is never touched.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--groups', type=str, default='4,16,62', help='Comma-separated group counts, one synthetic league each, at most 62 (default 4,16,62)')
+        parser.add_argument('--teams-per-group', type=int, default=6)
+        parser.add_argument('--legs', type=int, default=2, help='Round-robin legs per group (default 2)')
+        parser.add_argument('--seasons', type=int, default=3, help='Seasons per league, cycling through categories (default 3)')
+        parser.add_argument('--max-matches', type=int, default=10000, help='Cap on matches per league (default 10000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per hot path (default 5)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--cases', type=str, default='', help='Comma-separated subset of hot paths to run')
+        parser.add_argument('--output', type=str, default='', help='Write JSON results to this file')
+        parser.add_argument('--compare', type=str, default='', help='Previous JSON results to compare medians against')
+
+    def handle(self, *args, **options):
+        try:
+            group_counts = [int(g) for g in options['groups'].split(',') if g.strip()]
+        except ValueError:
+            raise CommandError('--groups must be comma-separated integers')
+        from league.benchmarks import GROUP_ALPHABET
+        if any(g < 1 or g > len(GROUP_ALPHABET) for g in group_counts):
+            raise CommandError(f'--groups values must be between 1 and {len(GROUP_ALPHABET)} (group names are one character)')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read --compare file: {e}")
+
+        # Throwaway database and local cache so no outside services are needed
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'league-benchmarks'}},
+                LEAGUE_TASKS_INLINE=False,
+                DEBUG=False,
+            ):
+                results = self._run(group_counts, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+                'commit': self._git_commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        if baseline:
+            self._compare(results, baseline)
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    def _run(self, group_counts, options):
+        from league.benchmarks import build_league, encode_cases, hot_paths, time_case
+        from league.models import Group, Match, Season, Team, TeamGroup
+
+        wanted = {c.strip() for c in options['cases'].split(',') if c.strip()}
+        results = []
+        for groups in group_counts:
+            # start each league from an empty database
+            Match.objects.all().delete()
+            TeamGroup.objects.all().delete()
+            Group.objects.all().delete()
+            Season.objects.all().delete()
+            Team.objects.all().delete()
+
+            league = build_league(
+                seed=options['seed'],
+                seasons=options['seasons'],
+                groups=groups,
+                teams_per_group=options['teams_per_group'],
+                legs=options['legs'],
+                max_matches=options['max_matches'],
+            )
+            season_id = league['season_ids'][0]
+            season_matches = Match.objects.filter(season_id=season_id).count()
+            self.stderr.write(f"groups={groups}: {league['matches']} matches over {league['seasons']} seasons")
+            for case, func in hot_paths(season_id).items():
+                if wanted and case not in wanted:
+                    continue
+                timing = time_case(func, repeat=options['repeat'])
+                results.append({
+                    'case': case,
+                    'groups': groups,
+                    'teams': groups * options['teams_per_group'],
+                    'season_matches': season_matches,
+                    'total_matches': league['matches'],
+                    **timing,
+                })
+                self.stderr.write(f"  {case:<24} median {timing['median_ms']:>10.2f} ms  {timing['queries']:>6} queries")
+            for case, (renderer, data) in encode_cases(season_id).items():
+                if wanted and case not in wanted:
+                    continue
+                timing = time_case(lambda: renderer.render(data), repeat=options['repeat'])
+                results.append({
+                    'case': case,
+                    'groups': groups,
+                    'teams': groups * options['teams_per_group'],
+                    'season_matches': season_matches,
+                    'total_matches': league['matches'],
+                    'bytes': len(renderer.render(data)),
+                    **timing,
+                })
+                self.stderr.write(f"  {case:<34} median {timing['median_ms']:>10.2f} ms  {results[-1]['bytes']:>9} bytes")
+        return results
+
+    def _compare(self, results, baseline):
+        previous = {(r['case'], r['groups']): r for r in baseline.get('results', [])}
+        self.stderr.write('Comparison with baseline (median ms, queries):')
+        for r in results:
+            old = previous.get((r['case'], r['groups']))
+            if not old:
+                continue
+            ratio = r['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+            r['baseline_median_ms'] = old['median_ms']
+            r['baseline_queries'] = old['queries']
+            self.stderr.write(
+                f"  {r['case']:<24} groups={r['groups']:<4} {old['median_ms']:>10.2f} -> {r['median_ms']:>10.2f} "
+                f"({ratio:.2f}x)  queries {old['queries']} -> {r['queries']}"
+            )
+
+    def _git_commit(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL,
+            ).decode().strip()
+        except Exception:
+            return ''
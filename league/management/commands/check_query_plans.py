@@ -0,0 +1,78 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+
+# Lines of EXPLAIN output that mean a full table read
+SEQ_SCAN_PATTERNS = {
+    'postgresql': r'Seq Scan on {table}\b',
+    # "SCAN t USING [COVERING] INDEX i" walks an index, only a bare "SCAN t" reads the table
+    'sqlite': r'\bSCAN {table}\b(?! USING)',
+}
+
+
+class Command(BaseCommand):
+    help = ('EXPLAIN the hot league queries against a large synthetic dataset and fail if any '
+            'falls back to a sequential scan. Runs in a throwaway test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seasons', type=int, default=24, help='Synthetic seasons (default 24)')
+        parser.add_argument('--groups', type=int, default=8, help='Groups per season (default 8)')
+        parser.add_argument('--teams-per-group', type=int, default=6)
+        parser.add_argument('--max-matches', type=int, default=20000)
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full plan of every query')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(f'No plan check for database backend {connection.vendor!r}')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+                failures = self._check(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        if failures:
+            raise CommandError(f"Sequential scan in: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index'))
+
+    def _check(self, options):
+        from league.benchmarks import build_league, hot_queries
+        from league.changes import record_match_changes
+        from league.models import Match, TeamGroup
+
+        league = build_league(
+            seasons=options['seasons'],
+            groups=options['groups'],
+            teams_per_group=options['teams_per_group'],
+            legs=2,
+            max_matches=options['max_matches'],
+        )
+        # bulk_create skips the signals, so fill the change log directly
+        record_match_changes(Match.objects.values_list('id', 'season_id'))
+        season_id = league['season_ids'][len(league['season_ids']) // 2]
+        member = TeamGroup.objects.filter(season_id=season_id).select_related('team').first().team
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f"{league['matches']} matches over {league['seasons']} seasons ({connection.vendor})")
+
+        failures = []
+        for name, (queryset, tables, vendors) in hot_queries(season_id, member.id, member.name).items():
+            if vendors and connection.vendor not in vendors:
+                self.stdout.write(f'  {name:<20} skipped on {connection.vendor}')
+                continue
+            plan = queryset.explain()
+            scans = [
+                table for table in tables
+                if re.search(SEQ_SCAN_PATTERNS[connection.vendor].format(table=re.escape(table)), plan)
+            ]
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"  {name:<20} SEQ SCAN on {', '.join(scans)}"))
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+            else:
+                self.stdout.write(f'  {name:<20} ok')
+                if options['verbose_plans']:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+        return failures
@@ -10,6 +10,7 @@ class Command(BaseCommand):
         parser.add_argument('--dry-run', action='store_true', help='Do not write to DB')
 
     def handle(self, *args, **options):
+        from league.bracket import link_bracket
         from league.models import Season, Team, Match
 
         season_name = options.get('season_name')
@@ -58,4 +59,7 @@ class Command(BaseCommand):
                     created_total += 1
                     self.stdout.write(self.style.SUCCESS(f"Created {code} (match {m.id}) for season {season.name}"))
 
+            if not dry_run:
+                link_bracket(season.id, [(matchnum, left_tok, right_tok) for _, left_tok, right_tok, matchnum in fixtures])
+
         self.stdout.write(self.style.SUCCESS(f"Finished. Created {created_total} matches."))
@@ -1,156 +1,85 @@
-from django.core.management.base import BaseCommand, CommandError
-from django.utils import timezone
 from datetime import datetime
 
+from django.core.management.base import BaseCommand, CommandError
 
-class Command(BaseCommand):
-    help = 'Generate knockout bracket matches for a season using a provided bracket layout.'
-
-    def add_arguments(self, parser):
-        parser.add_argument('season_name', type=str)
-        parser.add_argument('--dry-run', action='store_true', help='Do not write to DB, only show what would be created')
-
-    def handle(self, *args, **options):
-        from league.models import Season, Group, TeamGroup, Team, Match
-
-        season_name = options['season_name']
-        dry_run = options['dry_run']
+DATE_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d', '%m/%d/%Y %I:%M %p', '%d/%m/%Y %I:%M %p', '%m/%d/%Y')
 
-        season = Season.objects.filter(name__iexact=season_name).first()
-        if not season:
-            raise CommandError(f"Season '{season_name}' not found")
+ACTION_MARKS = {'create': '+', 'update': '~', 'keep': '=', 'played': '!'}
 
-        # Bracket provided by user (hardcoded here per request)
-        fixtures = [
-            # Quarterfinals
-            ('QF1', '1ST A', '2ND B', '12/2/2025 2:00 PM', 22),
-            ('QF2', '1ST C', '2ND D', '12/4/2025 2:00 PM', 23),
-            ('QF3', '1ST B', '2ND A', '12/6/2025 2:00 PM', 24),
-            ('QF4', '1ST D', '2ND C', '12/8/2025 2:00 PM', 25),
-            # Semifinals (winners of above)
-            ('SF1', 'WINNER 22', 'WINNER 23', '12/11/2025 2:00 PM', 26),
-            ('SF2', 'WINNER 24', 'WINNER 25', '12/13/2025 2:00 PM', 27),
-            # Third place
-            ('3rd', 'LOSER 26', 'LOSER 27', '12/31/2025 8:00 AM', 28),
-            # Final
-            ('Final', 'WINNER 26', 'WINNER 27', '01/01/2026 2:00 PM', 29),
-        ]
 
-        # Helper: parse participant token
-        def resolve_participant(token):
-            token = token.strip()
-            # Patterns: '1ST A', '2ND B'
-            parts = token.split()
-            if len(parts) == 2 and parts[0].upper() in ('1ST', '2ND') and len(parts[1]) == 1:
-                pos = 1 if parts[0].upper() == '1ST' else 2
-                group_name = parts[1].upper()
-                # find group
-                grp = Group.objects.filter(name=group_name, season=season).first()
-                if not grp:
-                    raise CommandError(f"Group '{group_name}' not found for season {season.name}")
-                # get teams in group
-                tgs = TeamGroup.objects.filter(group=grp, season=season)
-                team_ids = [tg.team_id for tg in tgs]
-                # If this is the senior boys season and group matches are not yet complete,
-                # return a placeholder for the position so we don't prematurely resolve qualifiers.
-                # Determine expected number of matches in a single round-robin among n teams: n*(n-1)/2
-                try:
-                    n = len(team_ids)
-                    expected_matches = n * (n - 1) // 2
-                    played_matches_count = Match.objects.filter(season=season, is_played=True, home_team_id__in=team_ids, away_team_id__in=team_ids).count()
-                except Exception:
-                    expected_matches = None
-                    played_matches_count = 0
+def parse_when(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+    raise CommandError(f'Unrecognized date: {value}')
 
-                if season.category == 'senior_boys' and expected_matches is not None and played_matches_count < expected_matches:
-                    # Not all group matches completed; return placeholder like '1ST A (placeholder)'
-                    name = f"{parts[0].upper()} {group_name} (placeholder)"
-                    short = name[:20]
-                    team, _ = Team.objects.get_or_create(name=name, defaults={'short_name': short, 'archived': True})
-                    return team
 
-                # compute simple standings within group using played matches
-                stats = {tid: {'team_id': tid, 'points': 0, 'gf': 0, 'ga': 0} for tid in team_ids}
-                matches = Match.objects.filter(season=season, is_played=True, home_team_id__in=team_ids, away_team_id__in=team_ids)
-                seen_pairs = set()
-                for m in matches.order_by('home_team_id', 'away_team_id', '-match_date'):
-                    pair = tuple(sorted([m.home_team_id, m.away_team_id]))
-                    if pair in seen_pairs:
-                        continue
-                    seen_pairs.add(pair)
-                    hs = m.home_score or 0
-                    aa = m.away_score or 0
-                    stats[m.home_team_id]['gf'] += hs
-                    stats[m.home_team_id]['ga'] += aa
-                    stats[m.away_team_id]['gf'] += aa
-                    stats[m.away_team_id]['ga'] += hs
-                    if hs > aa:
-                        stats[m.home_team_id]['points'] += 3
-                    elif hs < aa:
-                        stats[m.away_team_id]['points'] += 3
-                    else:
-                        stats[m.home_team_id]['points'] += 1
-                        stats[m.away_team_id]['points'] += 1
+class Command(BaseCommand):
+    help = ('Generate (or re-generate) the knockout bracket of a season: 4, 8, 16 or 32 teams '
+            'seeded from the group tables, with slot links for progression.')
 
-                # sort
-                standing_list = list(stats.values())
-                standing_list.sort(key=lambda x: (-x['points'], -(x['gf'] - x['ga']), -x['gf']))
-                if pos - 1 >= len(standing_list):
-                    raise CommandError(f"Not enough teams in group {group_name} to resolve {token}")
-                team_id = standing_list[pos - 1]['team_id']
-                return Team.objects.get(id=team_id)
+    def add_arguments(self, parser):
+        parser.add_argument('season_name', type=str)
+        parser.add_argument('--size', type=int, default=8, choices=[4, 8, 16, 32], help='Teams in the bracket (default 8)')
+        parser.add_argument('--seeding', default='cross', choices=['cross', 'ranked'],
+                            help='cross: group winners v runners-up of the paired group; ranked: qualifiers seeded 1..N across groups')
+        parser.add_argument('--start', type=str, help='First knockout kickoff, e.g. "2025-12-02 14:00" (default: the day after the last group match)')
+        parser.add_argument('--kickoffs', type=str, help='Kickoff times per day, e.g. "10:00,14:00" (default: the start time)')
+        parser.add_argument('--round-gap-days', type=int, default=2, help='Days from the last match of a round to the next round (default 2)')
+        parser.add_argument('--dates', type=str, help='Explicit kickoff per match in matchday order, separated by ";" (overrides --start)')
+        parser.add_argument('--first-matchday', type=int, help='Matchday of the first knockout match (default 22, or after the group stage)')
+        parser.add_argument('--no-third-place', action='store_true', help='Do not schedule a third-place match')
+        parser.add_argument('--resolve-incomplete', action='store_true',
+                            help='Seed from groups that still have matches to play instead of using placeholders')
+        parser.add_argument('--dry-run', action='store_true', help='Only show the difference against the existing bracket')
 
-            # Patterns: WINNER 22, LOSER 26
-            if parts[0].upper() in ('WINNER', 'LOSER') and parts[1].isdigit():
-                label = f"{parts[0].upper()} {parts[1]}"
-                # create or get placeholder Team
-                name = f"{label} (placeholder)"
-                short = name[:20]
-                team, _ = Team.objects.get_or_create(name=name, defaults={'short_name': short, 'archived': True})
-                return team
+    def handle(self, *args, **options):
+        from league.bracket_generator import generate_bracket
+        from league.models import Season
 
-            # Fallback: try to find by exact team name
-            team = Team.objects.filter(name__iexact=token).first()
-            if team:
-                return team
-            raise CommandError(f"Cannot resolve participant token: {token}")
+        season = Season.objects.filter(name__iexact=options['season_name']).first()
+        if not season:
+            raise CommandError(f"Season '{options['season_name']}' not found")
 
-        created = []
-        for code, left_tok, right_tok, date_str, matchnum in fixtures:
+        kickoffs = []
+        if options.get('kickoffs'):
             try:
-                # try parse month/day/year
-                dt = None
-                for fmt in ('%m/%d/%Y %I:%M %p', '%d/%m/%Y %I:%M %p', '%m/%d/%Y %I:%M:%S %p', '%d/%m/%Y %I:%M:%S %p', '%m/%d/%Y'):
-                    try:
-                        dt = datetime.strptime(date_str, fmt)
-                        break
-                    except Exception:
-                        continue
-                if dt is None:
-                    raise ValueError(f"Unrecognized date format: {date_str}")
-
-                left = resolve_participant(left_tok)
-                right = resolve_participant(right_tok)
-
-                # Avoid duplicate matches: check for season + match_date + same participants
-                exists = Match.objects.filter(season=season, match_date=dt, home_team=left, away_team=right).exists()
-                if exists:
-                    self.stdout.write(self.style.WARNING(f"Match already exists: {left} vs {right} on {dt}"))
-                    continue
-
-                if dry_run:
-                    self.stdout.write(f"Would create: {code}: {left} vs {right} at {dt} (matchnum {matchnum})")
-                else:
-                    m = Match.objects.create(season=season, home_team=left, away_team=right, match_date=dt)
-                    # store the matchnum in matchday for reference
-                    try:
-                        m.matchday = matchnum
-                        m.save()
-                    except Exception:
-                        pass
-                    created.append(m)
-                    self.stdout.write(self.style.SUCCESS(f"Created match {m.id}: {left} vs {right} on {dt}"))
-            except Exception as e:
-                self.stderr.write(f"Failed to create fixture {code}: {e}")
-
-        self.stdout.write(self.style.SUCCESS(f"Finished. Created {len(created)} matches."))
\ No newline at end of file
+                kickoffs = [datetime.strptime(k.strip(), '%H:%M').time() for k in options['kickoffs'].split(',') if k.strip()]
+            except ValueError:
+                raise CommandError(f"Unrecognized kickoff times: {options['kickoffs']}")
+        start = parse_when(options['start']) if options.get('start') else None
+        dates = [parse_when(d) for d in options['dates'].split(';') if d.strip()] if options.get('dates') else None
+
+        try:
+            diff = generate_bracket(
+                season,
+                size=options['size'],
+                seeding=options['seeding'],
+                start=start,
+                kickoffs=kickoffs,
+                round_gap_days=options['round_gap_days'],
+                dates=dates,
+                first_matchday=options.get('first_matchday'),
+                third_place=not options['no_third_place'],
+                resolve_incomplete=options['resolve_incomplete'],
+                dry_run=options['dry_run'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for row in diff:
+            fixture, match = row['fixture'], row['match']
+            line = (f"{ACTION_MARKS[row['action']]} MD{row['matchday']} {row['name']}: "
+                    f"{fixture['home_name']} vs {fixture['away_name']} at {fixture['date']:%Y-%m-%d %H:%M}")
+            if row['action'] in ('update', 'played'):
+                line += f"  (now: {match.home_team.name} vs {match.away_team.name} at {match.match_date:%Y-%m-%d %H:%M})"
+            self.stdout.write(line)
+
+        counts = {action: sum(1 for row in diff if row['action'] == action) for action in ACTION_MARKS}
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {counts['create']}, {'would update' if options['dry_run'] else 'updated'} {counts['update']} matches "
+            f"({counts['keep']} unchanged, {counts['played']} already played) for {season.name}."
+        ))
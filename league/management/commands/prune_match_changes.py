@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from league.models import MatchChange
+
+
+class Command(BaseCommand):
+    help = 'Delete match change-feed entries older than --days. Clients holding an older cursor get a 410 and resync.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Keep this many days of history (default 30)')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # always keep the newest entry so the current cursor stays valid
+        newest = MatchChange.objects.order_by('-id').values_list('id', flat=True).first()
+        deleted, _ = MatchChange.objects.filter(changed_at__lt=cutoff).exclude(id=newest).delete()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} change-feed entries'))
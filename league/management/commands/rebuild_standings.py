@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from league.models import Season
+from league.standings import check_season_standings, rebuild_season_standings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored standings table, or check it against a from-scratch recompute.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int, help='Only process this season id')
+        parser.add_argument('--check', action='store_true', help='Report rows that differ from a full recompute without writing')
+
+    def handle(self, *args, **options):
+        seasons = Season.objects.all().order_by('id')
+        if options['season']:
+            seasons = seasons.filter(id=options['season'])
+            if not seasons.exists():
+                raise CommandError(f"Season {options['season']} not found")
+
+        drifted = 0
+        for season in seasons:
+            if options['check']:
+                mismatches = check_season_standings(season.id)
+                if not mismatches:
+                    self.stdout.write(f'{season.name}: OK')
+                    continue
+                drifted += 1
+                self.stdout.write(self.style.WARNING(f'{season.name}: {len(mismatches)} mismatched values'))
+                for team_name, field, stored, expected in mismatches:
+                    self.stdout.write(f'  {team_name}: {field} stored={stored} expected={expected}')
+            else:
+                rebuild_season_standings(season.id)
+                self.stdout.write(self.style.SUCCESS(f'Rebuilt standings for {season.name}'))
+
+        if drifted:
+            raise CommandError(f'{drifted} season(s) have stored standings that differ from a full recompute')
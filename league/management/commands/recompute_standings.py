@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from league.models import Season
-from league.utils import compute_standings
+from league.standings import season_standings
 
 class Command(BaseCommand):
     help = 'Recompute and print standings for all seasons.'
@@ -9,7 +9,7 @@ class Command(BaseCommand):
         seasons = Season.objects.all()
         for season in seasons:
             self.stdout.write(f'Standings for season: {season.name} ({season.category})')
-            standings = compute_standings(season.id)
+            standings = season_standings(season.id)
             # If standings is a dict (grouped), print by group
             if isinstance(standings, dict):
                 for group, teams in standings.items():
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Unrecognized date (expected YYYY-MM-DD): {value}')
+
+
+class Command(BaseCommand):
+    help = ('Generate the round-robin group fixtures of a season from its groups, placed on the '
+            'venues, days and kickoff times available with a minimum rest between matches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_name', type=str)
+        parser.add_argument('--start', type=str, required=True, help='First possible match day, YYYY-MM-DD')
+        parser.add_argument('--end', type=str, help='Last possible match day, YYYY-MM-DD (default: no limit)')
+        parser.add_argument('--venue', action='append', default=[], dest='venues',
+                            help='Venue and the weekdays it is available, e.g. "Pitch 1:sat,sun" (repeatable; no days = every day)')
+        parser.add_argument('--kickoffs', type=str, default='14:00', help='Kickoff times per venue per day, e.g. "10:00,12:00" (default 14:00)')
+        parser.add_argument('--min-rest-days', type=int, default=1, help='Full days a team has off between two matches (default 1)')
+        parser.add_argument('--legs', type=int, default=1, choices=[1, 2], help='1: single round-robin, 2: home and away')
+        parser.add_argument('--blackout', action='append', default=[], dest='blackouts',
+                            help='A day without matches, YYYY-MM-DD (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Only print the fixtures that would be created')
+
+    def handle(self, *args, **options):
+        from league.models import Season, Team
+        from league.scheduler import LAST_GROUP_MATCHDAY, parse_venue, schedule_season
+
+        season = Season.objects.filter(name__iexact=options['season_name']).first()
+        if not season:
+            raise CommandError(f"Season '{options['season_name']}' not found")
+        if not options['venues']:
+            raise CommandError('At least one --venue is required')
+        if options['min_rest_days'] < 0:
+            raise CommandError('--min-rest-days cannot be negative')
+        try:
+            venues = dict(parse_venue(spec) for spec in options['venues'])
+            kickoffs = [datetime.strptime(k.strip(), '%H:%M').time() for k in options['kickoffs'].split(',') if k.strip()]
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not kickoffs:
+            raise CommandError('At least one kickoff time is required')
+        start = parse_date(options['start'])
+        end = parse_date(options['end']) if options.get('end') else None
+        if end and end < start:
+            raise CommandError('--end is before --start')
+
+        fixtures, unscheduled = schedule_season(
+            season, start, venues, kickoffs,
+            min_rest_days=options['min_rest_days'],
+            legs=options['legs'],
+            end=end,
+            blackouts=[parse_date(d) for d in options['blackouts']],
+            dry_run=options['dry_run'],
+        )
+
+        team_ids = {f['home'] for f in fixtures} | {f['away'] for f in fixtures}
+        team_ids |= {t for _, home, away in unscheduled for t in (home, away)}
+        names = dict(Team.objects.filter(id__in=team_ids).values_list('id', 'name'))
+        for f in fixtures:
+            self.stdout.write(
+                f"MD{f['matchday']} {f['date']:%Y-%m-%d} {f['kickoff']:%H:%M} {f['venue']}: "
+                f"{names[f['home']]} vs {names[f['away']]}"
+            )
+        for _, home, away in unscheduled:
+            self.stderr.write(f'Could not place {names[home]} vs {names[away]}')
+        if unscheduled:
+            self.stderr.write(
+                f'Unplaced pairings found no free slot before --end, or would need a group matchday '
+                f'after {LAST_GROUP_MATCHDAY} (matchdays from {LAST_GROUP_MATCHDAY + 1} on count as knockout).'
+            )
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        span = f", {fixtures[0]['date']:%Y-%m-%d} to {max(f['date'] for f in fixtures):%Y-%m-%d}" if fixtures else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(fixtures)} fixtures for {season.name}{span}; {len(unscheduled)} could not be placed.'
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-17 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0017_standingssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_id', models.BigIntegerField()),
+                ('season_id', models.BigIntegerField(null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['season_id', 'id'], name='league_matc_season__eca6a6_idx')],
+            },
+        ),
+    ]
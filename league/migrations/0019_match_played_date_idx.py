@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 23:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0018_matchchange'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['is_played', 'match_date', 'id'], name='match_played_date_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-17 23:18
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0019_match_played_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'is_played'], name='match_season_played_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'matchday', 'match_date'], name='match_season_matchday_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'home_team'], name='match_season_home_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'away_team'], name='match_season_away_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['matchday', 'match_date', 'id'], name='match_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='team_name_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-17 23:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+STANDARD_BRACKET = [
+    (22, '1ST A', '2ND B', None, None),
+    (23, '1ST C', '2ND D', None, None),
+    (24, '1ST B', '2ND A', None, None),
+    (25, '1ST D', '2ND C', None, None),
+    (26, 'WINNER 22', 'WINNER 23', ('winner', 22), ('winner', 23)),
+    (27, 'WINNER 24', 'WINNER 25', ('winner', 24), ('winner', 25)),
+    (28, 'LOSER 26', 'LOSER 27', ('loser', 26), ('loser', 27)),
+    (29, 'WINNER 26', 'WINNER 27', ('winner', 26), ('winner', 27)),
+]
+
+
+def link_existing_brackets(apps, schema_editor):
+    """Link the knockout matches on matchdays 22-29 the bracket commands
+    have been creating, full 8-team layouts and partial ones alike (e.g.
+    seniors with only 26-29, juniors with only 28/29). A side whose source
+    matchday has no match keeps source_match empty. Seasons with more than
+    one match on a knockout matchday are ambiguous and left unlinked."""
+    Match = apps.get_model('league', 'Match')
+    BracketSlot = apps.get_model('league', 'BracketSlot')
+    by_season = {}
+    rows = Match.objects.filter(matchday__gte=22, matchday__lte=29).values_list('season_id', 'matchday', 'id')
+    for season_id, matchday, match_id in rows:
+        by_season.setdefault(season_id, {}).setdefault(matchday, []).append(match_id)
+    slots = []
+    for season_id, matchdays in by_season.items():
+        if any(len(ids) != 1 for ids in matchdays.values()):
+            continue
+        for matchday, home_tok, away_tok, home_src, away_src in STANDARD_BRACKET:
+            if matchday not in matchdays:
+                continue
+            for side, token, source in (('home', home_tok, home_src), ('away', away_tok, away_src)):
+                slots.append(BracketSlot(
+                    season_id=season_id,
+                    match_id=matchdays[matchday][0],
+                    side=side,
+                    label=token,
+                    outcome=source[0] if source else '',
+                    source_match_id=matchdays[source[1]][0] if source and source[1] in matchdays else None,
+                ))
+    BracketSlot.objects.bulk_create(slots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0020_match_team_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BracketSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('home', 'Home'), ('away', 'Away')], max_length=4)),
+                ('outcome', models.CharField(blank=True, choices=[('winner', 'Winner'), ('loser', 'Loser')], max_length=6)),
+                ('label', models.CharField(blank=True, max_length=50)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bracket_slots', to='league.match')),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bracket_slots', to='league.season')),
+                ('source_match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feeds', to='league.match')),
+            ],
+            options={
+                'unique_together': {('match', 'side')},
+            },
+        ),
+        migrations.RunPython(link_existing_brackets, migrations.RunPython.noop),
+    ]
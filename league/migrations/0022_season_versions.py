@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-17 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0021_bracketslot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='bracket_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='season',
+            name='results_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 # --- Models ---
@@ -9,6 +10,12 @@ class Team(models.Model):
     archived = models.BooleanField(default=False, help_text="Mark placeholder or retired teams as archived so they don't appear in active lists")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # name__iexact lookups in the importers (used by PostgreSQL's UPPER() comparison)
+            models.Index(Upper('name'), name='team_name_upper_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -23,6 +30,26 @@ class Season(models.Model):
         ('junior_boys', 'Junior Boys'),
     ]
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='senior_boys')
+    # Cache versions when LEAGUE_VERSIONS_IN_DB is set (see league/cache.py)
+    results_version = models.BigIntegerField(default=0, editable=False)
+    bracket_version = models.BigIntegerField(default=0, editable=False)
+
+    VERSION_FIELDS = ('results_version', 'bracket_version')
+
+    def save(self, *args, **kwargs):
+        """
+        Never write the cache version counters back from an instance.
+
+        They are only changed by F() updates (league/cache.py), so an
+        ordinary save of an existing season would otherwise roll them back
+        to whatever value was loaded with the instance.
+        """
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [f.attname for f in self._meta.concrete_fields if not f.primary_key]
+            kwargs['update_fields'] = [f for f in update_fields if f not in self.VERSION_FIELDS]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -92,9 +119,72 @@ class Match(models.Model):
     ]
     current_period = models.CharField(max_length=20, choices=CURRENT_PERIOD_CHOICES, default='not_started', help_text='Current period/phase of the match')
 
+    class Meta:
+        indexes = [
+            # /api/matches/upcoming/ and /recent/: filter on is_played, keyset on match_date
+            models.Index(fields=['is_played', 'match_date', 'id'], name='match_played_date_idx'),
+            # standings: a season's played matches
+            models.Index(fields=['season', 'is_played'], name='match_season_played_idx'),
+            # bracket / populate_next_stage rounds and the per-season list order
+            models.Index(fields=['season', 'matchday', 'match_date'], name='match_season_matchday_idx'),
+            # placeholder replacement and per-team lookups within a season
+            models.Index(fields=['season', 'home_team'], name='match_season_home_idx'),
+            models.Index(fields=['season', 'away_team'], name='match_season_away_idx'),
+            # unfiltered list order and its keyset pagination
+            models.Index(fields=['matchday', 'match_date', 'id'], name='match_order_idx'),
+        ]
+
     def __str__(self):
         return f"{self.home_team} vs {self.away_team} - {self.match_date.date()}"
 
+    # Fields whose change can move a standings table, snapshot or bracket
+    RESULT_FIELDS = (
+        'season_id', 'home_team_id', 'away_team_id', 'home_score', 'away_score',
+        'is_played', 'awarded', 'void', 'match_date', 'matchday',
+    )
+    # ...plus what else the bracket document shows
+    BRACKET_FIELDS = RESULT_FIELDS + ('penalty_home', 'penalty_away', 'awarded_to_id')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # snapshot of what the database holds, so the signals can diff without a query
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._reset_loaded_values()
+
+    def _reset_loaded_values(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            loaded = self._loaded_values = {}
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname not in deferred:
+                loaded[field.attname] = getattr(self, field.attname)
+
+    def loaded_value(self, attname):
+        """Value of `attname` as last loaded from or saved to the database.
+
+        Raises KeyError when it is unknown: an instance that was never
+        loaded, or a field that was deferred at load time.
+        """
+        return self._loaded_values[attname]
+
+    def has_loaded_values(self, attnames):
+        loaded = getattr(self, '_loaded_values', None)
+        return loaded is not None and all(a in loaded for a in attnames)
+
+    def get_dirty_fields(self):
+        """{attname: loaded value} for tracked fields that changed since load/save."""
+        loaded = getattr(self, '_loaded_values', None) or {}
+        return {
+            attname: value for attname, value in loaded.items()
+            if getattr(self, attname) != value
+        }
+
     def save(self, *args, **kwargs):
         """
         Automatically mark a match as played when both scores are present
@@ -130,31 +220,155 @@ class Match(models.Model):
                     # If there's any issue comparing dates, do not mark as played
                     self.is_played = False
         super().save(*args, **kwargs)
+        self._reset_loaded_values()
+
+    # Stage names of the standard 8-team layout, for knockout matches not linked by BracketSlot
+    KNOCKOUT_STAGE_NAMES = {
+        22: 'Quarterfinal', 23: 'Quarterfinal', 24: 'Quarterfinal', 25: 'Quarterfinal',
+        26: 'Semifinal', 27: 'Semifinal',
+        28: 'Third Place',
+        29: 'Final',
+    }
+
+    def get_match_stage(self, group_members=None, stages=None):
+        """Determine if match is group stage or knockout based on its bracket slots, matchday or presence of group.
+
+        A match in a linked bracket is named by its round in that bracket
+        (see league.bracket.slot_rounds), whatever the bracket size.
+        `stages` is an optional {match_id: name} as returned by
+        `Match.knockout_stages`, and `group_members` an optional set of
+        (season_id, team_id) pairs, as returned by `Match.group_memberships`;
+        pass both when staging many matches so each is a dict/set lookup
+        instead of queries per match.
+        """
+        if stages is None:
+            stages = Match.knockout_stages([self])
+        if self.pk in stages:
+            return stages[self.pk]
 
-    def get_match_stage(self):
-        """Determine if match is group stage or knockout based on matchday or presence of group."""
-        from .models import Group, TeamGroup
-        
-        # If matchday >= 21, it's knockout
+        # Not linked: if matchday >= 21, it's knockout
         if self.matchday is not None and self.matchday >= 21:
-            # Map matchday to stage name
-            stage_map = {
-                22: 'Quarterfinal', 23: 'Quarterfinal', 24: 'Quarterfinal', 25: 'Quarterfinal',
-                26: 'Semifinal', 27: 'Semifinal',
-                28: 'Third Place',
-                29: 'Final',
-            }
-            return stage_map.get(self.matchday, 'Knockout')
-        
+            return self.KNOCKOUT_STAGE_NAMES.get(self.matchday, 'Knockout')
+
         # Check if both teams are in a group for this season
-        home_in_group = TeamGroup.objects.filter(team=self.home_team, season=self.season).exists()
-        away_in_group = TeamGroup.objects.filter(team=self.away_team, season=self.season).exists()
-        
+        if group_members is not None:
+            home_in_group = (self.season_id, self.home_team_id) in group_members
+            away_in_group = (self.season_id, self.away_team_id) in group_members
+        else:
+            home_in_group = TeamGroup.objects.filter(team_id=self.home_team_id, season_id=self.season_id).exists()
+            away_in_group = TeamGroup.objects.filter(team_id=self.away_team_id, season_id=self.season_id).exists()
+
         if home_in_group and away_in_group:
             return 'Group Stage'
-        
+
         return 'Knockout'
 
+    @staticmethod
+    def knockout_stages(matches):
+        """{match_id: round name} of these matches' seasons' linked brackets, in one query."""
+        from .bracket import slot_rounds
+
+        season_ids = {m.season_id for m in matches}
+        if not season_ids:
+            return {}
+        by_season = {}
+        for slot in BracketSlot.objects.filter(season_id__in=season_ids).only('season_id', 'match_id', 'side', 'outcome', 'source_match_id'):
+            by_season.setdefault(slot.season_id, []).append(slot)
+        stages = {}
+        for slots in by_season.values():
+            stages.update((match_id, name) for match_id, (_, name) in slot_rounds(slots).items())
+        return stages
+
+    @staticmethod
+    def group_memberships(matches):
+        """(season_id, team_id) pairs of group members for these matches, in one query."""
+        pending = [m for m in matches if m.matchday is None or m.matchday < 21]
+        if not pending:
+            return set()
+        season_ids = {m.season_id for m in pending}
+        team_ids = {m.home_team_id for m in pending} | {m.away_team_id for m in pending}
+        return set(
+            TeamGroup.objects.filter(season_id__in=season_ids, team_id__in=team_ids)
+            .values_list('season_id', 'team_id')
+        )
+
+
+class BracketSlot(models.Model):
+    """One side (home/away) of a knockout match and where its team comes from.
+
+    A slot with a `source_match` is filled by that match's winner or loser
+    once it is decided (see league/bracket.py); until then the match holds
+    a placeholder team. Slots without a source are seeded directly, e.g.
+    from a group position. `label` keeps the readable token ("WINNER 22",
+    "1ST A") for display.
+    """
+    HOME = 'home'
+    AWAY = 'away'
+    SIDE_CHOICES = [(HOME, 'Home'), (AWAY, 'Away')]
+    WINNER = 'winner'
+    LOSER = 'loser'
+    OUTCOME_CHOICES = [(WINNER, 'Winner'), (LOSER, 'Loser')]
+
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='bracket_slots')
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='bracket_slots')
+    side = models.CharField(max_length=4, choices=SIDE_CHOICES)
+    source_match = models.ForeignKey(Match, null=True, blank=True, on_delete=models.SET_NULL, related_name='feeds')
+    outcome = models.CharField(max_length=6, choices=OUTCOME_CHOICES, blank=True)
+    label = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        unique_together = ('match', 'side')
+
+    def __str__(self):
+        return f"{self.label or self.outcome} -> {self.side} of match {self.match_id}"
+
+
+class TeamStanding(models.Model):
+    """Persisted standings row for a team in a season.
+
+    Rows are kept in sync by the Match signals (see league/standings.py) so
+    the standings endpoints can read a table instead of replaying results.
+    """
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='standings')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='standings')
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    goals_for = models.IntegerField(default=0)
+    goals_against = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('season', 'team')
+
+    def __str__(self):
+        return f"{self.team} - {self.points} pts ({self.season})"
+
+    @property
+    def goal_diff(self):
+        return self.goals_for - self.goals_against
+
+
+class StandingsSnapshot(models.Model):
+    """Season table as it stood after a completed matchday.
+
+    `table` is array-packed to keep rows small: a list of
+    [team_id, played, wins, draws, losses, goals_for, goals_against, points]
+    in table order. Built and invalidated by league/snapshots.py.
+    """
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, related_name='standings_snapshots')
+    matchday = models.IntegerField()
+    table = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('season', 'matchday')
+
+    def __str__(self):
+        return f"{self.season} after matchday {self.matchday}"
+
 
 class News(models.Model):
     title = models.CharField(max_length=200)
@@ -166,3 +380,22 @@ class News(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class MatchChange(models.Model):
+    """Append-only log behind the match change feed.
+
+    One row per saved or deleted Match; the auto-increment id is the feed
+    cursor. Rows outlive the match, so deletions are served as tombstones.
+    Written by league/changes.py.
+    """
+    match_id = models.BigIntegerField()
+    season_id = models.BigIntegerField(null=True)
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['season_id', 'id'])]
+
+    def __str__(self):
+        return f"{'Deleted' if self.deleted else 'Changed'} match {self.match_id} (#{self.pk})"
@@ -0,0 +1,122 @@
+"""Keyset ("cursor") pagination for the match list.
+
+DRF's CursorPagination only keys on the first ordering field and cannot
+cope with NULL matchdays, so this paginates on the full
+(matchday, match_date, id) tuple, or (match_date, id) for the
+upcoming/recent shortcuts. Each page is one indexed range query no
+matter how deep the client has scrolled. NULL matchdays keep the
+database's native position (first on SQLite, last on PostgreSQL) so the
+plain (matchday, match_date, id) index serves the ordering.
+
+Pagination is opt-in: it applies when the request sends `cursor` or
+`page_size`, or uses a shortcut. Other requests still get a plain list.
+"""
+import base64
+import json
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+MATCHDAY_ORDER = ('matchday', 'match_date', 'id')
+
+
+class MatchCursorPagination(BasePagination):
+    page_size = 100
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_ordering(self, view):
+        """'matchday' (default), 'date' or '-date'; views pick via `pagination_ordering`."""
+        return getattr(view, 'pagination_ordering', 'matchday')
+
+    def is_requested(self, request, view):
+        params = request.query_params
+        return (
+            self.cursor_query_param in params
+            or self.page_size_query_param in params
+            or self.get_ordering(view) != 'matchday'
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def order_queryset(self, queryset, ordering):
+        if ordering == 'date':
+            return queryset.order_by('match_date', 'id')
+        if ordering == '-date':
+            return queryset.order_by('-match_date', '-id')
+        return queryset.order_by(*MATCHDAY_ORDER)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request, view):
+            return None
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size_value = self.get_page_size(request)
+        queryset = self.order_queryset(queryset, self.ordering)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(self.after(self.decode_cursor(encoded)))
+        page = list(queryset[:self.page_size_value + 1])
+        self.has_next = len(page) > self.page_size_value
+        page = page[:self.page_size_value]
+        self.last = page[-1] if page else None
+        return page
+
+    def after(self, position):
+        """Q for rows strictly after `position` in the current ordering."""
+        if self.ordering in ('date', '-date'):
+            match_date, pk = position
+            op = 'gt' if self.ordering == 'date' else 'lt'
+            return Q(**{f'match_date__{op}': match_date}) | Q(match_date=match_date, **{f'id__{op}': pk})
+        matchday, match_date, pk = position
+        tail = Q(match_date__gt=match_date) | Q(match_date=match_date, id__gt=pk)
+        nulls_last = connection.features.nulls_order_largest
+        if matchday is None:
+            if nulls_last:
+                return Q(matchday__isnull=True) & tail
+            return Q(matchday__isnull=False) | (Q(matchday__isnull=True) & tail)
+        after = Q(matchday__gt=matchday) | (Q(matchday=matchday) & tail)
+        return after | Q(matchday__isnull=True) if nulls_last else after
+
+    def encode_cursor(self, match):
+        position = [match.match_date.isoformat(), match.pk]
+        if self.ordering == 'matchday':
+            position.insert(0, match.matchday)
+        raw = json.dumps([self.ordering] + position, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, encoded):
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            ordering, *position = json.loads(raw)
+            if ordering != self.ordering:
+                raise ValueError
+            position[-2] = parse_datetime(position[-2])
+            if position[-2] is None or not isinstance(position[-1], int):
+                raise ValueError
+            if ordering == 'matchday' and not (position[0] is None or isinstance(position[0], int)):
+                raise ValueError
+            return position
+        except (TypeError, ValueError, IndexError):
+            raise NotFound('Invalid cursor')
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        params = self.request.query_params.copy()
+        params[self.cursor_query_param] = self.encode_cursor(self.last)
+        return self.request.build_absolute_uri(f'{self.request.path}?{params.urlencode()}')
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
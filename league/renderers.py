@@ -0,0 +1,58 @@
+"""Faster response encoders, picked by normal DRF content negotiation.
+
+FastJSONRenderer is a drop-in for DRF's JSONRenderer: same media type,
+same bytes for compact output, but encoded with orjson when it is
+installed. Anything orjson handles differently (datetimes, Decimals,
+lazy strings) is passed to DRF's own encoder, and pretty-printed
+(`; indent=`) or un-encodable data falls back to the stock renderer.
+
+MessagePackRenderer answers `Accept: application/msgpack` (or
+`?format=msgpack`) with the same data as a MessagePack document.
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def _default(self, obj):
+        return self.encoder_class().default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. integers beyond 64 bits, which the json module accepts
+            return super().render(data, accepted_media_type, renderer_context)
+        # same strict-javascript-subset escaping as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = JSONRenderer.encoder_class
+
+    def _default(self, obj):
+        return self.encoder_class().default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self._default, use_bin_type=True)
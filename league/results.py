@@ -0,0 +1,164 @@
+"""Bulk result entry for results editors.
+
+`apply_results` validates a batch of score/period updates as a whole,
+writes them in one transaction with one UPDATE per group of matches
+that change the same fields, then runs the post-save work the Match
+signals would have done, but once per affected season instead of once
+per match (bulk_update does not send signals).
+"""
+import random
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bracket import advance_brackets
+from .cache import bump_results_version_on_commit
+from .changes import record_match_changes
+from .live import broadcast_match_update
+from .models import Match
+from .snapshots import invalidate_snapshots
+from .standings import refresh_team_standings
+from .tasks import schedule_snapshot_build, schedule_standings_recompute
+
+PERIODS = {key for key, _ in Match.CURRENT_PERIOD_CHOICES}
+
+
+class ResultsError(Exception):
+    """Raised with the per-entry errors when a batch fails validation."""
+
+    def __init__(self, errors):
+        super().__init__('Invalid results batch')
+        self.errors = errors
+
+
+def _int(value, name, errors, minimum=0):
+    # only ints and digit strings: int() would also take 2.7, True or ' 1_0 '
+    if isinstance(value, str) and value.strip().isascii() and value.strip().isdigit():
+        value = int(value)
+    elif isinstance(value, bool) or not isinstance(value, int):
+        errors.append(f'{name} must be an integer')
+        return None
+    if value < minimum:
+        errors.append(f'{name} must be at least {minimum}')
+        return None
+    return value
+
+
+def validate_results(entries):
+    """Normalise a batch to {match_id: changes} or raise ResultsError.
+
+    Each entry is {id, home_score?, away_score?, period?, finished?,
+    extra_time_minutes?}; scores come in pairs, like set_result.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise ResultsError([{'error': 'Provide a non-empty list of results'}])
+    errors = []
+    parsed = {}
+    for index, entry in enumerate(entries):
+        problems = []
+        if not isinstance(entry, dict):
+            errors.append({'index': index, 'errors': ['Each result must be an object']})
+            continue
+        match_id = _int(entry.get('id'), 'id', problems, minimum=1)
+        changes = {}
+        has_home, has_away = entry.get('home_score') is not None, entry.get('away_score') is not None
+        if has_home != has_away:
+            problems.append('Provide home_score and away_score together')
+        elif has_home:
+            changes['home_score'] = _int(entry['home_score'], 'home_score', problems)
+            changes['away_score'] = _int(entry['away_score'], 'away_score', problems)
+        period = entry.get('period') or entry.get('current_period')
+        if period:
+            if period not in PERIODS:
+                problems.append('Invalid period value')
+            changes['current_period'] = period
+        if entry.get('finished'):
+            extra = entry.get('extra_time_minutes')
+            changes['finished'] = True
+            changes['extra_time_minutes'] = _int(extra, 'extra_time_minutes', problems) if extra not in (None, '') else None
+        if not changes and not problems:
+            problems.append('Nothing to update')
+        if match_id is not None and match_id in parsed:
+            problems.append('Duplicate match id')
+        if problems:
+            errors.append({'index': index, 'id': entry.get('id'), 'errors': problems})
+        elif match_id is not None:
+            parsed[match_id] = changes
+    if errors:
+        raise ResultsError(errors)
+    return parsed
+
+
+def apply_results(entries, user=None):
+    """Validate and apply a batch; returns the updated matches in batch order."""
+    parsed = validate_results(entries)
+    username = user.username if (user and getattr(user, 'is_authenticated', False)) else ''
+    now = timezone.now()
+    with transaction.atomic():
+        matches = Match.objects.select_for_update().select_related('season').in_bulk(list(parsed))
+        missing = [mid for mid in parsed if mid not in matches]
+        if missing:
+            raise ResultsError([{'id': mid, 'errors': ['Match not found']} for mid in missing])
+
+        groups = {}
+        newly_played = []
+        result_changed = []
+        for match_id, changes in parsed.items():
+            match = matches[match_id]
+            was_played = match.is_played
+            before = [getattr(match, f) for f in Match.RESULT_FIELDS]
+            fields = []
+            if 'home_score' in changes:
+                match.home_score, match.away_score = changes['home_score'], changes['away_score']
+                fields += ['home_score', 'away_score']
+                if match.actual_start is None:
+                    match.actual_start = now
+                    fields.append('actual_start')
+            if 'current_period' in changes:
+                match.current_period = changes['current_period']
+                fields.append('current_period')
+            if changes.get('finished'):
+                # same as the mark_finished action
+                match.manual_finished_at = now
+                match.extra_time_minutes = changes['extra_time_minutes'] or random.randint(1, 5)
+                match.manual_finished_by = username
+                match.is_played = True
+                fields += ['manual_finished_at', 'extra_time_minutes', 'manual_finished_by', 'is_played']
+            # interim scores never auto-mark a match as played (as in set_result)
+            groups.setdefault(tuple(fields), []).append(match)
+            if match.is_played and not was_played:
+                newly_played.append(match)
+            if before != [getattr(match, f) for f in Match.RESULT_FIELDS]:
+                result_changed.append(match)
+
+        for fields, objs in groups.items():
+            Match.objects.bulk_update(objs, list(fields))
+        record_match_changes((m.id, m.season_id) for m in matches.values())
+        _after_results(result_changed, newly_played)
+        for match in matches.values():
+            broadcast_match_update(match, 'finished' if match in newly_played else 'score')
+    return [matches[mid] for mid in parsed]
+
+
+def _after_results(matches, newly_played):
+    """The Match post-save work, once per season.
+
+    `matches` are those whose result changed; period-only updates need
+    none of this, as in the signals.
+    """
+    seasons = {}
+    for match in matches:
+        seasons.setdefault(match.season_id, []).append(match)
+    for season_id, season_matches in seasons.items():
+        team_ids = {m.home_team_id for m in season_matches} | {m.away_team_id for m in season_matches}
+        refresh_team_standings(season_id, team_ids)
+        bump_results_version_on_commit(season_id)
+        matchdays = [m.matchday for m in season_matches if m.matchday is not None]
+        if matchdays:
+            invalidate_snapshots(season_id, min(matchdays))
+            schedule_snapshot_build(season_id)
+
+    # one slot read and one bulk update for every decided match in the batch
+    advance_brackets([m for m in matches if m.is_played])
+    for season_id in {m.season_id for m in newly_played}:
+        schedule_standings_recompute(season_id)
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .consumers import LiveMatchConsumer, LiveSeasonConsumer
+
+websocket_urlpatterns = [
+    path('ws/live/seasons/<int:season_id>/', LiveSeasonConsumer.as_asgi()),
+    path('ws/live/matches/<int:match_id>/', LiveMatchConsumer.as_asgi()),
+]
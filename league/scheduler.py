@@ -0,0 +1,230 @@
+"""Round-robin fixture scheduling for a season's groups.
+
+`round_robin` pairs a group with the circle method (every team once per
+round; a bye for odd groups). `plan_fixtures` then places the rounds
+of all groups on the calendar with a greedy list-scheduling heuristic:
+matches are taken round by round, the most constrained first (teams
+that are free latest), and each gets the earliest (day, kickoff, venue)
+slot that is free, on a day the venue is available, and leaves both
+teams their minimum rest. This is linear in the number of matches times
+the days skipped, which keeps 64+ team seasons well under a second.
+
+`schedule_season` reads the groups and the existing bookings, plans only
+the pairings that do not have a match yet and writes them with
+bulk_create in one transaction.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .cache import bump_results_version_on_commit
+from .changes import record_match_changes
+from .models import BracketSlot, Match, TeamGroup
+from .snapshots import invalidate_snapshots
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+MAX_HORIZON_DAYS = 3 * 366
+# Match.get_match_stage reads matchday 21 and up as knockout
+LAST_GROUP_MATCHDAY = 20
+
+
+def parse_venue(spec):
+    """'Pitch 1:sat,sun' -> ('Pitch 1', {5, 6}); no days means every day."""
+    name, _, days = spec.partition(':')
+    name = name.strip()
+    if not name:
+        raise ValueError(f'Missing venue name in {spec!r}')
+    weekdays = set()
+    for day in days.split(','):
+        day = day.strip().lower()[:3]
+        if not day:
+            continue
+        if day not in WEEKDAYS:
+            raise ValueError(f'Unknown weekday {day!r} in {spec!r}')
+        weekdays.add(WEEKDAYS.index(day))
+    return name, weekdays or set(range(7))
+
+
+def round_robin(team_ids, legs=1):
+    """Rounds of (home, away) pairs in which every team meets every other.
+
+    Circle method: the first team stays put, the others rotate. Home and
+    away alternate between rounds, and the second leg mirrors the first.
+    """
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is None or away is None:
+                continue
+            if (r if i == 0 else i) % 2:
+                home, away = away, home
+            pairs.append((home, away))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    if legs == 2:
+        rounds += [[(away, home) for home, away in pairs] for pairs in rounds]
+    return rounds
+
+
+def plan_fixtures(rounds, start, venues, kickoffs, min_rest_days=1, end=None, blackouts=(), booked=None, taken=None):
+    """Place rounds of pairings on the calendar.
+
+    rounds: list of rounds, each a list of (home, away) team ids (the
+        same round of every group merged)
+    venues: {name: set of weekdays (0=Monday)}
+    kickoffs: list of datetime.time, one slot per venue per kickoff
+    min_rest_days: full days a team has off between two matches
+    booked: {team_id: set of dates} the teams already play on
+    taken: set of (date, kickoff, venue) already in use
+
+    Returns (fixtures, unscheduled): fixtures are dicts with home, away,
+    round, date, kickoff and venue; unscheduled are the (round, home, away)
+    that did not fit before `end` (or the horizon).
+    """
+    booked = defaultdict(set, {team: set(days) for team, days in (booked or {}).items()})
+    taken = set(taken or ())
+    blackouts = set(blackouts)
+    kickoffs = sorted(kickoffs)
+    horizon = end or start + timedelta(days=MAX_HORIZON_DAYS)
+    free = {}
+    last = {}
+    gap = min_rest_days + 1
+
+    def free_slots(day):
+        if day not in free:
+            free[day] = [] if day in blackouts else [
+                (kickoff, venue) for kickoff in kickoffs
+                for venue, weekdays in venues.items()
+                if day.weekday() in weekdays and (day, kickoff, venue) not in taken
+            ]
+        return free[day]
+
+    def rested(team, day):
+        days = booked[team]
+        return not any(day + timedelta(days=d) in days for d in range(-min_rest_days, min_rest_days + 1))
+
+    fixtures = []
+    unscheduled = []
+    for round_index, pairs in enumerate(rounds):
+        ready = {
+            pair: max([start] + [last[t] + timedelta(days=gap) for t in pair if t in last])
+            for pair in pairs
+        }
+        # most constrained first: the pairs whose teams are free latest
+        for home, away in sorted(pairs, key=lambda p: ready[p], reverse=True):
+            day = ready[(home, away)]
+            while day <= horizon and not (free_slots(day) and rested(home, day) and rested(away, day)):
+                day += timedelta(days=1)
+            if day > horizon:
+                unscheduled.append((round_index, home, away))
+                continue
+            kickoff, venue = free[day].pop(0)
+            for team in (home, away):
+                booked[team].add(day)
+                last[team] = day
+            fixtures.append({'home': home, 'away': away, 'round': round_index, 'date': day, 'kickoff': kickoff, 'venue': venue})
+    fixtures.sort(key=lambda f: (f['date'], f['kickoff'], f['venue']))
+    return fixtures, unscheduled
+
+
+def schedule_season(season, start, venues, kickoffs, min_rest_days=1, legs=1, end=None, blackouts=(), dry_run=False):
+    """Plan (and unless dry_run, create) the missing group fixtures of a season.
+
+    Pairings that already have a match in the season are skipped, the
+    dates the teams already play on and the venue slots already in use
+    (by any season) are respected, and round r of every group gets the
+    same matchday, numbered after the season's existing group matchdays
+    and skipping those of its knockout matches. Rounds that would need a
+    matchday past LAST_GROUP_MATCHDAY are not created; their pairings are
+    reported in unscheduled.
+    Returns (fixtures, unscheduled) as plan_fixtures, with matchday added.
+    """
+    members = defaultdict(list)
+    for group_name, team_id in (
+        TeamGroup.objects.filter(season=season).order_by('group__name', 'team_id').values_list('group__name', 'team_id')
+    ):
+        members[group_name].append(team_id)
+    team_ids = {t for teams in members.values() for t in teams}
+
+    existing = list(
+        Match.objects.filter(season=season).filter(Q(home_team_id__in=team_ids) | Q(away_team_id__in=team_ids))
+        .values_list('home_team_id', 'away_team_id', 'match_date')
+    )
+    played_pairs = defaultdict(int)
+    booked = defaultdict(set)
+    for home, away, when in existing:
+        played_pairs[(home, away) if legs == 2 else frozenset((home, away))] += 1
+        when = timezone.localtime(when) if timezone.is_aware(when) else when
+        for team in (home, away):
+            if team in team_ids:
+                booked[team].add(when.date())
+
+    rounds = []
+    for teams in members.values():
+        for index, pairs in enumerate(round_robin(teams, legs)):
+            missing = [(h, a) for h, a in pairs if not played_pairs.get((h, a) if legs == 2 else frozenset((h, a)))]
+            while len(rounds) <= index:
+                rounds.append([])
+            rounds[index].extend(missing)
+
+    taken = set()
+    venue_matches = Match.objects.filter(venue__in=list(venues), match_date__date__gte=start).values_list('match_date', 'venue')
+    for when, venue in venue_matches:
+        when = timezone.localtime(when) if timezone.is_aware(when) else when
+        taken.add((when.date(), when.time().replace(second=0, microsecond=0), venue))
+
+    fixtures, unscheduled = plan_fixtures(
+        rounds, start, venues, kickoffs, min_rest_days, end, blackouts, booked, taken,
+    )
+
+    knockout_matchdays = set(
+        BracketSlot.objects.filter(season=season).values_list('match__matchday', flat=True)
+    )
+    top = (
+        Match.objects.filter(season=season).exclude(matchday__in=knockout_matchdays - {None})
+        .aggregate(top=Max('matchday'))['top'] or 0
+    )
+    matchday_of = {}
+    matchday = top
+    for index in sorted({f['round'] for f in fixtures}):
+        matchday += 1
+        while matchday in knockout_matchdays:
+            matchday += 1
+        matchday_of[index] = matchday
+    for fixture in fixtures:
+        fixture['matchday'] = matchday_of[fixture['round']]
+    overflow = [f for f in fixtures if f['matchday'] > LAST_GROUP_MATCHDAY]
+    if overflow:
+        fixtures = [f for f in fixtures if f['matchday'] <= LAST_GROUP_MATCHDAY]
+        unscheduled = unscheduled + [(f['round'], f['home'], f['away']) for f in overflow]
+        matchday_of = {index: md for index, md in matchday_of.items() if md <= LAST_GROUP_MATCHDAY}
+
+    if dry_run or not fixtures:
+        return fixtures, unscheduled
+
+    def aware(day, kickoff):
+        value = datetime.combine(day, kickoff)
+        return timezone.make_aware(value) if settings.USE_TZ else value
+
+    with transaction.atomic():
+        created = Match.objects.bulk_create([
+            Match(
+                season=season, home_team_id=f['home'], away_team_id=f['away'], matchday=f['matchday'],
+                match_date=aware(f['date'], f['kickoff']), venue=f['venue'],
+            )
+            for f in fixtures
+        ], batch_size=500)
+        record_match_changes((m.id, season.id) for m in created)
+        invalidate_snapshots(season.id, min(matchday_of.values()))
+        bump_results_version_on_commit(season.id)
+    return fixtures, unscheduled
@@ -2,35 +2,116 @@ from rest_framework import serializers
 from datetime import timedelta
 from .models import Team, Season, Match, News
 
-class TeamSerializer(serializers.ModelSerializer):
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def match_date_display(match_date):
+    """match_date as the API shows it: 1 hour earlier, for local time."""
+    return (match_date - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S%z")
+
+
+def sparse_fieldset(request):
+    """(wanted, omitted) from ?fields=a,b / ?omit=c on a read request.
+
+    `wanted` is None when no ?fields= was given.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    params = request.query_params
+    wanted = [f.strip() for f in params.get('fields', '').split(',') if f.strip()] or None
+    omitted = {f.strip() for f in params.get('omit', '').split(',') if f.strip()}
+    return wanted, omitted
+
+class SparseFieldsMixin:
+    """Trim the serializer to the request's ?fields= / ?omit=.
+
+    Only the top-level serializer of a response is trimmed; nested ones
+    (the teams inside a match) stay whole. `sparse_field_sources` names the
+    model fields a computed field reads, so `sparse_only` can keep them.
+    """
+    sparse_field_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted, omitted = sparse_fieldset(self.context.get('request'))
+        if wanted is None and not omitted:
+            return
+        unknown = (set(wanted or ()) | omitted) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({'error': f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        for name in list(self.fields):
+            if (wanted is not None and name not in wanted) or name in omitted:
+                self.fields.pop(name)
+
+def sparse_only(queryset, serializer_class, request, required=()):
+    """Restrict `queryset` with .only() to the columns the trimmed serializer reads.
+
+    Relations that were select_related() but are no longer serialized are
+    dropped from the join. `required` lists extra model fields the caller
+    needs itself (ordering keys read by pagination, for instance).
+    """
+    wanted, omitted = sparse_fieldset(request)
+    if (wanted is None and not omitted) or not issubclass(serializer_class, SparseFieldsMixin):
+        return queryset
+    serializer = serializer_class(context={'request': request})
+    model = queryset.model
+    concrete = {f.name for f in model._meta.concrete_fields}
+    serialized = {field.source.split('.')[0] for field in serializer.fields.values()} & concrete
+    names = {model._meta.pk.name, *required, *serialized}
+    for name in serializer.fields:
+        names.update(serializer.sparse_field_sources.get(name, ()))
+    related = queryset.query.select_related
+    if isinstance(related, dict):
+        kept = [rel for rel in related if rel in serialized]
+        queryset = queryset.select_related(None)
+        if kept:
+            queryset = queryset.select_related(*kept)
+    return queryset.only(*names)
+
+class TeamSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Team
         fields = '__all__'
 
-class SeasonSerializer(serializers.ModelSerializer):
+class SeasonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Season
-        fields = '__all__'
+        # the cache counters are bookkeeping, not season data
+        exclude = ('results_version', 'bracket_version')
+
+class MatchListSerializer(serializers.ListSerializer):
+    """Looks up group membership and bracket rounds for the whole list once,
+    so `match_stage` costs two queries per response, not several per match."""
 
-class MatchSerializer(serializers.ModelSerializer):
+    def to_representation(self, data):
+        matches = list(data.all() if hasattr(data, 'all') else data)
+        self.child._group_members = Match.group_memberships(matches)
+        self.child._stages = Match.knockout_stages(matches)
+        try:
+            return super().to_representation(matches)
+        finally:
+            self.child._group_members = None
+            self.child._stages = None
+
+class MatchSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     home_team = TeamSerializer()
     away_team = TeamSerializer()
     season = SeasonSerializer()
     match_stage = serializers.SerializerMethodField()
     match_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%S%z")
+
+    sparse_field_sources = {'match_stage': ('matchday', 'season', 'home_team', 'away_team')}
     
     def get_match_stage(self, obj):
-        return obj.get_match_stage()
+        return obj.get_match_stage(getattr(self, '_group_members', None), getattr(self, '_stages', None))
     
     def to_representation(self, instance):
         # Get the default representation
         ret = super().to_representation(instance)
         # Subtract 1 hour from match_date for local time adjustment
-        if ret['match_date']:
+        if ret.get('match_date'):
             try:
-                match_date = instance.match_date
-                adjusted_date = match_date - timedelta(hours=1)
-                ret['match_date'] = adjusted_date.strftime("%Y-%m-%dT%H:%M:%S%z")
+                ret['match_date'] = match_date_display(instance.match_date)
             except:
                 pass
         return ret
@@ -38,6 +119,47 @@ class MatchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Match
         fields = '__all__'
+        list_serializer_class = MatchListSerializer
+
+class SideloadedMatchSerializer(MatchSerializer):
+    """MatchSerializer with team/season ids in place of nested objects.
+
+    Used by the `?sideload=1` match list, which ships each team and season
+    once in top-level dictionaries (see `sideloaded_matches`).
+    """
+    home_team = serializers.PrimaryKeyRelatedField(read_only=True)
+    away_team = serializers.PrimaryKeyRelatedField(read_only=True)
+    season = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(MatchSerializer.Meta):
+        pass
+
+def sideloaded_matches(matches, context=None):
+    """{'matches': [...], 'teams': {id: team}, 'seasons': {id: season}} for an iterable of matches.
+
+    Expects home_team, away_team and season to be select_related(). A
+    ?fields=/?omit= in the request trims the matches; teams and seasons are
+    only sideloaded for the relations the matches still carry.
+    """
+    matches = list(matches)
+    serializer = SideloadedMatchSerializer(matches, many=True, context=context)
+    kept = serializer.child.fields
+    teams = {}
+    seasons = {}
+    for m in matches:
+        if 'home_team' in kept:
+            teams.setdefault(m.home_team_id, m.home_team)
+        if 'away_team' in kept:
+            teams.setdefault(m.away_team_id, m.away_team)
+        if 'season' in kept:
+            seasons.setdefault(m.season_id, m.season)
+    # the sparse fieldset applies to matches, not to the sideloaded objects
+    plain = {k: v for k, v in (context or {}).items() if k != 'request'}
+    return {
+        'matches': serializer.data,
+        'teams': {tid: data for tid, data in zip(teams, TeamSerializer(teams.values(), many=True, context=plain).data)},
+        'seasons': {sid: data for sid, data in zip(seasons, SeasonSerializer(seasons.values(), many=True, context=plain).data)},
+    }
 
 class MatchCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -51,7 +173,7 @@ class MatchCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Invalid period value')
         return value
 
-class NewsSerializer(serializers.ModelSerializer):
+class NewsSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = News
         fields = '__all__'
@@ -1,100 +1,48 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.management import call_command
-from django.db import transaction
 
-
-def _replace_placeholders_for_match(match):
-    """When a match is completed, replace any placeholder teams referencing
-    WINNER <matchday> or LOSER <matchday> with the actual Team objects
-    in subsequent matches for the same season.
-    """
-    try:
-        from .models import Team, Match
-    except Exception:
-        return
-
-    matchnum = getattr(match, 'matchday', None)
-    if not matchnum:
-        return
-
-    # Determine winner and loser; if draw, try penalties or awarded_to
-    hs = match.home_score or 0
-    as_ = match.away_score or 0
-    winner = None
-    loser = None
-    if hs != as_:
-        winner = match.home_team if hs > as_ else match.away_team
-        loser = match.away_team if hs > as_ else match.home_team
-    else:
-        # check penalty fields
-        ph = getattr(match, 'penalty_home', None)
-        pa = getattr(match, 'penalty_away', None)
-        if ph is not None and pa is not None and ph != pa:
-            winner = match.home_team if ph > pa else match.away_team
-            loser = match.away_team if ph > pa else match.home_team
-        else:
-            # fallback to awarded_to if admin set it
-            at = getattr(match, 'awarded_to', None)
-            if at is not None:
-                winner = at
-                loser = match.away_team if at == match.home_team else match.home_team
-            else:
-                # cannot determine winner automatically
-                return
-
-    winner_name = f"WINNER {matchnum} (placeholder)"
-    loser_name = f"LOSER {matchnum} (placeholder)"
-
-    # perform updates in a transaction
-    with transaction.atomic():
-        wp = Team.objects.filter(name=winner_name).first()
-        if wp:
-            # update matches where this placeholder appears
-            Match.objects.filter(season=match.season, home_team=wp).update(home_team=winner)
-            Match.objects.filter(season=match.season, away_team=wp).update(away_team=winner)
-
-        lp = Team.objects.filter(name=loser_name).first()
-        if lp:
-            Match.objects.filter(season=match.season, home_team=lp).update(home_team=loser)
-            Match.objects.filter(season=match.season, away_team=lp).update(away_team=loser)
-
-        # After replacing placeholders, remove placeholder Team records to keep team list clean
-        try:
-            Team.objects.filter(name__icontains=f"WINNER {matchnum} (placeholder)").delete()
-        except Exception:
-            pass
-        try:
-            Team.objects.filter(name__icontains=f"LOSER {matchnum} (placeholder)").delete()
-        except Exception:
-            pass
+from .bracket import advance_bracket
+from .models import BracketSlot, Group, Match, TeamGroup
+from .standings import refresh_team_standings
+from .cache import bump_bracket_version_on_commit, bump_results_version_on_commit
+from .changes import record_match_changes
+from .snapshots import invalidate_snapshots
+from .tasks import schedule_snapshot_build
 
 
-@receiver(pre_save)
+@receiver(pre_save, sender=Match)
 def match_pre_save(sender, instance, **kwargs):
-    # Only act on Match model (avoid importing here to keep generic)
-    if sender.__name__ != 'Match':
-        return
-    # initialize previous-state flags
+    """Record the previous state for the post_save receivers.
+
+    Instances loaded through the ORM carry a snapshot of their database
+    values (Match.from_db), so this normally costs no query; only an
+    instance built by hand with an existing pk is looked up.
+    """
+    instance._pre_awarded = False
+    instance._pre_standing_key = None
+    instance._pre_matchday = None
+    instance._result_changed = True
+    instance._bracket_changed = True
     if not instance.pk:
-        instance._pre_awarded = False
-        instance._pre_played = False
         return
-    try:
-        old = sender.objects.get(pk=instance.pk)
-        instance._pre_awarded = getattr(old, 'awarded', False)
-        instance._pre_played = getattr(old, 'is_played', False)
-    except sender.DoesNotExist:
-        instance._pre_awarded = False
-        instance._pre_played = False
+    if instance.has_loaded_values(Match.BRACKET_FIELDS):
+        old = instance._loaded_values
+    else:
+        try:
+            old = sender.objects.filter(pk=instance.pk).values(*Match.BRACKET_FIELDS).get()
+        except sender.DoesNotExist:
+            return
+    instance._result_changed = any(getattr(instance, f) != old[f] for f in Match.RESULT_FIELDS)
+    instance._bracket_changed = any(getattr(instance, f) != old[f] for f in Match.BRACKET_FIELDS)
+    instance._pre_awarded = old['awarded']
+    instance._pre_standing_key = (old['season_id'], old['home_team_id'], old['away_team_id'])
+    instance._pre_matchday = old['matchday']
 
 
-@receiver(post_save)
+@receiver(post_save, sender=Match)
 def match_post_save(sender, instance, created, **kwargs):
-    if sender.__name__ != 'Match':
-        return
-
     prev_awarded = getattr(instance, '_pre_awarded', False)
     # If match has just been marked awarded, apply award logic
     if instance.awarded and not prev_awarded:
@@ -147,42 +95,166 @@ def match_post_save(sender, instance, created, **kwargs):
 
         if update_fields:
             sender.objects.filter(pk=instance.pk).update(**update_fields)
+            # keep the instance (and its loaded-values snapshot) in line with the row
+            for field_name, value in update_fields.items():
+                setattr(instance, field_name, value)
 
-        # Recompute standings (calls management command that already exists)
-        try:
-            call_command('recompute_standings')
-        except Exception:
-            # don't raise on signal failures
-            pass
-    # If the match has just been marked as played (not played before), try resolving placeholders
-    prev_played = getattr(instance, '_pre_played', False)
-    now_played = getattr(instance, 'is_played', False)
-    if now_played and not prev_played:
-        try:
-            _replace_placeholders_for_match(instance)
-            # recompute standings after replacements
-            call_command('recompute_standings')
-        except Exception:
-            pass
+
+@receiver(post_save, sender=Match)
+def sync_team_standings_on_match_save(sender, instance, **kwargs):
+    """Refresh the stored standings rows of the teams involved in this match.
+
+    Runs after match_post_save so queryset updates made while applying an
+    award are already visible. If the match moved season or changed teams,
+    the previous participants are refreshed as well.
+    """
+    if not getattr(instance, '_result_changed', True):
+        return
+    try:
+        refresh_team_standings(instance.season_id, (instance.home_team_id, instance.away_team_id))
+        old_key = getattr(instance, '_pre_standing_key', None)
+        if old_key and old_key != (instance.season_id, instance.home_team_id, instance.away_team_id):
+            refresh_team_standings(old_key[0], old_key[1:])
+    except Exception:
+        pass
+
+
+@receiver(post_delete, sender=Match)
+def sync_team_standings_on_match_delete(sender, instance, **kwargs):
+    try:
+        refresh_team_standings(instance.season_id, (instance.home_team_id, instance.away_team_id), create=False)
+    except Exception:
+        pass
+
+
+@receiver(post_save, sender=TeamGroup)
+def sync_team_standings_on_group_join(sender, instance, created, **kwargs):
+    """Make sure a team added to a group shows up in the season table."""
+    if not created:
+        return
+    try:
+        refresh_team_standings(instance.season_id, (instance.team_id,))
+    except Exception:
+        pass
+
+
+@receiver(post_save, sender=Match)
+def bump_results_version_on_match_save(sender, instance, **kwargs):
+    """Invalidate cached standings payloads for the season(s) this match touches."""
+    if not getattr(instance, '_result_changed', True):
+        return
+    old_key = getattr(instance, '_pre_standing_key', None)
+    bump_results_version_on_commit(instance.season_id, old_key[0] if old_key else None)
 
 
 @receiver(post_save, sender=Match)
-def auto_populate_next_stage_on_knockout_played(sender, instance, created, **kwargs):
-    """Automatically populate next stage teams when a knockout match is marked as played."""
-    
-    # Only process matches that are part of knockout stages (matchday >= 22)
-    if instance.matchday is None or instance.matchday < 22:
+def record_match_change_on_save(sender, instance, **kwargs):
+    """Append to the change feed; a match that moved season leaves a tombstone in the old one."""
+    old_key = getattr(instance, '_pre_standing_key', None)
+    if old_key and old_key[0] != instance.season_id:
+        record_match_changes([(instance.pk, old_key[0])], deleted=True)
+    record_match_changes([(instance.pk, instance.season_id)])
+
+
+@receiver(post_delete, sender=Match)
+def record_match_change_on_delete(sender, instance, **kwargs):
+    record_match_changes([(instance.pk, instance.season_id)], deleted=True)
+
+
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=TeamGroup)
+@receiver(post_delete, sender=TeamGroup)
+def bump_results_version_on_change(sender, instance, **kwargs):
+    bump_results_version_on_commit(instance.season_id)
+
+
+def _invalidate_snapshots(season_id, *matchdays):
+    matchdays = [md for md in matchdays if md is not None]
+    if not season_id or not matchdays:
         return
-    
-    # Only run if match is marked as played
-    if not instance.is_played:
+    invalidate_snapshots(season_id, min(matchdays))
+    schedule_snapshot_build(season_id)
+
+
+@receiver(post_save, sender=Match)
+def invalidate_snapshots_on_match_save(sender, instance, **kwargs):
+    """Drop matchday snapshots from the first matchday this save can affect."""
+    if not getattr(instance, '_result_changed', True):
         return
-    
-    # Check if this is any of the competition seasons (Girls, Junior Boys, Senior Boys)
-    if instance.season and any(keyword in instance.season.name.upper() for keyword in ['GIRLS', 'JUNIOR BOYS', 'SENIOR BOYS']):
-        try:
-            # Run the populate_next_stage command
-            call_command('populate_next_stage')
-        except Exception:
-            # Silently fail to avoid breaking the save operation
-            pass
+    try:
+        old_key = getattr(instance, '_pre_standing_key', None)
+        old_matchday = getattr(instance, '_pre_matchday', None)
+        if old_key and old_key[0] != instance.season_id:
+            _invalidate_snapshots(old_key[0], old_matchday)
+            old_matchday = None
+        _invalidate_snapshots(instance.season_id, instance.matchday, old_matchday)
+    except Exception:
+        pass
+
+
+@receiver(post_delete, sender=Match)
+def invalidate_snapshots_on_match_delete(sender, instance, **kwargs):
+    try:
+        _invalidate_snapshots(instance.season_id, instance.matchday)
+    except Exception:
+        pass
+
+
+@receiver(post_save, sender=TeamGroup)
+@receiver(post_delete, sender=TeamGroup)
+def invalidate_snapshots_on_group_change(sender, instance, **kwargs):
+    # the season's team list changed, so every snapshot is missing or has a stale row
+    try:
+        invalidate_snapshots(instance.season_id, None)
+        schedule_snapshot_build(instance.season_id)
+    except Exception:
+        pass
+
+
+@receiver(post_save, sender=Match)
+def advance_bracket_on_result(sender, instance, **kwargs):
+    """Fill the knockout slots fed by this match when its result (or shootout) changes.
+
+    Only this match's dependents are touched, and they are written with
+    bulk_update, which sends no signals, so a save here never cascades back
+    through the Match receivers. Runs after match_post_save, so an award
+    applied there is already on the instance.
+    """
+    if not getattr(instance, '_bracket_changed', True) or not instance.is_played:
+        return
+    try:
+        advance_bracket(instance)
+    except Exception:
+        # Silently fail to avoid breaking the save operation
+        pass
+
+
+def _in_bracket(match_id):
+    return BracketSlot.objects.filter(Q(match_id=match_id) | Q(source_match_id=match_id)).exists()
+
+
+@receiver(post_save, sender=Match)
+def bump_bracket_version_on_match_save(sender, instance, created, **kwargs):
+    """Invalidate the cached bracket document when one of its matches changes.
+
+    A new match cannot be in a bracket yet (link_bracket bumps on its own).
+    """
+    if created or not getattr(instance, '_bracket_changed', True):
+        return
+    if _in_bracket(instance.pk):
+        bump_bracket_version_on_commit(instance.season_id)
+
+
+@receiver(pre_delete, sender=Match)
+def bump_bracket_version_on_match_delete(sender, instance, **kwargs):
+    # pre_delete: the match's slots are gone by post_delete
+    if _in_bracket(instance.pk):
+        bump_bracket_version_on_commit(instance.season_id)
+
+
+@receiver(post_save, sender=BracketSlot)
+@receiver(post_delete, sender=BracketSlot)
+def bump_bracket_version_on_slot_change(sender, instance, **kwargs):
+    bump_bracket_version_on_commit(instance.season_id)
@@ -0,0 +1,186 @@
+"""Per-matchday standings snapshots ("table as of round N").
+
+A snapshot is written for every completed matchday (all of its matches
+played or void) and counts the played matches up to and including that
+matchday. Editing a result invalidates the snapshots from the edited
+matchday onward; `build_snapshots` then writes only the missing ones,
+starting from the newest snapshot that is still valid and replaying only
+the results after it.
+
+A played match without a matchday cannot be placed in that order, so a
+season with such matches gets no snapshots (and the as-of endpoint says
+why) rather than tables that silently leave those results out.
+"""
+import logging
+
+from django.db.models import Count, Q
+
+from .models import Match, StandingsSnapshot, Team
+from .standings import season_teams
+from .utils import STAT_FIELDS, empty_stats, standing_row, standings_sort_key
+
+logger = logging.getLogger(__name__)
+
+_MATCH_FIELDS = ('home_team_id', 'away_team_id', 'home_score', 'away_score', 'match_date', 'awarded', 'matchday')
+
+
+class SnapshotError(Exception):
+    """The season's results cannot be split into matchday tables."""
+
+
+def _pair_rank(m):
+    # Same preference compute_standings uses when a pair met more than once
+    return (m.home_team_id, m.away_team_id, -m.match_date.timestamp(), -int(m.awarded), m.id)
+
+
+def _apply(stats, m, sign):
+    hs = m.home_score or 0
+    as_ = m.away_score or 0
+    home = stats[m.home_team_id]
+    away = stats[m.away_team_id]
+    home['played'] += sign
+    away['played'] += sign
+    home['goals_for'] += sign * hs
+    home['goals_against'] += sign * as_
+    away['goals_for'] += sign * as_
+    away['goals_against'] += sign * hs
+    if hs > as_:
+        home['wins'] += sign
+        home['points'] += 3 * sign
+        away['losses'] += sign
+    elif hs < as_:
+        away['wins'] += sign
+        away['points'] += 3 * sign
+        home['losses'] += sign
+    else:
+        home['draws'] += sign
+        away['draws'] += sign
+        home['points'] += sign
+        away['points'] += sign
+
+
+def completed_matchdays(season_id):
+    """Matchdays of a season whose matches are all played or void."""
+    rows = (
+        Match.objects.filter(season_id=season_id, matchday__isnull=False)
+        .values('matchday')
+        .annotate(open=Count('id', filter=Q(is_played=False, void=False)))
+        .order_by('matchday')
+    )
+    return [r['matchday'] for r in rows if r['open'] == 0]
+
+
+def unplaced_results(season_id):
+    """Number of played matches in a season that have no matchday."""
+    return Match.objects.filter(season_id=season_id, is_played=True, matchday__isnull=True).count()
+
+
+def _pair(m):
+    return (min(m.home_team_id, m.away_team_id), max(m.home_team_id, m.away_team_id))
+
+
+def build_snapshots(season_id):
+    """Write snapshots for completed matchdays that do not have one yet.
+
+    Starts from the newest snapshot before the first missing matchday:
+    its table is the running total, and only the played matches after it
+    are replayed (plus, for the team pairs those touch, the earlier match
+    that currently counts, so a rematch replaces it correctly).
+    """
+    completed = completed_matchdays(season_id)
+    if not completed:
+        return 0
+    existing = set(
+        StandingsSnapshot.objects.filter(season_id=season_id).values_list('matchday', flat=True)
+    )
+    missing = [md for md in completed if md not in existing]
+    if not missing:
+        return 0
+    unplaced = unplaced_results(season_id)
+    if unplaced:
+        logger.warning('Season %s has %s played matches without a matchday; not building snapshots', season_id, unplaced)
+        return 0
+
+    teams = dict(season_teams(season_id).values_list('id', 'name'))
+    stats = {tid: empty_stats() for tid in teams}
+    counted = {}
+    played = Match.objects.filter(season_id=season_id, is_played=True).only(*_MATCH_FIELDS)
+    base = max((md for md in existing if md < missing[0]), default=None)
+    matches = played.filter(matchday__lte=missing[-1]).order_by('matchday')
+    if base is not None:
+        table = StandingsSnapshot.objects.get(season_id=season_id, matchday=base).table
+        for row in table:
+            if row[0] in stats:
+                stats[row[0]] = dict(zip(STAT_FIELDS, row[1:]))
+        matches = list(matches.filter(matchday__gt=base))
+        team_ids = {t for m in matches for t in (m.home_team_id, m.away_team_id)}
+        pairs = {_pair(m) for m in matches}
+        earlier = played.filter(matchday__lte=base, home_team_id__in=team_ids, away_team_id__in=team_ids)
+        for m in earlier:
+            pair = _pair(m)
+            if pair in pairs and (pair not in counted or _pair_rank(m) < _pair_rank(counted[pair])):
+                counted[pair] = m
+    targets = iter(missing)
+    target = next(targets)
+    snapshots = []
+
+    def emit(matchday):
+        rows = [standing_row(tid, teams[tid], stats[tid]) for tid in teams]
+        rows.sort(key=standings_sort_key)
+        table = [[r['team_id']] + [r[f] for f in STAT_FIELDS] for r in rows]
+        snapshots.append(StandingsSnapshot(season_id=season_id, matchday=matchday, table=table))
+
+    for m in matches:
+        while target is not None and m.matchday > target:
+            emit(target)
+            target = next(targets, None)
+        pair = _pair(m)
+        current = counted.get(pair)
+        if current is not None:
+            if _pair_rank(m) >= _pair_rank(current):
+                continue
+            _apply(stats, current, -1)
+        counted[pair] = m
+        _apply(stats, m, 1)
+    while target is not None:
+        emit(target)
+        target = next(targets, None)
+
+    # ignore_conflicts: a concurrent build may have written the same matchday
+    StandingsSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    return len(snapshots)
+
+
+def invalidate_snapshots(season_id, from_matchday):
+    """Drop snapshots from `from_matchday` onward (all of them if None)."""
+    qs = StandingsSnapshot.objects.filter(season_id=season_id)
+    if from_matchday is not None:
+        qs = qs.filter(matchday__gte=from_matchday)
+    qs.delete()
+
+
+def standings_as_of(season_id, matchday):
+    """Return the table after `matchday`, or None if that matchday is not complete.
+
+    Raises SnapshotError when the season has played matches without a
+    matchday, which the table could not place.
+    """
+    unplaced = unplaced_results(season_id)
+    if unplaced:
+        raise SnapshotError(
+            f'{unplaced} played match(es) in this season have no matchday; assign matchdays to see tables by round'
+        )
+    snapshot = StandingsSnapshot.objects.filter(season_id=season_id, matchday=matchday).first()
+    if snapshot is None:
+        if matchday not in completed_matchdays(season_id):
+            return None
+        build_snapshots(season_id)
+        snapshot = StandingsSnapshot.objects.filter(season_id=season_id, matchday=matchday).first()
+        if snapshot is None:
+            return None
+    team_ids = [row[0] for row in snapshot.table]
+    names = dict(Team.objects.filter(id__in=team_ids).values_list('id', 'name'))
+    return [
+        standing_row(row[0], names.get(row[0], ''), dict(zip(STAT_FIELDS, row[1:])))
+        for row in snapshot.table
+    ]
@@ -0,0 +1,353 @@
+"""Persisted standings maintenance.
+
+`TeamStanding` holds one row per (season, team). A Match write only changes
+the rows of the teams that played in it, so instead of replaying the whole
+season we re-tally just those teams' played matches and write their rows
+back inside a transaction. `rebuild_season_standings` does the same for
+every team in a season and is used for backfills and drift checks.
+
+Tallies are computed in the database (`aggregate_stats`); the Python replay
+in `league.utils.compute_standings` is kept as the reference implementation.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import Coalesce, Greatest, Least, RowNumber
+from django.utils import timezone
+
+from .models import Group, Match, Team, TeamGroup, TeamStanding
+from .utils import (
+    COUNTED_MATCH_ORDER,
+    STAT_FIELDS,
+    compute_standings,
+    empty_stats,
+    standing_row,
+    standings_sort_key,
+)
+
+
+def season_teams(season_id):
+    """Teams that belong to a season: group members plus any match participant."""
+    season_matches = Match.objects.filter(season_id=season_id)
+    return Team.objects.filter(
+        Q(id__in=TeamGroup.objects.filter(season_id=season_id).values('team_id'))
+        | Q(id__in=season_matches.values('home_team_id'))
+        | Q(id__in=season_matches.values('away_team_id'))
+    )
+
+
+def season_team_ids(season_id):
+    return set(season_teams(season_id).values_list('id', flat=True))
+
+
+def counted_matches(season_id, team_ids=None, season_ids=None):
+    """Played matches that count towards the table: the latest one per team pair.
+
+    Mirrors the ordering compute_standings uses, but lets the database do the
+    pair dedupe: DISTINCT ON where available (Postgres), ROW_NUMBER() otherwise.
+    Pass `season_ids` instead of `season_id` to cover several seasons at once.
+    """
+    if season_ids is not None:
+        matches = Match.objects.filter(season_id__in=season_ids, is_played=True)
+    else:
+        matches = Match.objects.filter(season_id=season_id, is_played=True)
+    if team_ids is not None:
+        matches = matches.filter(Q(home_team_id__in=team_ids) | Q(away_team_id__in=team_ids))
+    pair = (Least('home_team_id', 'away_team_id'), Greatest('home_team_id', 'away_team_id'))
+    if connection.features.can_distinct_on_fields:
+        return (
+            matches.annotate(pair_lo=pair[0], pair_hi=pair[1])
+            .order_by('season_id', 'pair_lo', 'pair_hi', *COUNTED_MATCH_ORDER)
+            .distinct('season_id', 'pair_lo', 'pair_hi')
+        )
+    ordering = [
+        F(f[1:]).desc() if f.startswith('-') else F(f).asc()
+        for f in COUNTED_MATCH_ORDER
+    ]
+    return matches.annotate(
+        pair_rank=Window(expression=RowNumber(), partition_by=[F('season_id'), *pair], order_by=ordering),
+    ).filter(pair_rank=1)
+
+
+def _side_totals(matches, team_field, goals_for, goals_against):
+    return (
+        matches.annotate(gf=Coalesce(goals_for, 0), ga=Coalesce(goals_against, 0))
+        .values(team_field)
+        .annotate(
+            played=Count('id'),
+            wins=Count('id', filter=Q(gf__gt=F('ga'))),
+            draws=Count('id', filter=Q(gf=F('ga'))),
+            losses=Count('id', filter=Q(gf__lt=F('ga'))),
+            goals_for=Sum('gf'),
+            goals_against=Sum('ga'),
+        )
+        .order_by()
+    )
+
+
+def aggregate_stats(season_id, team_ids=None):
+    """Tally standings stats in SQL, returning {team_id: stats}.
+
+    One grouped query per side (home/away) with conditional aggregation over
+    the counted matches; if `team_ids` is given only matches involving those
+    teams are considered, which is enough to get their rows right.
+    """
+    counted = Match.objects.filter(id__in=counted_matches(season_id, team_ids).values('id'))
+    stats = defaultdict(empty_stats)
+    sides = (
+        ('home_team_id', 'home_score', 'away_score'),
+        ('away_team_id', 'away_score', 'home_score'),
+    )
+    for team_field, goals_for, goals_against in sides:
+        for row in _side_totals(counted, team_field, goals_for, goals_against):
+            team_stats = stats[row[team_field]]
+            for f in ('played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against'):
+                team_stats[f] += row[f] or 0
+    for team_stats in stats.values():
+        team_stats['points'] = team_stats['wins'] * 3 + team_stats['draws']
+    return stats
+
+
+def season_standings(season_id):
+    """compute_standings, scoped to the season's teams and aggregated in SQL."""
+    stats = aggregate_stats(season_id)
+    standings = [
+        standing_row(team_id, name, stats.get(team_id))
+        for team_id, name in season_teams(season_id).values_list('id', 'name')
+    ]
+    standings.sort(key=standings_sort_key)
+    return standings
+
+
+def _write_rows(season_id, team_ids, stats, create=True):
+    existing = {
+        row.team_id: row
+        for row in TeamStanding.objects.select_for_update().filter(season_id=season_id, team_id__in=team_ids)
+    }
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for tid in team_ids:
+        values = stats.get(tid) or empty_stats()
+        row = existing.get(tid)
+        if row is None:
+            if create:
+                to_create.append(TeamStanding(season_id=season_id, team_id=tid, **values))
+            continue
+        if any(getattr(row, f) != values[f] for f in STAT_FIELDS):
+            for f in STAT_FIELDS:
+                setattr(row, f, values[f])
+            row.updated_at = now
+            to_update.append(row)
+    if to_create:
+        TeamStanding.objects.bulk_create(to_create)
+    if to_update:
+        TeamStanding.objects.bulk_update(to_update, list(STAT_FIELDS) + ['updated_at'])
+
+
+def refresh_team_standings(season_id, team_ids, create=True):
+    """Re-tally the stored rows for `team_ids` in a season.
+
+    A team's row only depends on matches it played in, so this touches
+    a handful of matches regardless of how big the season is. Pass
+    create=False to only update rows that already exist (used on delete,
+    where the team itself may be going away).
+    """
+    team_ids = {tid for tid in team_ids if tid is not None}
+    if not season_id or not team_ids:
+        return
+    with transaction.atomic():
+        stats = aggregate_stats(season_id, team_ids)
+        _write_rows(season_id, team_ids, stats, create=create)
+
+
+def rebuild_season_standings(season_id):
+    """Recompute every stored row of a season from scratch."""
+    with transaction.atomic():
+        team_ids = season_team_ids(season_id)
+        TeamStanding.objects.filter(season_id=season_id).exclude(team_id__in=team_ids).delete()
+        _write_rows(season_id, team_ids, aggregate_stats(season_id))
+
+
+def get_standings_many(season_ids):
+    """Stored standings for several seasons in one query: {season_id: rows}."""
+    season_ids = list(dict.fromkeys(season_ids))
+    by_season = {sid: [] for sid in season_ids}
+    for r in TeamStanding.objects.filter(season_id__in=season_ids).select_related('team'):
+        by_season[r.season_id].append(
+            standing_row(r.team_id, r.team.name, {f: getattr(r, f) for f in STAT_FIELDS})
+        )
+    for sid, rows in by_season.items():
+        if not rows and season_team_ids(sid):
+            # First read of a season that has never been materialized
+            rebuild_season_standings(sid)
+            rows.extend(
+                standing_row(r.team_id, r.team.name, {f: getattr(r, f) for f in STAT_FIELDS})
+                for r in TeamStanding.objects.filter(season_id=sid).select_related('team')
+            )
+        rows.sort(key=standings_sort_key)
+    return by_season
+
+
+def get_standings(season_id):
+    """Return the stored standings for a season, sorted like compute_standings."""
+    return get_standings_many([season_id])[season_id]
+
+
+def check_season_standings(season_id):
+    """Compare stored rows against a from-scratch compute_standings run.
+
+    Returns a list of (team_name, field, stored, expected) mismatches.
+    """
+    stored = {
+        r.team_id: r for r in TeamStanding.objects.filter(season_id=season_id)
+    }
+    mismatches = []
+    for expected in compute_standings(season_id):
+        row = stored.get(expected['team_id'])
+        for f in STAT_FIELDS:
+            value = getattr(row, f) if row is not None else 0
+            if value != expected[f]:
+                mismatches.append((expected['team_name'], f, value, expected[f]))
+    return mismatches
+
+
+# --- Group tables -----------------------------------------------------------
+
+DEFAULT_GROUP_TIEBREAKERS = ('goal_diff', 'goals_for')
+
+
+def _h2h_table(team_ids, results):
+    """Mini-table (points, goal diff, goals for) among `team_ids` only."""
+    table = {tid: [0, 0, 0] for tid in team_ids}
+    ordered = sorted(team_ids)
+    for i, a in enumerate(ordered):
+        for b in ordered[i + 1:]:
+            score = results.get((a, b))
+            if score is None:
+                continue
+            ga, gb = score
+            table[a][1] += ga - gb
+            table[b][1] += gb - ga
+            table[a][2] += ga
+            table[b][2] += gb
+            if ga > gb:
+                table[a][0] += 3
+            elif gb > ga:
+                table[b][0] += 3
+            else:
+                table[a][0] += 1
+                table[b][0] += 1
+    return table
+
+
+TIEBREAKERS = {
+    'goal_diff': lambda row, ctx: -row['goal_diff'],
+    'goals_for': lambda row, ctx: -row['goals_for'],
+    'h2h_points': lambda row, ctx: -ctx['h2h'][row['team_id']][0],
+    'h2h_goal_diff': lambda row, ctx: -ctx['h2h'][row['team_id']][1],
+    'h2h_goals_for': lambda row, ctx: -ctx['h2h'][row['team_id']][2],
+    # No card data is recorded, so fair play ranks on forfeits: matches
+    # awarded against the team (protest or walkover).
+    'fair_play': lambda row, ctx: ctx['forfeits'].get(row['team_id'], 0),
+}
+
+_MATCH_TIEBREAKERS = {'h2h_points', 'h2h_goal_diff', 'h2h_goals_for', 'fair_play'}
+
+
+def _season_results(season_ids):
+    """Index the counted matches of the given seasons in one query.
+
+    Returns {season_id: ({(low_id, high_id): (low_goals, high_goals)}, {team_id: forfeits})}.
+    """
+    indexed = {sid: ({}, defaultdict(int)) for sid in season_ids}
+    rows = counted_matches(None, season_ids=season_ids).values_list(
+        'season_id', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'awarded', 'awarded_to_id',
+    )
+    for season_id, home_id, away_id, hs, as_, awarded, awarded_to_id in rows:
+        results, forfeits = indexed[season_id]
+        hs = hs or 0
+        as_ = as_ or 0
+        if home_id <= away_id:
+            results[(home_id, away_id)] = (hs, as_)
+        else:
+            results[(away_id, home_id)] = (as_, hs)
+        if awarded and awarded_to_id in (home_id, away_id):
+            forfeits[away_id if awarded_to_id == home_id else home_id] += 1
+    return indexed
+
+
+def _rank_group(rows, tiebreakers, results, forfeits):
+    """Sort a group's rows by points, then break ties with `tiebreakers`.
+
+    Head-to-head criteria are computed per block of teams level on points,
+    from the pre-indexed results, so no extra queries are needed.
+    """
+    rows = sorted(rows, key=lambda r: -r['points'])
+    ranked = []
+    i = 0
+    while i < len(rows):
+        j = i
+        while j < len(rows) and rows[j]['points'] == rows[i]['points']:
+            j += 1
+        block = rows[i:j]
+        ctx = {'forfeits': forfeits, 'h2h': {}}
+        if any(t.startswith('h2h_') for t in tiebreakers):
+            ctx['h2h'] = _h2h_table([r['team_id'] for r in block], results)
+        block.sort(key=lambda r: tuple(TIEBREAKERS[t](r, ctx) for t in tiebreakers) + (r['team_name'],))
+        ranked.extend(block)
+        i = j
+    return ranked
+
+
+def validate_tiebreakers(tiebreakers):
+    """Return `tiebreakers` as a tuple (the default if empty); ValueError on unknown names."""
+    tiebreakers = tuple(tiebreakers or DEFAULT_GROUP_TIEBREAKERS)
+    unknown = [t for t in tiebreakers if t not in TIEBREAKERS]
+    if unknown:
+        raise ValueError(f"Unknown tie-breaker(s): {', '.join(unknown)}")
+    return tiebreakers
+
+
+def grouped_standings_tables_many(season_ids, tiebreakers=None, standings=None):
+    """Build every group table of several seasons at once: {season_id: tables}.
+
+    Reads the stored standings, the groups and the group membership once
+    each for all seasons, plus the counted matches when a head-to-head or
+    fair play tie-breaker is requested. `standings` may pass in rows already
+    loaded with get_standings_many. Raises ValueError for an unknown
+    tie-breaker name.
+    """
+    tiebreakers = validate_tiebreakers(tiebreakers)
+    season_ids = list(dict.fromkeys(season_ids))
+    if standings is None:
+        standings = get_standings_many(season_ids)
+    rows_by_team = {
+        (sid, row['team_id']): row for sid, rows in standings.items() for row in rows
+    }
+
+    members = defaultdict(list)
+    memberships = TeamGroup.objects.filter(group__season_id__in=season_ids).values_list(
+        'group__season_id', 'group_id', 'team_id', 'team__name',
+    )
+    for season_id, group_id, team_id, team_name in memberships:
+        members[group_id].append(rows_by_team.get((season_id, team_id)) or standing_row(team_id, team_name))
+
+    indexed = {}
+    if _MATCH_TIEBREAKERS.intersection(tiebreakers):
+        indexed = _season_results(season_ids)
+
+    tables = {sid: [] for sid in season_ids}
+    for group in Group.objects.filter(season_id__in=season_ids).order_by('name'):
+        results, forfeits = indexed.get(group.season_id, ({}, {}))
+        tables[group.season_id].append({
+            'group': {'id': group.id, 'name': group.name},
+            'standings': _rank_group(members.get(group.id, []), tiebreakers, results, forfeits),
+        })
+    return tables
+
+
+def grouped_standings_tables(season_id, tiebreakers=None):
+    """Build every group table of a season at once (see grouped_standings_tables_many)."""
+    return grouped_standings_tables_many([season_id], tiebreakers)[season_id]
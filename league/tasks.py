@@ -0,0 +1,89 @@
+"""In-process background queue for post-save league work.
+
+Signals used to run `recompute_standings` for the whole league inside the
+editor's request. Instead they now enqueue a task keyed by (kind, season)
+after the transaction commits. (Knockout progression is cheap enough to
+run in-line; see league/bracket.py.) A key that is
+already waiting is not queued again, so a burst of saves in one season
+collapses into a single run, and runs for the same key never overlap.
+
+Set LEAGUE_TASKS_INLINE = True to run tasks synchronously (tests, scripts).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .cache import bump_results_version
+from .snapshots import build_snapshots
+from .standings import rebuild_season_standings
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+_pending = set()
+_key_locks = {}
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = getattr(settings, 'LEAGUE_TASK_WORKERS', 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='league-task')
+        return _executor
+
+
+def _run(key, func):
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        with _lock:
+            # from here on a new save needs a fresh run, so let it queue again
+            _pending.discard(key)
+        close_old_connections()
+        try:
+            func()
+        except Exception:
+            logger.exception('League background task %s failed', key)
+        finally:
+            close_old_connections()
+
+
+def enqueue(key, func):
+    """Queue `func` unless a run for `key` is already waiting."""
+    if getattr(settings, 'LEAGUE_TASKS_INLINE', False):
+        try:
+            func()
+        except Exception:
+            logger.exception('League task %s failed', key)
+        return
+    with _lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    _get_executor().submit(_run, key, func)
+
+
+def enqueue_on_commit(key, func):
+    transaction.on_commit(lambda: enqueue(key, func))
+
+
+def _recompute_season(season_id):
+    rebuild_season_standings(season_id)
+    bump_results_version(season_id)
+
+
+def schedule_standings_recompute(season_id):
+    """Rebuild one season's stored standings in the background after commit."""
+    if season_id:
+        enqueue_on_commit(('standings', season_id), lambda: _recompute_season(season_id))
+
+
+def schedule_snapshot_build(season_id):
+    """Write any missing matchday snapshots for one season after commit."""
+    if season_id:
+        enqueue_on_commit(('snapshots', season_id), lambda: build_snapshots(season_id))
@@ -1,3 +1,1410 @@
-from django.test import TestCase
+import csv
+import importlib
+import io
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
 
-# Create your tests here.
+import openpyxl
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import tasks
+from .bracket import STANDARD_BRACKET, link_bracket, placeholder_team
+from .bracket_generator import generate_bracket, seed_order
+from .cache import bump_results_version
+from .consumers import LiveMatchConsumer, LiveSeasonConsumer
+from .live import match_group, season_group
+from .models import (
+    BracketSlot,
+    Group,
+    Match,
+    MatchChange,
+    Season,
+    StandingsSnapshot,
+    Team,
+    TeamGroup,
+    TeamStanding,
+)
+from .scheduler import LAST_GROUP_MATCHDAY, plan_fixtures, round_robin, schedule_season
+from .snapshots import build_snapshots, invalidate_snapshots
+from .standings import (
+    check_season_standings,
+    get_standings,
+    grouped_standings_tables,
+    rebuild_season_standings,
+    season_standings,
+)
+from .utils import compute_standings
+
+
+class SeasonStandingsParityTests(TestCase):
+    """The SQL standings engine must agree with the Python replay in compute_standings."""
+
+    def setUp(self):
+        rnd = random.Random(2025)
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        self.other = Season.objects.create(name='2025 SENIOR BOYS CUP', start_date='2025-01-01')
+        group = Group.objects.create(name='A', category='girls', season=self.season)
+        self.teams = [Team.objects.create(name=f'Team {i:02d}') for i in range(10)]
+        # group member that never plays still gets a (zero) row
+        self.idle = Team.objects.create(name='Idle FC')
+        TeamGroup.objects.create(team=self.idle, group=group, season=self.season)
+        # team outside the season must not appear
+        self.outsider = Team.objects.create(name='Outsider FC')
+
+        start = timezone.now() - timedelta(days=10)
+        for _ in range(60):
+            home, away = rnd.sample(self.teams, 2)
+            home_score = rnd.choice([None, 0, 1, 2, 3])
+            Match.objects.create(
+                season=rnd.choice([self.season, self.season, self.other]),
+                home_team=home,
+                away_team=away,
+                match_date=start + timedelta(hours=rnd.randint(0, 6)),
+                home_score=home_score,
+                away_score=rnd.choice([0, 1, 2]),
+                awarded=rnd.random() < 0.2,
+                manual_finished_at=start if home_score is None and rnd.random() < 0.5 else None,
+            )
+
+    def test_matches_python_path_for_season_teams(self):
+        for season in (self.season, self.other):
+            rows = season_standings(season.id)
+            season_ids = {r['team_id'] for r in rows}
+            expected = compute_standings(season.id)
+            self.assertEqual(rows, [r for r in expected if r['team_id'] in season_ids])
+            # everything the SQL engine leaves out had no results in this season
+            self.assertTrue(all(r['played'] == 0 for r in expected if r['team_id'] not in season_ids))
+
+    def test_team_universe_is_season_scoped(self):
+        team_ids = {r['team_id'] for r in season_standings(self.season.id)}
+        self.assertIn(self.idle.id, team_ids)
+        self.assertNotIn(self.outsider.id, team_ids)
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class StoredStandingsTests(TestCase):
+    """TeamStanding rows follow Match writes and agree with compute_standings."""
+
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        self.other = Season.objects.create(name='2025 SENIOR BOYS CUP', start_date='2025-01-01')
+        self.home = Team.objects.create(name='Home FC')
+        self.away = Team.objects.create(name='Away FC')
+
+    def _play(self, season, home_score=2, away_score=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Match.objects.create(
+                season=season, home_team=self.home, away_team=self.away,
+                match_date=timezone.now() - timedelta(hours=3), home_score=home_score, away_score=away_score,
+            )
+
+    def _points(self, season):
+        return dict(TeamStanding.objects.filter(season=season).values_list('team_id', 'points'))
+
+    def test_rows_match_compute_standings_after_result_save(self):
+        match = self._play(self.season)
+        self.assertEqual(self._points(self.season), {self.home.id: 3, self.away.id: 0})
+        with self.captureOnCommitCallbacks(execute=True):
+            match.away_score = 2
+            match.save()
+        self.assertEqual(self._points(self.season), {self.home.id: 1, self.away.id: 1})
+        self.assertEqual(check_season_standings(self.season.id), [])
+        self.assertEqual(get_standings(self.season.id), [r for r in compute_standings(self.season.id) if r['played']])
+
+    def test_rows_follow_deleted_and_moved_matches(self):
+        moved = self._play(self.season)
+        gone = self._play(self.season, 0, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            gone.delete()
+        self.assertEqual(self._points(self.season), {self.home.id: 3, self.away.id: 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.season = self.other
+            moved.save()
+        self.assertEqual(self._points(self.season), {self.home.id: 0, self.away.id: 0})
+        self.assertEqual(self._points(self.other), {self.home.id: 3, self.away.id: 0})
+        for season in (self.season, self.other):
+            self.assertEqual(check_season_standings(season.id), [])
+
+    def test_award_updates_rows_without_a_season_rebuild(self):
+        match = self._play(self.season)
+        bystander = Team.objects.create(name='Bystander FC')
+        TeamStanding.objects.create(season=self.season, team=bystander, points=99)
+        with self.captureOnCommitCallbacks(execute=True):
+            match.awarded = True
+            match.awarded_reason = 'walkover'
+            match.awarded_to = self.away
+            match.save()
+        self.assertEqual(self._points(self.season), {self.home.id: 0, self.away.id: 3, bystander.id: 99})
+        # drift in rows the match does not touch is left to rebuild_standings
+        self.assertEqual(check_season_standings(self.season.id), [('Bystander FC', 'points', 99, 0)])
+
+    def test_check_reports_drift(self):
+        self._play(self.season)
+        TeamStanding.objects.filter(season=self.season, team=self.home).update(points=99)
+        out = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_standings', '--check', '--season', str(self.season.id), stdout=out)
+        self.assertIn('Home FC: points stored=99 expected=3', out.getvalue())
+
+        call_command('rebuild_standings', '--season', str(self.season.id), stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('rebuild_standings', '--check', '--season', str(self.season.id), stdout=out)
+        self.assertIn(f'{self.season.name}: OK', out.getvalue())
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class StandingsETagTests(TestCase):
+    """The standings endpoints answer a current If-None-Match with a bare 304."""
+
+    def setUp(self):
+        cache.clear()
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        group = Group.objects.create(name='A', category='girls', season=self.season)
+        self.teams = [Team.objects.create(name=f'Etag {i}') for i in range(3)]
+        TeamGroup.objects.bulk_create([TeamGroup(team=t, group=group, season=self.season) for t in self.teams])
+        self.match = Match.objects.create(
+            season=self.season, home_team=self.teams[0], away_team=self.teams[1],
+            match_date=timezone.now() - timedelta(hours=3), matchday=1,
+        )
+        self.client = APIClient()
+        self.urls = [f'/api/standings/{self.season.id}/', f'/api/grouped-standings/?season={self.season.id}']
+
+    def test_current_etag_is_a_304_without_touching_matches(self):
+        for in_db in (True, False):
+            with self.subTest(versions_in_db=in_db), override_settings(LEAGUE_VERSIONS_IN_DB=in_db):
+                for url in self.urls:
+                    first = self.client.get(url)
+                    self.assertEqual(first.status_code, 200)
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response['ETag'], first['ETag'])
+                    self.assertFalse([q for q in ctx.captured_queries if 'league_match' in q['sql']])
+
+    def test_group_result_bumps_the_version(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.match.home_score, self.match.away_score = 2, 0
+            self.match.save()
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['standings'][0]['points'], 3)
+
+    @override_settings(LEAGUE_VERSIONS_IN_DB=True)
+    def test_bump_from_another_process_is_seen(self):
+        etag = self.client.get(self.urls[0])['ETag']
+        # another worker's bump only reaches the shared database, not this process's cache
+        Season.objects.filter(id=self.season.id).update(results_version=F('results_version') + 1)
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(LEAGUE_VERSIONS_IN_DB=True)
+    def test_saving_a_stale_season_keeps_the_version(self):
+        stale = Season.objects.get(id=self.season.id)
+        bump_results_version(self.season.id)
+        stale.name = '2025 GIRLS CUP (renamed)'
+        stale.save()
+        self.season.refresh_from_db()
+        self.assertEqual(self.season.name, '2025 GIRLS CUP (renamed)')
+        self.assertEqual(self.season.results_version, stale.results_version + 1)
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class GroupTiebreakerTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        self.when = timezone.now() - timedelta(days=1)
+
+    def group(self, name, team_names):
+        group = Group.objects.create(name=name, category='girls', season=self.season)
+        teams = {n: Team.objects.create(name=n) for n in team_names}
+        TeamGroup.objects.bulk_create([TeamGroup(team=t, group=group, season=self.season) for t in teams.values()])
+        return teams
+
+    def play(self, home, away, hs, as_, **extra):
+        Match.objects.create(
+            season=self.season, home_team=home, away_team=away, match_date=self.when, home_score=hs, away_score=as_, **extra,
+        )
+
+    def order(self, tiebreakers, group=0):
+        table = grouped_standings_tables(self.season.id, tiebreakers)[group]['standings']
+        return [row['team_name'] for row in table]
+
+    def test_head_to_head_overrides_goal_difference(self):
+        t = self.group('A', ['Ash', 'Birch', 'Cedar', 'Dogwood'])
+        self.play(t['Ash'], t['Birch'], 1, 0)
+        self.play(t['Ash'], t['Cedar'], 0, 1)
+        self.play(t['Birch'], t['Dogwood'], 5, 0)
+        self.play(t['Cedar'], t['Dogwood'], 1, 1)
+        # Ash and Birch are level on 3 points: Birch on goal difference, Ash on their meeting
+        self.assertEqual(self.order(['goal_diff', 'goals_for']), ['Cedar', 'Birch', 'Ash', 'Dogwood'])
+        self.assertEqual(self.order(['h2h_points', 'goal_diff']), ['Cedar', 'Ash', 'Birch', 'Dogwood'])
+
+    def test_fair_play_ranks_forfeits_last(self):
+        t = self.group('A', ['Alpha', 'Gamma', 'Hotel', 'Zulu'])
+        self.play(t['Alpha'], t['Gamma'], 0, 3, awarded=True, awarded_reason='walkover', awarded_to=t['Gamma'])
+        self.play(t['Hotel'], t['Zulu'], 3, 0)
+        # level on everything: the name decides, unless Alpha's forfeit counts
+        self.assertEqual(self.order(['goal_diff', 'goals_for']), ['Gamma', 'Hotel', 'Alpha', 'Zulu'])
+        self.assertEqual(self.order(['goal_diff', 'goals_for', 'fair_play']), ['Gamma', 'Hotel', 'Zulu', 'Alpha'])
+
+    def test_unknown_tiebreaker_is_a_400(self):
+        response = APIClient().get('/api/grouped-standings/', {'season': self.season.id, 'tiebreakers': 'goal_diff,bogus'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('bogus', response.json()['error'])
+
+    def test_query_count_does_not_grow_with_groups(self):
+        counts = []
+        for names in ('AB', 'CDEFGH'):
+            for name in names:
+                t = list(self.group(name, [f'{name}{i}' for i in range(4)]).values())
+                self.play(t[0], t[1], 2, 1)
+                self.play(t[2], t[3], 1, 1)
+            with CaptureQueriesContext(connection) as ctx:
+                tables = grouped_standings_tables(self.season.id, ['h2h_points', 'goal_diff', 'fair_play'])
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(len(tables), 8)
+        self.assertEqual(counts[0], counts[1])
+
+
+class BackgroundTaskTests(TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        previous = tasks._executor
+        tasks._executor = self.executor
+        tasks._pending.clear()
+
+        def restore():
+            self.executor.shutdown(wait=True)
+            tasks._executor = previous
+        self.addCleanup(restore)
+
+    def test_waiting_key_is_queued_once(self):
+        gate = threading.Event()
+        calls = []
+        # keep both workers busy so the season jobs stay pending
+        tasks.enqueue(('block', 1), gate.wait)
+        tasks.enqueue(('block', 2), gate.wait)
+        for _ in range(3):
+            tasks.enqueue(('standings', 1), lambda: calls.append(1))
+        tasks.enqueue(('standings', 2), lambda: calls.append(2))
+        gate.set()
+        self.executor.shutdown(wait=True)
+        self.assertEqual(sorted(calls), [1, 2])
+
+    def test_started_key_queues_again_but_never_overlaps(self):
+        started, gate = threading.Event(), threading.Event()
+        log = []
+
+        def first():
+            started.set()
+            gate.wait()
+            log.append('first done')
+
+        tasks.enqueue(('standings', 1), first)
+        started.wait(5)
+        # a save after the run began needs a fresh run, which waits for the first one
+        tasks.enqueue(('standings', 1), lambda: log.append('second'))
+        gate.set()
+        self.executor.shutdown(wait=True)
+        self.assertEqual(log, ['first done', 'second'])
+
+    @override_settings(LEAGUE_TASKS_INLINE=True)
+    def test_inline_runs_now_and_logs_failures(self):
+        calls = []
+        tasks.enqueue(('standings', 1), lambda: calls.append(1))
+        self.assertEqual(calls, [1])
+        with self.assertLogs('league.tasks', 'ERROR'):
+            tasks.enqueue(('standings', 1), lambda: 1 / 0)
+
+    @override_settings(LEAGUE_TASKS_INLINE=True)
+    def test_nothing_runs_before_commit(self):
+        calls = []
+        with self.captureOnCommitCallbacks() as callbacks:
+            tasks.enqueue_on_commit(('standings', 1), lambda: calls.append(1))
+            try:
+                with transaction.atomic():
+                    tasks.enqueue_on_commit(('standings', 2), lambda: calls.append(2))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self.assertEqual(calls, [])
+        # the rolled-back block's job is dropped
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(calls, [1])
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class StandingsSnapshotTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        self.teams = [Team.objects.create(name=f'Round {i}') for i in range(4)]
+        self.when = timezone.now() - timedelta(days=5)
+        t = self.teams
+        self.md1 = [self.play(1, t[0], t[1], 2, 0), self.play(1, t[2], t[3], 1, 1)]
+        self.md2 = [self.play(2, t[0], t[2], 0, 1), self.play(2, t[1], t[3], 3, 0)]
+        self.client = APIClient()
+
+    def play(self, matchday, home, away, hs, as_, when=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Match.objects.create(
+                season=self.season, home_team=home, away_team=away, matchday=matchday,
+                match_date=when or self.when, home_score=hs, away_score=as_,
+            )
+
+    def as_of(self, matchday):
+        response = self.client.get(f'/api/standings/{self.season.id}/matchday/{matchday}/')
+        return response.status_code, response.json()
+
+    def points(self, matchday):
+        status_code, body = self.as_of(matchday)
+        self.assertEqual(status_code, 200)
+        return {row['team_name']: row['points'] for row in body['standings']}
+
+    def test_as_of_endpoint(self):
+        self.assertEqual(self.points(1), {'Round 0': 3, 'Round 1': 0, 'Round 2': 1, 'Round 3': 1})
+        self.assertEqual(self.points(2), {'Round 0': 3, 'Round 1': 3, 'Round 2': 4, 'Round 3': 1})
+        # the latest completed matchday is the live table
+        self.assertEqual(self.as_of(2)[1]['standings'], get_standings(self.season.id))
+        self.assertEqual(self.as_of(3)[0], 404)
+
+    def test_result_correction_invalidates_from_its_matchday(self):
+        self.points(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.md1[0].home_score = 0
+            self.md1[0].save()
+        self.assertEqual(self.points(1)['Round 0'], 1)
+        self.assertEqual(self.points(2)['Round 0'], 1)
+
+    def test_build_resumes_from_the_newest_kept_snapshot(self):
+        self.points(2)
+        # mark the matchday 1 table so a rebuild of matchday 2 shows whether it started from it
+        snapshot = StandingsSnapshot.objects.get(season=self.season, matchday=1)
+        snapshot.table = [[row[0]] + row[1:-1] + [row[-1] + 100] for row in snapshot.table]
+        snapshot.save()
+        invalidate_snapshots(self.season.id, 2)
+        self.assertEqual(build_snapshots(self.season.id), 1)
+        self.assertEqual(self.points(2), {'Round 0': 103, 'Round 1': 103, 'Round 2': 104, 'Round 3': 101})
+
+    def test_rematch_after_the_base_snapshot_replaces_the_earlier_result(self):
+        self.points(2)
+        # the same fixture is played again later: only the latest meeting counts
+        self.play(3, self.teams[0], self.teams[1], 1, 1, when=self.when + timedelta(days=1))
+        self.assertEqual(self.points(3), {'Round 0': 1, 'Round 1': 4, 'Round 2': 4, 'Round 3': 1})
+        self.assertEqual(self.as_of(3)[1]['standings'], get_standings(self.season.id))
+
+    def test_results_without_matchday_are_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Match.objects.create(
+                season=self.season, home_team=self.teams[0], away_team=self.teams[3],
+                match_date=self.when, home_score=1, away_score=0,
+            )
+        status_code, body = self.as_of(1)
+        self.assertEqual(status_code, 409)
+        self.assertIn('no matchday', body['error'])
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class StandingsBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.seasons = []
+        for i in range(5):
+            season = Season.objects.create(name=f'Batch {i}', start_date='2025-01-01', category='girls')
+            group = Group.objects.create(name='A', category='girls', season=season)
+            home, away = (Team.objects.create(name=f'Batch {i} {side}') for side in 'HA')
+            TeamGroup.objects.bulk_create([TeamGroup(team=t, group=group, season=season) for t in (home, away)])
+            Match.objects.create(
+                season=season, home_team=home, away_team=away, matchday=1,
+                match_date=timezone.now() - timedelta(days=1), home_score=1, away_score=0,
+            )
+            self.seasons.append(season)
+
+    def get(self, seasons, etag=None, **params):
+        params['seasons'] = ','.join(str(s) for s in seasons)
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/api/standings/batch/', params, **headers)
+
+    def test_query_count_does_not_grow_with_seasons(self):
+        counts = []
+        for seasons in (self.seasons[:2], self.seasons):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.get([s.id for s in seasons], groups='1')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()), len(seasons))
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(response.json()[4]['groups'][0]['standings'][0]['team_name'], 'Batch 4 H')
+
+    def test_unknown_and_invalid_ids(self):
+        response = self.get([self.seasons[0].id, 999999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['season']['id'] for item in response.json()], [self.seasons[0].id])
+        self.assertEqual(self.get(['x']).status_code, 400)
+        self.assertEqual(self.client.get('/api/standings/batch/').status_code, 400)
+
+    def test_etag_changes_when_any_listed_season_bumps(self):
+        ids = [s.id for s in self.seasons[:3]]
+        etag = self.get(ids)['ETag']
+        self.assertEqual(self.get(ids, etag).status_code, 304)
+        # a season that is not listed does not matter
+        bump_results_version(self.seasons[4].id)
+        self.assertEqual(self.get(ids, etag).status_code, 304)
+        bump_results_version(self.seasons[1].id)
+        response = self.get(ids, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class LiveScoreBroadcastTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        self.match = Match.objects.create(
+            season=self.season,
+            home_team=Team.objects.create(name='Home FC'),
+            away_team=Team.objects.create(name='Away FC'),
+            match_date=timezone.now() - timedelta(minutes=30),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('editor', password='x'))
+
+    def _subscribe(self, group):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(group, channel)
+        return lambda: async_to_sync(layer.receive)(channel)['data']
+
+    def test_set_result_reaches_season_and_match_groups(self):
+        receivers = [self._subscribe(season_group(self.season.id)), self._subscribe(match_group(self.match.id))]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/matches/{self.match.id}/set_result/', {'home_score': 2, 'away_score': 1, 'period': '2nd_half'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        for receive in receivers:
+            delta = receive()
+            self.assertEqual(delta['event'], 'score')
+            self.assertEqual(delta['match'], self.match.id)
+            self.assertEqual((delta['home_score'], delta['away_score'], delta['period']), (2, 1, '2nd_half'))
+
+    def test_broadcast_waits_for_commit(self):
+        receive = self._subscribe(match_group(self.match.id))
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.client.post(f'/api/matches/{self.match.id}/set_period/', {'period': 'halftime'}, format='json')
+        live = [cb for cb in callbacks if getattr(cb, '__module__', '') == 'league.live']
+        self.assertEqual(len(live), 1)
+        live[0]()
+        delta = receive()
+        self.assertEqual((delta['event'], delta['period']), ('period', 'halftime'))
+
+    def test_consumers_join_the_broadcast_groups(self):
+        for consumer_class, kwargs, group in (
+            (LiveSeasonConsumer, {'season_id': self.season.id}, season_group(self.season.id)),
+            (LiveMatchConsumer, {'match_id': self.match.id}, match_group(self.match.id)),
+        ):
+            consumer = consumer_class()
+            consumer.scope = {'url_route': {'kwargs': kwargs}}
+            self.assertEqual(consumer.get_group(), group)
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True, LEAGUE_CHANGE_FEED_LAG=0)
+class MatchChangeFeedTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        self.other = Season.objects.create(name='2025 SENIOR BOYS CUP', start_date='2025-01-01')
+        self.home = Team.objects.create(name='Home FC')
+        self.away = Team.objects.create(name='Away FC')
+        self.client = APIClient()
+
+    def _match(self, season):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Match.objects.create(season=season, home_team=self.home, away_team=self.away, match_date=timezone.now())
+
+    def _save(self, match, **values):
+        for field, value in values.items():
+            setattr(match, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            match.save()
+
+    def _feed(self, since, **params):
+        response = self.client.get('/api/matches/changes/', {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_changes_after_cursor_collapse_per_match(self):
+        kept = self._match(self.season)
+        gone = self._match(self.season)
+        cursor = self._feed(0)['cursor']
+
+        self._save(kept, home_score=1)
+        self._save(kept, away_score=2)
+        gone_id = gone.id
+        with self.captureOnCommitCallbacks(execute=True):
+            gone.delete()
+        untouched = self._match(self.other)
+
+        feed = self._feed(cursor)
+        self.assertEqual([m['id'] for m in feed['changed']], [kept.id, untouched.id])
+        self.assertEqual(feed['changed'][0]['away_score'], 2)
+        self.assertEqual(feed['deleted'], [gone_id])
+        self.assertFalse(feed['has_more'])
+        self.assertEqual(self._feed(feed['cursor']), {'cursor': feed['cursor'], 'changed': [], 'deleted': [], 'has_more': False})
+
+    def test_season_filter_and_move_leaves_tombstone(self):
+        match = self._match(self.season)
+        cursor = self._feed(0)['cursor']
+        self._save(match, season=self.other)
+        self.assertEqual(self._feed(cursor, season=self.season.id)['deleted'], [match.id])
+        self.assertEqual([m['id'] for m in self._feed(cursor, season=self.other.id)['changed']], [match.id])
+        # unfiltered, the latest entry wins
+        feed = self._feed(cursor)
+        self.assertEqual(([m['id'] for m in feed['changed']], feed['deleted']), ([match.id], []))
+
+    def test_limit_pages_through_log(self):
+        for _ in range(3):
+            self._match(self.season)
+        first = self._feed(0, limit=2)
+        self.assertTrue(first['has_more'])
+        second = self._feed(first['cursor'], limit=2)
+        self.assertFalse(second['has_more'])
+        self.assertEqual(len(first['changed']) + len(second['changed']), 3)
+
+    def test_change_committed_after_a_poll_is_not_skipped(self):
+        slow = self._match(self.season)
+        fast = self._match(self.season)
+        cursor = self._feed(0)['cursor']
+
+        # a long transaction edits `slow`: nothing is logged before it commits...
+        with self.captureOnCommitCallbacks(execute=True):
+            slow.home_score = 1
+            slow.save()
+            self.assertFalse(MatchChange.objects.filter(id__gt=cursor, match_id=slow.id).exists())
+            # ...so a change another transaction commits meanwhile takes the next id
+            MatchChange.objects.create(match_id=fast.id, season_id=self.season.id)
+            polled = self._feed(cursor)
+            self.assertEqual([m['id'] for m in polled['changed']], [fast.id])
+        # the slow transaction's entry lands after the cursor the poller holds
+        self.assertIn(slow.id, [m['id'] for m in self._feed(polled['cursor'])['changed']])
+
+    @override_settings(LEAGUE_CHANGE_FEED_LAG=60)
+    def test_cursor_held_back_behind_recent_rows(self):
+        cursor = self._feed(0)['cursor']
+        self._match(self.season)
+        feed = self._feed(cursor)
+        self.assertEqual((feed['cursor'], feed['changed']), (cursor, []))
+        MatchChange.objects.update(changed_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(len(self._feed(cursor)['changed']), 1)
+
+
+class MatchListQueryCountTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        group = Group.objects.create(name='A', category='girls', season=self.season)
+        self.members = [Team.objects.create(name=f'Member {i}') for i in range(4)]
+        for team in self.members:
+            TeamGroup.objects.create(team=team, group=group, season=self.season)
+        self.guest = Team.objects.create(name='Guest FC')
+        self.client = APIClient()
+
+    def _add_matches(self, count):
+        now = timezone.now()
+        for i in range(count):
+            home, away = self.members[i % 4], self.members[(i + 1) % 4]
+            if i % 3 == 0:
+                away = self.guest
+            Match.objects.create(season=self.season, home_team=home, away_team=away, match_date=now, matchday=1 + i % 3)
+        Match.objects.create(season=self.season, home_team=self.members[0], away_team=self.members[1], match_date=now, matchday=26)
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/matches/', {'season': self.season.id})
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_matches(self):
+        self._add_matches(3)
+        _, small = self._list_queries()
+        self._add_matches(30)
+        data, large = self._list_queries()
+        self.assertEqual(len(data), 35)
+        self.assertEqual(small, large)
+        # matches, group memberships, bracket slots
+        self.assertLessEqual(large, 3)
+
+    def test_match_stage_matches_per_instance_lookup(self):
+        self._add_matches(6)
+        data, _ = self._list_queries()
+        matches = Match.objects.in_bulk([m['id'] for m in data])
+        self.assertEqual({m['match_stage'] for m in data}, {'Group Stage', 'Knockout', 'Semifinal'})
+        for item in data:
+            self.assertEqual(item['match_stage'], matches[item['id']].get_match_stage())
+
+
+class SideloadedMatchListTests(TestCase):
+    def test_sideload_matches_nested_format(self):
+        season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        teams = [Team.objects.create(name=f'Team {i}') for i in range(3)]
+        for home, away in ((0, 1), (1, 2), (2, 0)):
+            Match.objects.create(season=season, home_team=teams[home], away_team=teams[away], match_date=timezone.now(), matchday=1)
+        client = APIClient()
+        nested = client.get('/api/matches/', {'season': season.id}).json()
+        flat = client.get('/api/matches/', {'season': season.id, 'sideload': '1'}).json()
+
+        self.assertEqual(len(flat['teams']), 3)
+        self.assertEqual(list(flat['seasons']), [str(season.id)])
+        for full, compact in zip(nested, flat['matches']):
+            rebuilt = dict(compact)
+            rebuilt['home_team'] = flat['teams'][str(compact['home_team'])]
+            rebuilt['away_team'] = flat['teams'][str(compact['away_team'])]
+            rebuilt['season'] = flat['seasons'][str(compact['season'])]
+            self.assertEqual(rebuilt, full)
+
+
+class MatchPaginationTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        teams = [Team.objects.create(name=f'Team {i}') for i in range(2)]
+        now = timezone.now()
+        self.matches = []
+        for i in range(12):
+            self.matches.append(Match.objects.create(
+                season=self.season, home_team=teams[0], away_team=teams[1],
+                # mix of NULL and repeated matchdays with tied kickoff times
+                matchday=None if i < 3 else i // 3,
+                match_date=now + timedelta(days=i % 4 - 2),
+                home_score=1 if i % 2 else None, away_score=0 if i % 2 else None,
+            ))
+        self.client = APIClient()
+
+    def _walk(self, url, params):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            ids.extend(m['id'] for m in body['results'])
+            if not body['next']:
+                return ids
+            response = self.client.get(body['next'])
+
+    def test_pages_follow_matchday_date_id_order(self):
+        expected = [m['id'] for m in self.client.get('/api/matches/', {'season': self.season.id}).json()]
+        walked = self._walk('/api/matches/', {'season': self.season.id, 'page_size': 5})
+        nulls_last = connection.features.nulls_order_largest
+        by_key = sorted(self.matches, key=lambda m: ((m.matchday is None) == nulls_last, m.matchday or 0, m.match_date, m.id))
+        self.assertEqual(walked, [m.id for m in by_key])
+        self.assertEqual(sorted(walked), sorted(expected))
+
+    def test_upcoming_and_recent(self):
+        today = timezone.localdate()
+        upcoming = self._walk('/api/matches/upcoming/', {'page_size': 2})
+        recent = self._walk('/api/matches/recent/', {'page_size': 2})
+        for mid in upcoming:
+            m = Match.objects.get(pk=mid)
+            self.assertFalse(m.is_played)
+            self.assertGreaterEqual(timezone.localtime(m.match_date).date(), today)
+        dates = [Match.objects.get(pk=mid).match_date for mid in recent]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        played = Match.objects.filter(is_played=True, match_date__lte=timezone.now())
+        self.assertEqual(set(recent), set(played.values_list('id', flat=True)))
+
+    def test_date_range_and_bad_input(self):
+        day = timezone.localtime(self.matches[0].match_date).date()
+        data = self.client.get('/api/matches/', {'from': day.isoformat(), 'to': day.isoformat()}).json()
+        self.assertEqual(
+            {m['id'] for m in data},
+            {m.id for m in self.matches if timezone.localtime(m.match_date).date() == day},
+        )
+        self.assertEqual(self.client.get('/api/matches/', {'from': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/matches/', {'cursor': 'garbage'}).status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        group = Group.objects.create(name='A', category='girls', season=self.season)
+        teams = [Team.objects.create(name=f'Team {i}') for i in range(2)]
+        for team in teams:
+            TeamGroup.objects.create(team=team, group=group, season=self.season)
+        Match.objects.create(season=self.season, home_team=teams[0], away_team=teams[1], match_date=timezone.now(), matchday=1)
+        self.client = APIClient()
+
+    def test_fields_and_omit_trim_payload_and_columns(self):
+        full = self.client.get('/api/matches/').json()[0]
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get('/api/matches/', {'fields': 'id,home_score,away_score,match_stage'}).json()
+        self.assertEqual(data, [{k: full[k] for k in ('id', 'home_score', 'away_score', 'match_stage')}])
+        match_sql = ctx.captured_queries[0]['sql']
+        self.assertNotIn('manual_finished_by', match_sql)
+        self.assertNotIn('league_team', match_sql)
+
+        omitted = self.client.get('/api/matches/', {'omit': 'season,awarded_by'}).json()[0]
+        self.assertEqual(omitted, {k: v for k, v in full.items() if k not in ('season', 'awarded_by')})
+
+    def test_other_serializers_and_unknown_field(self):
+        self.assertEqual(self.client.get('/api/teams/', {'fields': 'name'}).json(), [{'name': 'Team 0'}, {'name': 'Team 1'}])
+        seasons = self.client.get('/api/seasons/', {'fields': 'id,category'}).json()
+        self.assertIn({'id': self.season.id, 'category': 'girls'}, seasons)
+        self.assertTrue(all(set(s) == {'id', 'category'} for s in seasons))
+        self.assertEqual(self.client.get('/api/news/', {'omit': 'content'}).status_code, 200)
+        self.assertEqual(self.client.get('/api/teams/', {'fields': 'nope'}).status_code, 400)
+
+
+class RendererTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP \u2028 Élite', start_date='2025-01-01', category='girls')
+        group = Group.objects.create(name='A', category='girls', season=self.season)
+        teams = [Team.objects.create(name=name) for name in ('Ürümqi "Stars"', 'Tab\tFC\x01', 'Plain')]
+        for team in teams:
+            TeamGroup.objects.create(team=team, group=group, season=self.season)
+        Match.objects.create(season=self.season, home_team=teams[0], away_team=teams[1], match_date=timezone.now(), home_score=2, away_score=1)
+        Match.objects.create(season=self.season, home_team=teams[1], away_team=teams[2], match_date=timezone.now(), matchday=1)
+        self.client = APIClient()
+
+    def test_fast_json_is_byte_compatible(self):
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import FastJSONRenderer
+
+        payloads = [
+            self.client.get('/api/matches/', {'season': self.season.id}).json(),
+            self.client.get('/api/grouped-standings/', {'season': self.season.id}).json(),
+            {1: 'int key', 'when': timezone.now(), 'amount': Decimal('1.50'), 'nested': [None, True, 1.5, ' ']},
+        ]
+        for data in payloads:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(payloads[0], 'application/json; indent=2'),
+            JSONRenderer().render(payloads[0], 'application/json; indent=2'),
+        )
+
+    def test_msgpack_negotiation(self):
+        import msgpack
+
+        as_json = self.client.get('/api/matches/', {'season': self.season.id})
+        packed = self.client.get('/api/matches/', {'season': self.season.id}, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(packed.content), as_json.json())
+        self.assertEqual(as_json['Content-Type'], 'application/json')
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class BulkResultsTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        group = Group.objects.create(name='A', category='girls', season=self.season)
+        self.teams = [Team.objects.create(name=f'Team {i}') for i in range(4)]
+        for team in self.teams:
+            TeamGroup.objects.create(team=team, group=group, season=self.season)
+        start = timezone.now() - timedelta(hours=2)
+        self.matches = [
+            Match.objects.create(season=self.season, home_team=self.teams[h], away_team=self.teams[a], match_date=start, matchday=1)
+            for h, a in ((0, 1), (2, 3), (0, 2))
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('editor', password='x'))
+
+    def _post(self, results):
+        return self.client.post('/api/matches/bulk-results/', {'results': results}, format='json')
+
+    def test_batch_is_applied_once_and_standings_follow(self):
+        m1, m2, m3 = self.matches
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self._post([
+                    {'id': m1.id, 'home_score': 2, 'away_score': 0, 'finished': True},
+                    {'id': m2.id, 'home_score': 1, 'away_score': 1, 'finished': True},
+                    {'id': m3.id, 'period': 'halftime'},
+                ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 3)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "league_match"')]
+        self.assertEqual(len(updates), 2)
+
+        m3.refresh_from_db()
+        self.assertEqual((m3.current_period, m3.is_played), ('halftime', False))
+        self.assertTrue(Match.objects.get(pk=m1.pk).is_played)
+        self.assertEqual(get_standings(self.season.id), season_standings(self.season.id))
+        self.assertEqual(get_standings(self.season.id)[0]['team_id'], self.teams[0].id)
+
+    def test_invalid_entry_rejects_whole_batch(self):
+        m1, m2, _ = self.matches
+        response = self._post([
+            {'id': m1.id, 'home_score': 3, 'away_score': 1},
+            {'id': m2.id, 'home_score': 1},
+            {'id': m2.id, 'period': 'overtime'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['index'] for e in response.json()['results']], [1, 2])
+        m1.refresh_from_db()
+        self.assertIsNone(m1.home_score)
+        self.assertEqual(self._post([{'id': 999999, 'period': 'halftime'}]).status_code, 400)
+
+    def test_scores_must_be_integers_or_digit_strings(self):
+        m1 = self.matches[0]
+        for bad in (2.7, True, '1_0', '-1'):
+            response = self._post([{'id': m1.id, 'home_score': bad, 'away_score': 0}])
+            self.assertEqual(response.status_code, 400, bad)
+        self.assertEqual(self._post([{'id': m1.id, 'home_score': '2', 'away_score': 0}]).status_code, 200)
+        m1.refresh_from_db()
+        self.assertEqual((m1.home_score, m1.away_score), (2, 0))
+
+    def test_period_only_batch_skips_standings_work(self):
+        m1 = self.matches[0]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post([{'id': m1.id, 'period': 'halftime'}])
+        self.assertEqual(response.status_code, 200)
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('league_teamstanding', sql)
+        self.assertNotIn('league_standingssnapshot', sql)
+
+    def test_requires_results_editor(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self._post([{'id': self.matches[0].id, 'period': 'halftime'}]).status_code, (401, 403))
+
+
+class MatchChangeTrackingTests(TestCase):
+    def setUp(self):
+        season = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        self.match = Match.objects.create(
+            season=season, home_team=Team.objects.create(name='Home FC'), away_team=Team.objects.create(name='Away FC'),
+            match_date=timezone.now() - timedelta(hours=1), matchday=3,
+        )
+
+    def test_dirty_fields_follow_load_and_save(self):
+        match = Match.objects.get(pk=self.match.pk)
+        self.assertEqual(match.get_dirty_fields(), {})
+        match.home_score = 2
+        self.assertEqual(match.get_dirty_fields(), {'home_score': None})
+        match.save()
+        self.assertEqual(match.get_dirty_fields(), {})
+        self.assertEqual(match.loaded_value('home_score'), 2)
+
+    def test_period_change_saves_without_lookups_or_standings_work(self):
+        match = Match.objects.get(pk=self.match.pk)
+        match.current_period = 'halftime'
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            match.save()
+        tables = [q['sql'].split()[0] + ' ' + q['sql'].split('"')[1] for q in ctx.captured_queries if '"' in q['sql']]
+        self.assertEqual(tables, ['UPDATE league_match', 'INSERT league_matchchange'])
+
+    def test_score_change_is_seen_by_signals(self):
+        match = Match.objects.get(pk=self.match.pk)
+        match.home_score, match.away_score = 1, 0
+        with CaptureQueriesContext(connection) as ctx:
+            match.save()
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('FROM "league_match" WHERE "league_match"."id" =', sql)
+        self.assertIn('league_teamstanding', sql)
+        self.assertEqual(get_standings(match.season_id)[0]['points'], 3)
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class BracketProgressionTests(TestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name='2025 JUNIOR BOYS CUP', start_date='2025-01-01', category='junior_boys')
+        self.qualifiers = [Team.objects.create(name=f'Qualifier {i}') for i in range(8)]
+        self.matches = {}
+        start = timezone.now() + timedelta(days=1)
+        for matchday, home_tok, away_tok in STANDARD_BRACKET:
+            if matchday <= 25:
+                home, away = self.qualifiers[2 * (matchday - 22)], self.qualifiers[2 * (matchday - 22) + 1]
+            else:
+                home, away = placeholder_team(home_tok), placeholder_team(away_tok)
+            self.matches[matchday] = Match.objects.create(
+                season=self.season, home_team=home, away_team=away,
+                match_date=start + timedelta(days=matchday), matchday=matchday,
+            )
+        link_bracket(self.season.id)
+
+    def play(self, matchday, home_score, away_score, **extra):
+        match = Match.objects.get(pk=self.matches[matchday].pk)
+        match.home_score, match.away_score, match.is_played = home_score, away_score, True
+        for field, value in extra.items():
+            setattr(match, field, value)
+        match.save()
+        return match
+
+    def test_results_fill_dependent_slots(self):
+        self.play(22, 2, 0)
+        self.play(23, 1, 1, penalty_home=3, penalty_away=4)
+        sf1 = Match.objects.get(pk=self.matches[26].pk)
+        self.assertEqual((sf1.home_team, sf1.away_team), (self.qualifiers[0], self.qualifiers[3]))
+
+        self.play(26, 0, 1)
+        third = Match.objects.get(pk=self.matches[28].pk)
+        final = Match.objects.get(pk=self.matches[29].pk)
+        self.assertEqual(third.home_team, self.qualifiers[0])
+        self.assertEqual(final.home_team, self.qualifiers[3])
+
+    def test_placeholders_survive_and_other_seasons_are_untouched(self):
+        other = Season.objects.create(name='2025 GIRLS CUP', start_date='2025-01-01', category='girls')
+        placeholder = placeholder_team('WINNER 22')
+        elsewhere = Match.objects.create(
+            season=other, home_team=placeholder, away_team=self.qualifiers[7],
+            match_date=timezone.now(), matchday=26,
+        )
+        self.play(22, 2, 0)
+        self.assertTrue(Team.objects.filter(pk=placeholder.pk).exists())
+        self.assertEqual(Match.objects.get(pk=elsewhere.pk).home_team, placeholder)
+
+    def test_populate_next_stage_uses_slots(self):
+        Match.objects.filter(pk=self.matches[24].pk).update(home_score=0, away_score=3, is_played=True)
+        call_command('populate_next_stage', season=self.season.id, stdout=io.StringIO())
+        self.assertEqual(Match.objects.get(pk=self.matches[27].pk).home_team, self.qualifiers[5])
+
+    def test_quarter_final_result_costs_fixed_queries(self):
+        match = Match.objects.get(pk=self.matches[22].pk)
+        match.home_score, match.away_score, match.is_played = 2, 0, True
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks() as callbacks:
+            match.save()
+        with CaptureQueriesContext(connection) as after_commit:
+            for callback in callbacks:
+                callback()
+
+        def tables(queries):
+            sql = [q['sql'] for q in queries if 'SAVEPOINT' not in q['sql']]
+            return [q.split()[0] + ' ' + re.search(r'(?:FROM|INTO|UPDATE) "(\w+)"', q).group(1) for q in sql]
+
+        # every post_save receiver counts: the row itself, the two teams'
+        # standings, the snapshot invalidation, one read of the fed slots and
+        # one bulk write of the dependents, then the bracket-membership check
+        # that invalidates the cached tree
+        self.assertEqual(tables(ctx.captured_queries), [
+            'UPDATE league_match',
+            'SELECT league_match', 'SELECT league_match',
+            'SELECT league_teamstanding', 'UPDATE league_teamstanding',
+            'DELETE league_standingssnapshot',
+            'SELECT league_bracketslot', 'UPDATE league_match', 'SELECT league_bracketslot',
+        ])
+        # change-feed rows, version bumps and the snapshot rebuild wait for the commit
+        self.assertEqual(len(tables(after_commit.captured_queries)), 12)
+        self.assertEqual(Match.objects.get(pk=self.matches[26].pk).home_team, self.qualifiers[0])
+
+    def test_bracket_tree_endpoint(self):
+        client = APIClient()
+        cache.clear()
+        response = client.get(f'/api/bracket/{self.season.id}/')
+        self.assertEqual(response.status_code, 200)
+        rounds = response.json()['rounds']
+        self.assertEqual([r['name'] for r in rounds], ['Quarterfinal', 'Semifinal', 'Final', 'Third Place'])
+        self.assertEqual([len(r['matches']) for r in rounds], [4, 2, 1, 1])
+        sf1 = rounds[1]['matches'][0]
+        self.assertEqual(sf1['home']['label'], 'WINNER 22')
+        self.assertTrue(sf1['home']['placeholder'])
+        self.assertEqual(sf1['home']['source_match_id'], self.matches[22].pk)
+        self.assertEqual(rounds[0]['matches'][0]['feeds'], [{'match_id': self.matches[26].pk, 'side': 'home', 'outcome': 'winner'}])
+        listed = client.get(f'/api/matches/{self.matches[26].pk}/').json()
+        self.assertEqual(sf1['match_date'], listed['match_date'])
+
+        etag = response['ETag']
+        self.assertEqual(client.get(f'/api/bracket/{self.season.id}/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_bracket_version_moves_only_with_knockout_matches(self):
+        client = APIClient()
+        url = f'/api/bracket/{self.season.id}/'
+        etag = client.get(url)['ETag']
+        group_match = Match.objects.create(
+            season=self.season, home_team=self.qualifiers[0], away_team=self.qualifiers[1],
+            match_date=timezone.now() - timedelta(days=3), matchday=1,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            group_match.home_score, group_match.away_score = 1, 0
+            group_match.save()
+        self.assertEqual(client.get(url)['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.play(22, 2, 0)
+        response = client.get(url)
+        self.assertNotEqual(response['ETag'], etag)
+        sf1 = response.json()['rounds'][1]['matches'][0]
+        self.assertEqual((sf1['home']['team_name'], sf1['home']['placeholder']), ('Qualifier 0', False))
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class PartialBracketLinkTests(TestCase):
+    """Seasons laid out by ensure_snr_knockouts (26-29) or add_junior_placeholders (28/29)."""
+
+    def make_knockouts(self, name, category, matchdays):
+        season = Season.objects.create(name=name, start_date='2025-01-01', category=category)
+        teams = [Team.objects.create(name=f'{name} {i}') for i in range(4)]
+        start = timezone.now() + timedelta(days=1)
+        tokens = {md: (home, away) for md, home, away in STANDARD_BRACKET}
+        for i, matchday in enumerate(matchdays):
+            if matchday in (26, 27):
+                home, away = teams[2 * (matchday - 26)], teams[2 * (matchday - 26) + 1]
+            else:
+                home, away = (placeholder_team(token) for token in tokens[matchday])
+            Match.objects.create(season=season, home_team=home, away_team=away, matchday=matchday,
+                                 match_date=start + timedelta(days=i))
+        return season, teams
+
+    def play(self, season, matchday, home_score, away_score):
+        match = Match.objects.get(season=season, matchday=matchday)
+        match.home_score, match.away_score, match.is_played = home_score, away_score, True
+        with self.captureOnCommitCallbacks(execute=True):
+            match.save()
+
+    def test_migration_links_partial_layouts(self):
+        senior, teams = self.make_knockouts('2024 SENIOR BOYS CUP', 'senior_boys', [26, 27, 28, 29])
+        junior, _ = self.make_knockouts('2024 JUNIOR BOYS CUP', 'junior_boys', [28, 29])
+        migration = importlib.import_module('league.migrations.0021_bracketslot')
+        migration.link_existing_brackets(apps, None)
+
+        self.assertEqual(BracketSlot.objects.filter(season=senior).count(), 8)
+        sources = dict(
+            BracketSlot.objects.filter(season=senior, side='home').values_list('match__matchday', 'source_match__matchday')
+        )
+        self.assertEqual(sources, {26: None, 27: None, 28: 26, 29: 26})
+        self.assertEqual(
+            list(BracketSlot.objects.filter(season=junior).values_list('source_match', flat=True)), [None] * 4,
+        )
+
+        self.play(senior, 26, 0, 2)
+        self.assertEqual(Match.objects.get(season=senior, matchday=29).home_team, teams[1])
+        self.assertEqual(Match.objects.get(season=senior, matchday=28).home_team, teams[0])
+
+    def test_bracket_tree_of_a_final_and_third_place_only_season(self):
+        season, _ = self.make_knockouts('2025 JUNIOR BOYS CUP', 'junior_boys', [28, 29])
+        cache.clear()
+        self.assertEqual(APIClient().get(f'/api/bracket/{season.id}/').json()['rounds'], [])
+
+        link_bracket(season.id, [row for row in STANDARD_BRACKET if row[0] in (28, 29)])
+        cache.clear()
+        rounds = APIClient().get(f'/api/bracket/{season.id}/').json()['rounds']
+        self.assertEqual([(r['name'], [m['matchday'] for m in r['matches']]) for r in rounds],
+                         [('Final', [29]), ('Third Place', [28])])
+        self.assertEqual(rounds[0]['matches'][0]['home']['label'], 'WINNER 26')
+
+    def test_add_junior_placeholders_links_the_final(self):
+        season, teams = self.make_knockouts('2025 JUNIOR BOYS CUP', 'junior_boys', [26, 27])
+        call_command('add_junior_placeholders', stdout=io.StringIO())
+        self.assertEqual(
+            set(BracketSlot.objects.filter(season=season).values_list('match__matchday', 'side', 'source_match__matchday')),
+            {(28, 'home', 26), (28, 'away', 27), (29, 'home', 26), (29, 'away', 27)},
+        )
+        self.play(season, 27, 3, 1)
+        self.assertEqual(Match.objects.get(season=season, matchday=29).away_team, teams[2])
+
+
+class BracketGeneratorTests(TestCase):
+    def make_season(self, groups, name='2025 SENIOR BOYS CUP'):
+        season = Season.objects.create(name=name, start_date='2025-01-01', category='senior_boys')
+        start = timezone.now() - timedelta(days=30)
+        matches = []
+        self.winners = {}
+        for g in range(groups):
+            group = Group.objects.create(name='ABCDEFGH'[g], category='senior_boys', season=season)
+            teams = [Team.objects.create(name=f'{name} {group.name}{t}') for t in range(4)]
+            TeamGroup.objects.bulk_create([TeamGroup(team=t, group=group, season=season) for t in teams])
+            # lower index always wins, so team 0 tops the group and team 1 is runner-up
+            for i, home in enumerate(teams):
+                for away in teams[i + 1:]:
+                    matches.append(Match(
+                        season=season, home_team=home, away_team=away, match_date=start,
+                        matchday=1 + len(matches) % 6, home_score=2, away_score=0, is_played=True,
+                    ))
+            self.winners[group.name] = teams[:2]
+        Match.objects.bulk_create(matches)
+        rebuild_season_standings(season.id)
+        return season
+
+    def test_eight_team_cross_bracket(self):
+        season = self.make_season(4)
+        diff = generate_bracket(season, start=datetime(2025, 12, 2, 14, 0))
+        self.assertEqual([row['action'] for row in diff], ['create'] * 8)
+        qf1 = Match.objects.get(season=season, matchday=22)
+        self.assertEqual((qf1.home_team, qf1.away_team), (self.winners['A'][0], self.winners['B'][1]))
+        self.assertEqual(Match.objects.get(season=season, matchday=28).home_team.name, 'LOSER 26 (placeholder)')
+        self.assertEqual(BracketSlot.objects.filter(season=season).count(), 16)
+        self.assertEqual(
+            list(BracketSlot.objects.filter(season=season, match__matchday=29).values_list('source_match__matchday', flat=True)),
+            [26, 27],
+        )
+
+        # a second run is a no-op diff; a dry run writes nothing
+        self.assertEqual({row['action'] for row in generate_bracket(season, dry_run=True)}, {'keep'})
+
+    @override_settings(LEAGUE_TASKS_INLINE=True)
+    def test_regenerating_after_a_result_keeps_progression(self):
+        season = self.make_season(4)
+        generate_bracket(season, start=datetime(2025, 12, 2, 14, 0))
+        qf1 = Match.objects.get(season=season, matchday=22)
+        qf1.home_score, qf1.away_score, qf1.is_played = 1, 0, True
+        with self.captureOnCommitCallbacks(execute=True):
+            qf1.save()
+        self.assertEqual(Match.objects.get(season=season, matchday=26).home_team, self.winners['A'][0])
+
+        diff = generate_bracket(season, dry_run=True)
+        self.assertEqual({row['matchday']: row['action'] for row in diff}[26], 'keep')
+        generate_bracket(season, start=datetime(2025, 12, 9, 14, 0))
+        sf1 = Match.objects.get(season=season, matchday=26)
+        self.assertEqual((sf1.home_team, sf1.away_team.name), (self.winners['A'][0], 'WINNER 23 (placeholder)'))
+
+    @override_settings(LEAGUE_TASKS_INLINE=True)
+    def test_written_matches_invalidate_later_snapshots(self):
+        season = self.make_season(4)
+        build_snapshots(season.id)
+        StandingsSnapshot.objects.create(season=season, matchday=22, table=[])
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_bracket(season, start=datetime(2025, 12, 2, 14, 0))
+        self.assertEqual(
+            list(StandingsSnapshot.objects.filter(season=season).order_by('matchday').values_list('matchday', flat=True)),
+            [1, 2, 3, 4, 5, 6],
+        )
+
+    def test_match_stage_follows_the_bracket_size(self):
+        season = self.make_season(8, name='CUP 16')
+        generate_bracket(season, size=16, start=datetime(2025, 12, 2, 14, 0))
+        generate_bracket(self.make_season(2, name='CUP 4'), size=4, start=datetime(2025, 12, 2, 14, 0))
+        response = APIClient().get('/api/matches/', {'season_name': 'CUP 16'})
+        stages = {m['matchday']: m['match_stage'] for m in response.json() if m['matchday'] >= 22}
+        self.assertEqual([stages[md] for md in (22, 29, 30, 33, 34, 35, 36, 37)], [
+            'Round of 16', 'Round of 16', 'Quarterfinal', 'Quarterfinal', 'Semifinal', 'Semifinal', 'Third Place', 'Final',
+        ])
+        small = Match.objects.filter(season__name='CUP 4', matchday__gte=22).order_by('matchday')
+        self.assertEqual([m.get_match_stage() for m in small], ['Semifinal', 'Semifinal', 'Third Place', 'Final'])
+
+    def test_query_count_does_not_grow_with_bracket_size(self):
+        counts = []
+        for size, groups in ((8, 4), (16, 8)):
+            season = self.make_season(groups, name=f'CUP {size}')
+            with CaptureQueriesContext(connection) as ctx:
+                generate_bracket(season, size=size, start=datetime(2025, 12, 2, 14, 0))
+            counts.append(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]))
+            self.assertEqual(Match.objects.filter(season=season, matchday__gte=22).count(), size)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_ranked_seeding_and_placeholders_for_open_groups(self):
+        self.assertEqual(seed_order(8), [1, 8, 4, 5, 2, 7, 3, 6])
+        season = self.make_season(4)
+        a0, a1 = self.winners['A']
+        Match.objects.create(season=season, home_team=a0, away_team=a1, match_date=timezone.now() + timedelta(days=1), matchday=7)
+        diff = generate_bracket(season, size=4, seeding='ranked', dry_run=True)
+        self.assertEqual([row['fixture']['home_name'] for row in diff[:2]], ['SEED 1 (placeholder)', 'SEED 2 (placeholder)'])
+        self.assertFalse(Match.objects.filter(season=season, matchday__gte=22).exists())
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class FixtureSchedulerTests(TestCase):
+    def assert_feasible(self, fixtures, min_rest_days, venues):
+        slots = [(f['date'], f['kickoff'], f['venue']) for f in fixtures]
+        self.assertEqual(len(slots), len(set(slots)))
+        days = {}
+        for f in fixtures:
+            self.assertIn(f['date'].weekday(), venues[f['venue']])
+            for team in (f['home'], f['away']):
+                days.setdefault(team, []).append(f['date'])
+        for team_days in days.values():
+            team_days.sort()
+            for earlier, later in zip(team_days, team_days[1:]):
+                self.assertGreater((later - earlier).days, min_rest_days)
+
+    def test_round_robin_meets_everyone_once(self):
+        rounds = round_robin(range(7))
+        self.assertEqual(len(rounds), 7)
+        pairs = [frozenset(p) for r in rounds for p in r]
+        self.assertEqual(len(pairs), 21)
+        self.assertEqual(len(set(pairs)), 21)
+        for r in rounds:
+            teams = [t for p in r for t in p]
+            self.assertEqual(len(teams), len(set(teams)))
+        self.assertEqual(len(round_robin(range(4), legs=2)), 6)
+
+    def test_sixty_four_teams_fit_in_seconds(self):
+        venues = {'Pitch 1': {5, 6}, 'Pitch 2': {2, 5, 6}}
+        rounds = round_robin(range(64))
+        started = timezone.now()
+        fixtures, unscheduled = plan_fixtures(
+            rounds, date(2025, 9, 6), venues, [time(10), time(12), time(14), time(16)], min_rest_days=2,
+        )
+        self.assertLess((timezone.now() - started).total_seconds(), 5)
+        self.assertEqual((len(fixtures), unscheduled), (2016, []))
+        self.assert_feasible(fixtures, 2, venues)
+
+    def test_schedule_season_writes_missing_fixtures(self):
+        season = Season.objects.create(name='SCHEDULE CUP', start_date='2025-01-01')
+        teams = {}
+        for name in 'AB':
+            group = Group.objects.create(name=name, season=season)
+            teams[name] = [Team.objects.create(name=f'Sched {name}{t}') for t in range(4)]
+            TeamGroup.objects.bulk_create([TeamGroup(team=t, group=group, season=season) for t in teams[name]])
+        a0, a1 = teams['A'][:2]
+        # an existing fixture is kept, and its day counts against the teams' rest
+        Match.objects.create(season=season, home_team=a0, away_team=a1, matchday=1,
+                             match_date=timezone.make_aware(datetime(2025, 9, 6, 10, 0)), venue='Pitch 1')
+        # another season already holds Pitch 1 at 12:00 on the first Saturday
+        other = Season.objects.create(name='OTHER CUP', start_date='2025-01-01')
+        Match.objects.create(season=other, home_team=teams['B'][0], away_team=teams['B'][1], venue='Pitch 1',
+                             match_date=timezone.make_aware(datetime(2025, 9, 6, 12, 0)))
+        venues = {'Pitch 1': {5}, 'Pitch 2': {5}}
+
+        fixtures, unscheduled = schedule_season(season, date(2025, 9, 6), venues, [time(10), time(12)], dry_run=True)
+        self.assertEqual((len(fixtures), unscheduled), (11, []))
+        self.assertEqual(Match.objects.filter(season=season).count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fixtures, _ = schedule_season(season, date(2025, 9, 6), venues, [time(10), time(12)])
+        self.assertEqual(Match.objects.filter(season=season).count(), 12)
+        self.assertEqual(Match.objects.filter(season=season, home_team=a0, away_team=a1).count(), 1)
+        self.assertEqual(Match.objects.filter(season=season, matchday__gt=1).values('matchday').distinct().count(), 3)
+        existing = [{'home': a0.id, 'away': a1.id, 'date': date(2025, 9, 6), 'kickoff': time(10), 'venue': 'Pitch 1'},
+                    {'home': 0, 'away': -1, 'date': date(2025, 9, 6), 'kickoff': time(12), 'venue': 'Pitch 1'}]
+        self.assert_feasible(fixtures + existing, 1, venues)
+
+        # everything is scheduled, so a second run finds nothing to do
+        self.assertEqual(schedule_season(season, date(2025, 9, 6), venues, [time(10)], dry_run=True), ([], []))
+
+    def test_group_matchdays_stay_out_of_the_knockout_range(self):
+        season = Season.objects.create(name='LATE CUP', start_date='2025-01-01')
+        group = Group.objects.create(name='A', season=season)
+        teams = [Team.objects.create(name=f'Late {t}') for t in range(4)]
+        TeamGroup.objects.bulk_create([TeamGroup(team=t, group=group, season=season) for t in teams])
+        guests = [Team.objects.create(name=f'Guest {t}') for t in range(2)]
+        Match.objects.create(season=season, home_team=guests[0], away_team=guests[1], matchday=LAST_GROUP_MATCHDAY - 1,
+                             match_date=timezone.make_aware(datetime(2025, 8, 30, 10, 0)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fixtures, unscheduled = schedule_season(season, date(2025, 9, 6), {'Pitch 1': {5, 6}}, [time(10), time(12)])
+        self.assertEqual({f['matchday'] for f in fixtures}, {LAST_GROUP_MATCHDAY})
+        self.assertEqual((len(fixtures), len(unscheduled)), (2, 4))
+        self.assertFalse(Match.objects.filter(season=season, matchday__gt=LAST_GROUP_MATCHDAY).exists())
+        self.assertEqual(
+            {m.get_match_stage() for m in Match.objects.filter(season=season, home_team__in=teams)}, {'Group Stage'},
+        )
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class ExcelImportTests(TestCase):
+    def workbook(self, rows):
+        wb = openpyxl.Workbook()
+        sheet = wb.active
+        sheet.append(['Team Name', 'Category', 'Season', 'Group'])
+        for row in rows:
+            sheet.append(row)
+        data = io.BytesIO()
+        wb.save(data)
+        data.seek(0)
+        data.name = 'teams.xlsx'
+        return data
+
+    def post(self, rows):
+        return APIClient().post('/api/import-excel/', {'file': self.workbook(rows)}, format='multipart')
+
+    def test_import_reuses_teams_and_flags_near_duplicates(self):
+        season = Season.objects.create(name='IMPORT CUP', start_date='2025-01-01', category='girls')
+        existing = Team.objects.create(name='Riverside United')
+        response = self.post([
+            ['riverside united', 'girls', 'IMPORT CUP', 'A'],
+            ['Riverside Unitd', 'girls', 'IMPORT CUP', 'A'],
+            ['Hilltop Stars', 'girls', 'IMPORT CUP', 'B'],
+            ['Hilltop Stars', 'girls', 'IMPORT CUP', 'B'],
+            ['Lakeside', 'girls', 'NO SUCH CUP', 'A'],
+            ['Nameless', 'girls', 'IMPORT CUP', None],
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r['status'] for r in response.data['results']],
+            ['imported', 'duplicate_suspected', 'imported', 'imported', 'skipped', 'skipped'],
+        )
+        self.assertEqual(response.data['results'][1]['suggestions'], ['Riverside United'])
+        self.assertTrue(TeamGroup.objects.filter(team=existing, group__name='A', season=season).exists())
+        self.assertEqual(TeamGroup.objects.filter(season=season).count(), 2)
+        self.assertFalse(Team.objects.filter(name='Lakeside').exists())
+        self.assertEqual(
+            set(TeamStanding.objects.filter(season=season).values_list('team__name', flat=True)),
+            {'Riverside United', 'Hilltop Stars'},
+        )
+
+        # importing the same file again changes nothing
+        self.post([['Hilltop Stars', 'girls', 'IMPORT CUP', 'B']])
+        self.assertEqual(TeamGroup.objects.filter(season=season).count(), 2)
+
+    def test_queries_are_batched(self):
+        Season.objects.create(name='IMPORT CUP', start_date='2025-01-01', category='girls')
+        rows = [[f'Import Club {i:04d}', 'girls', 'IMPORT CUP', 'ABCDEFGH'[i % 8]] for i in range(1000)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(rows)
+        self.assertEqual({r['status'] for r in response.data['results']}, {'imported'})
+        self.assertEqual(TeamGroup.objects.filter(season__name='IMPORT CUP').count(), 1000)
+        # bulk inserts are only split by batch and SQLite's parameter limit, never per row
+        self.assertLess(len(ctx.captured_queries), 50)
+
+
+@override_settings(LEAGUE_TASKS_INLINE=True)
+class MatchImportTests(TestCase):
+    HEADER = ['Season', 'Home Team', 'Away Team', 'Match Date', 'Matchday', 'Venue']
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        self.season = Season.objects.create(name='FIXTURE CUP', start_date='2025-01-01')
+        self.teams = [Team.objects.create(name=f'Fixture Town {name}') for name in ('Alpha', 'Bravo', 'Charlie', 'Delta')]
+
+    def post(self, rows):
+        wb = openpyxl.Workbook()
+        wb.active.append(self.HEADER)
+        for row in rows:
+            wb.active.append(row)
+        data = io.BytesIO()
+        wb.save(data)
+        data.seek(0)
+        data.name = 'matches.xlsx'
+        return self.client.post(reverse('admin:league_match_import'), {'match_file': data})
+
+    @override_settings(LEAGUE_TASKS_INLINE=True)
+    def test_valid_rows_import_and_errors_stream_as_csv(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([
+                ['fixture cup', 'fixture town alpha', 'Fixture Town Bravo', '6/12/2025 4:00:00 PM', 1, 'Pitch 1'],
+                [str(self.season.id), 'Fixture Town Charlie', 'Fixture Town Delta', '6/12/2025 6:00:00 PM', 1, ''],
+                ['FIXTURE CUP', 'Fixture Town Alfa', 'Fixture Town Bravo', '7/12/2025 4:00:00 PM', 2, ''],
+                ['FIXTURE CUP', 'Fixture Town Alpha', 'Fixture Town Bravo', '2025-12-07', 2, ''],
+                ['NO SUCH CUP', 'Fixture Town Alpha', 'Fixture Town Bravo', '7/12/2025 4:00:00 PM', 2, ''],
+            ])
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        errors = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([e['row'] for e in errors], ['4', '5', '6'])
+        self.assertIn("'Fixture Town Alpha'", errors[0]['error'])
+        self.assertIn('Season not found', errors[2]['error'])
+
+        first = Match.objects.get(season=self.season, venue='Pitch 1')
+        self.assertEqual((first.home_team, first.away_team, first.matchday), (self.teams[0], self.teams[1], 1))
+        self.assertEqual(Match.objects.filter(season=self.season).count(), 2)
+        self.assertEqual(MatchChange.objects.filter(season_id=self.season.id).count(), 2)
+        self.assertEqual(TeamStanding.objects.filter(season=self.season).count(), 4)
+
+    def test_five_thousand_rows_use_a_bounded_number_of_queries(self):
+        rows = [
+            ['FIXTURE CUP', self.teams[i % 4].name, self.teams[(i + 1) % 4].name, '6/12/2025 4:00:00 PM', 1 + i % 20, '']
+            for i in range(5000)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(rows)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Match.objects.filter(season=self.season).count(), 5000)
+        # every lookup is one query up front; the inserts are only split by batch and
+        # SQLite's parameter limit (one statement per ~45 matches here), never per row
+        self.assertLess(len([q for q in ctx.captured_queries if not q['sql'].startswith('INSERT')]), 20)
+        self.assertLess(len(ctx.captured_queries), 200)
@@ -4,10 +4,12 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     ExcelImportView,
     ManualTeamGroupView,
+    bracket_view,
     groups_for_season,
     groups_with_teams,
     move_team,
     grouped_standings,
+    standings_batch,
     me,
     teams_for_season,
     group_team_modify,
@@ -25,6 +27,8 @@ urlpatterns = [
     path('groups-with-teams/', groups_with_teams, name='groups-with-teams'),
     path('move-team/', move_team, name='move-team'),
     path('grouped-standings/', grouped_standings, name='grouped-standings'),
+    path('bracket/<int:season_id>/', bracket_view, name='bracket'),
+    path('standings/batch/', standings_batch, name='standings-batch'),
     path('me/', me, name='me'),
     path('teams/', teams_for_season, name='teams-for-season'),
     path('group-team/', group_team_modify, name='group-team-modify'),
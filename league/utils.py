@@ -1,23 +1,46 @@
 from collections import defaultdict
 from .models import Team, Match
 
-def compute_standings(season_id):
-    teams = Team.objects.all()
-    stats = {t.id: {
-        'team_id': t.id,
-        'team_name': t.name,
-        'played': 0,
-        'wins': 0,
-        'draws': 0,
-        'losses': 0,
-        'goals_for': 0,
-        'goals_against': 0,
-        'goal_diff': 0,
-        'points': 0,
-    } for t in teams}
+STAT_FIELDS = ('played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'points')
 
-    # Only count the latest played match per team pair (home/away) in the season
-    matches = Match.objects.filter(season_id=season_id, is_played=True).order_by('home_team_id', 'away_team_id', '-match_date', '-awarded')
+# Ordering used to pick the single match that counts for a team pair
+# (id last so ties between identical fixtures resolve the same way everywhere)
+COUNTED_MATCH_ORDER = ('home_team_id', 'away_team_id', '-match_date', '-awarded', 'id')
+
+
+def empty_stats():
+    return {f: 0 for f in STAT_FIELDS}
+
+
+def standing_row(team_id, team_name, stats=None):
+    """Build a standings row in the shape returned by the API."""
+    stats = stats or {}
+    gf = stats.get('goals_for', 0)
+    ga = stats.get('goals_against', 0)
+    return {
+        'team_id': team_id,
+        'team_name': team_name,
+        'played': stats.get('played', 0),
+        'wins': stats.get('wins', 0),
+        'draws': stats.get('draws', 0),
+        'losses': stats.get('losses', 0),
+        'goals_for': gf,
+        'goals_against': ga,
+        'goal_diff': gf - ga,
+        'points': stats.get('points', 0),
+    }
+
+
+def standings_sort_key(row):
+    return (-row['points'], -row['goal_diff'], -row['goals_for'], row['team_name'])
+
+
+def accumulate_results(matches, stats):
+    """Add the results of `matches` into `stats` (a dict keyed by team id).
+
+    `matches` must be ordered by COUNTED_MATCH_ORDER; only the first match
+    seen for each team pair is counted.
+    """
     seen_pairs = set()
     for m in matches:
         pair = tuple(sorted([m.home_team_id, m.away_team_id]))
@@ -49,11 +72,21 @@ def compute_standings(season_id):
             away['draws'] += 1
             home['points'] += 1
             away['points'] += 1
+    return stats
+
+
+def compute_standings(season_id):
+    teams = Team.objects.all()
+    stats = {t.id: standing_row(t.id, t.name) for t in teams}
+
+    # Only count the latest played match per team pair (home/away) in the season
+    matches = Match.objects.filter(season_id=season_id, is_played=True).order_by(*COUNTED_MATCH_ORDER)
+    accumulate_results(matches, stats)
 
     for k, v in stats.items():
         v['goal_diff'] = v['goals_for'] - v['goals_against']
 
     # Convert to list and sort
     standings = list(stats.values())
-    standings.sort(key=lambda x: (-x['points'], -x['goal_diff'], -x['goals_for'], x['team_name']))
+    standings.sort(key=standings_sort_key)
     return standings
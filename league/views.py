@@ -4,16 +4,36 @@ from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import get_object_or_404, render
 from .models import Team, Season, Match, News, Group, TeamGroup
-from .serializers import TeamSerializer, SeasonSerializer, MatchSerializer, MatchCreateSerializer, NewsSerializer
+from .serializers import TeamSerializer, SeasonSerializer, MatchSerializer, MatchCreateSerializer, NewsSerializer, sideloaded_matches, sparse_only
 from .permissions_groups import IsNewsUploaderOrReadOnly, IsResultsEditor
-from .utils import compute_standings
+from .standings import (
+    DEFAULT_GROUP_TIEBREAKERS,
+    get_standings,
+    get_standings_many,
+    grouped_standings_tables,
+    grouped_standings_tables_many,
+    validate_tiebreakers,
+)
+from django.conf import settings
+from .snapshots import SnapshotError, standings_as_of
+from .bracket import bracket_tree
+from .cache import bracket_version, cached_payload, results_version, results_versions, season_etag
+from .live import broadcast_match_update
+from .changes import changes_since, current_cursor, cursor_expired
+from .pagination import MatchCursorPagination
+from .results import ResultsError, apply_results
+from .imports import import_team_rows, stream_rows
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from rest_framework.permissions import IsAuthenticated
-import difflib
+import itertools
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
-import openpyxl
 import random
+from datetime import datetime, time, timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
 
 # List all teams for a given season
 @api_view(['GET'])
@@ -83,48 +103,49 @@ class ExcelImportView(APIView):
         file_obj = request.FILES.get('file')
         if not file_obj:
             return Response({'error': 'No file uploaded'}, status=400)
+
+        # Expect columns: Team Name, Category, Season, Group
         try:
-            wb = openpyxl.load_workbook(file_obj)
-            sheet = wb.active
+            rows = stream_rows(file_obj)
+            header = next(rows, None)
         except Exception as e:
             return Response({'error': f'Invalid Excel file: {str(e)}'}, status=400)
+        try:
+            results = import_team_rows(itertools.chain([header or ()], rows))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response({'results': results})
 
-        # Expect columns: Team Name, Category, Season, Group
-        header = [cell.value for cell in next(sheet.iter_rows(min_row=1, max_row=1))]
-        required_cols = ['Team Name', 'Category', 'Season', 'Group']
-        if not all(col in header for col in required_cols):
-            return Response({'error': f'Missing required columns. Found: {header}'}, status=400)
-
-        results = []
-        # cache existing team names for duplicate detection
-        existing_names = list(Team.objects.values_list('name', flat=True))
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            data = dict(zip(header, row))
-            team_name = data.get('Team Name')
-            category = data.get('Category')
-            season_name = data.get('Season')
-            group_name = data.get('Group')
-            if not all([team_name, category, season_name, group_name]):
-                results.append({'team': team_name, 'status': 'skipped', 'reason': 'Missing data'})
-                continue
-
-            # detect near-duplicate team names to avoid creating duplicates
-            close = difflib.get_close_matches(str(team_name).strip(), existing_names, n=3, cutoff=0.82)
-            if close:
-                results.append({'team': team_name, 'status': 'duplicate_suspected', 'reason': 'Similar team exists', 'suggestions': close})
-                continue
-
-            season = Season.objects.filter(name=season_name, category=category).first()
-            if not season:
-                results.append({'team': team_name, 'status': 'skipped', 'reason': 'Season not found'})
-                continue
-
-            group, _ = Group.objects.get_or_create(name=group_name, season=season)
-            team, _ = Team.objects.get_or_create(name=team_name, defaults={'category': category})
-            TeamGroup.objects.update_or_create(team=team, group=group)
-            results.append({'team': team_name, 'status': 'imported'})
+def _versioned_response(request, name, season_id, compute, version=None):
+    """Serve a season payload from the results-version cache with a strong ETag.
+
+    A client whose If-None-Match carries the current version gets a 304
+    without the payload being computed or read from the cache.
+    """
+    if version is None:
+        version = results_version(season_id)
+    etag = season_etag(name, season_id, version)
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(cached_payload(name, season_id, version, compute))
+    response['ETag'] = etag
+    # let browsers keep the body but revalidate on every poll
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _tiebreakers_param(request):
+    """Group tie-breakers from ?tiebreakers=h2h_points,goal_diff,... or the
+    LEAGUE_GROUP_TIEBREAKERS setting. Raises ValueError for unknown names."""
+    param = request.query_params.get('tiebreakers')
+    if param:
+        tiebreakers = [t.strip() for t in param.split(',') if t.strip()]
+    else:
+        tiebreakers = getattr(settings, 'LEAGUE_GROUP_TIEBREAKERS', DEFAULT_GROUP_TIEBREAKERS)
+    return validate_tiebreakers(tiebreakers)
 
-        return Response({'results': results})
 
 @api_view(['GET'])
 def standings_view(request, season_id=None):
@@ -141,8 +162,7 @@ def standings_view(request, season_id=None):
             sid = int(sid)
         except (TypeError, ValueError):
             return Response({'error': 'Invalid season_id'}, status=400)
-        data = compute_standings(sid)
-        return Response(data)
+        return _versioned_response(request, 'standings', sid, lambda: get_standings(sid))
 
     # No season id provided — try to pick latest by category or overall
     category = request.query_params.get('category')
@@ -154,14 +174,98 @@ def standings_view(request, season_id=None):
     if not season:
         return Response({'error': 'No season found'}, status=404)
 
-    data = compute_standings(season.id)
-    return Response(data)
+    return _versioned_response(request, 'standings', season.id, lambda: get_standings(season.id))
+
+@api_view(['GET'])
+def bracket_view(request, season_id):
+    """The season's knockout bracket tree (see league.bracket.bracket_tree).
+
+    Cached under the season's bracket version, which only knockout match
+    changes bump, so polls during the group stage are 304s.
+    """
+    return _versioned_response(
+        request, 'bracket', season_id, lambda: bracket_tree(season_id), version=bracket_version(season_id),
+    )
+
+
+@api_view(['GET'])
+def standings_as_of_matchday(request, season_id, matchday):
+    """Return the season table as it stood after a completed matchday."""
+    try:
+        data = standings_as_of(season_id, matchday)
+    except SnapshotError as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    if data is None:
+        return Response({'error': 'Matchday not found or not completed yet'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'season_id': season_id, 'matchday': matchday, 'standings': data})
 
-class TeamViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+def standings_batch(request):
+    """Standings for several seasons in one response.
+
+    Query params:
+    - seasons: comma-separated season ids
+    - categories: comma-separated categories (latest season of each)
+    - groups: if truthy, include each season's group tables
+    - tiebreakers: as for grouped-standings
+    """
+    season_ids = []
+    try:
+        season_ids = [int(s) for s in request.query_params.get('seasons', '').split(',') if s.strip()]
+    except (TypeError, ValueError):
+        return Response({'error': 'seasons must be comma-separated ids'}, status=status.HTTP_400_BAD_REQUEST)
+    categories = [c.strip() for c in request.query_params.get('categories', '').split(',') if c.strip()]
+    for category in categories:
+        season = Season.objects.filter(category=category).order_by('-start_date').only('id').first()
+        if season:
+            season_ids.append(season.id)
+    season_ids = list(dict.fromkeys(season_ids))
+    if not season_ids:
+        return Response({'error': 'seasons or categories parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    include_groups = request.query_params.get('groups', '').lower() in ('1', 'true', 'yes')
+    tiebreakers = None
+    if include_groups:
+        try:
+            tiebreakers = _tiebreakers_param(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def compute():
+        seasons = Season.objects.in_bulk(season_ids)
+        standings = get_standings_many([sid for sid in season_ids if sid in seasons])
+        tables = grouped_standings_tables_many(list(standings), tiebreakers, standings) if include_groups else {}
+        data = []
+        for sid, rows in standings.items():
+            season = seasons[sid]
+            item = {
+                'season': {'id': season.id, 'name': season.name, 'category': season.category},
+                'standings': rows,
+            }
+            if include_groups:
+                item['groups'] = tables[sid]
+            data.append(item)
+        return data
+
+    name = 'standings-batch' + ('-groups-' + '.'.join(tiebreakers) if include_groups else '')
+    key = '.'.join(str(sid) for sid in season_ids)
+    version = '.'.join(str(v) for v in results_versions(season_ids))
+    return _versioned_response(request, name, key, compute, version=version)
+
+class SparseFieldsViewMixin:
+    """Load only the columns a ?fields= / ?omit= read response serializes."""
+    # model fields the view itself reads on every row (ordering/cursor keys)
+    sparse_required_fields = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return sparse_only(queryset, self.get_serializer_class(), self.request, self.sparse_required_fields)
+
+class TeamViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Team.objects.filter(archived=False)
     serializer_class = TeamSerializer
 
-class SeasonViewSet(viewsets.ModelViewSet):
+class SeasonViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Season.objects.all().order_by('-start_date')
     serializer_class = SeasonSerializer
 
@@ -172,9 +276,36 @@ class SeasonViewSet(viewsets.ModelViewSet):
             qs = qs.filter(category=category)
         return qs
 
-class MatchViewSet(viewsets.ModelViewSet):
+def _date_range_filter(params):
+    """match_date lookups for ?from=/?to=. A bare date covers that whole day."""
+    lookups = {}
+    for param, lookup in (('from', 'match_date__gte'), ('to', 'match_date__lt')):
+        value = params.get(param)
+        if not value:
+            continue
+        try:
+            day = parse_date(value)
+            moment = None if day else parse_datetime(value)
+        except ValueError:
+            day = moment = None
+        if day is not None:
+            if param == 'to':
+                day += timedelta(days=1)
+            moment = datetime.combine(day, time.min)
+        elif moment is None:
+            raise ValidationError({'error': f'{param} must be an ISO date or datetime'})
+        elif param == 'to':
+            lookup = 'match_date__lte'
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        lookups[lookup] = moment
+    return lookups
+
+class MatchViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     # Include archived teams (used for bracket placeholders) but filter them when not showing brackets
-    queryset = Match.objects.select_related('home_team', 'away_team')
+    queryset = Match.objects.select_related('home_team', 'away_team', 'season')
+    pagination_class = MatchCursorPagination
+    sparse_required_fields = ('matchday', 'match_date')
     # Use different serializer for read vs write
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -200,9 +331,75 @@ class MatchViewSet(viewsets.ModelViewSet):
         elif category:
             qs = qs.filter(season__category=category)
 
+        # Optional date range: ?from= / ?to= take a date (whole day) or a datetime
+        if self.action in ('list', 'upcoming', 'recent'):
+            qs = qs.filter(**_date_range_filter(self.request.query_params))
+
         # Order matches by matchday then match_date so bracket rendering is stable
         return qs.order_by('matchday', 'match_date')
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        # ?sideload=1: matches carry team/season ids; each team and season is sent once
+        if request.query_params.get('sideload', '').lower() in ('1', 'true', 'yes'):
+            data = sideloaded_matches(page if page is not None else queryset, self.get_serializer_context())
+        else:
+            data = self.get_serializer(page if page is not None else queryset, many=True).data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def upcoming(self, request):
+        """Unplayed, non-void matches from today on, soonest first (always paginated)."""
+        self.pagination_ordering = 'date'
+        start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        self.queryset = self.queryset.filter(is_played=False, void=False, match_date__gte=start)
+        return self.list(request)
+
+    @action(detail=False, methods=['get'])
+    def recent(self, request):
+        """Played matches up to now, most recent first (always paginated)."""
+        self.pagination_ordering = '-date'
+        # the match_date bound lets SQLite use match_played_date_idx too
+        self.queryset = self.queryset.filter(is_played=True, match_date__lte=timezone.now())
+        return self.list(request)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Matches changed or deleted after a cursor.
+
+        Query params:
+        - since: cursor from a previous response (0 or omitted = from the start)
+        - season: restrict to one season
+        - limit: max log entries to consume (default 500, max 2000)
+
+        Returns {cursor, changed, deleted, has_more}. `changed` holds the current
+        state of each match, `deleted` the ids of removed ones. A 410 means the
+        cursor predates pruned history; reload /api/matches/ and start over
+        from the returned cursor.
+        """
+        try:
+            since = int(request.query_params.get('since') or 0)
+            limit = min(int(request.query_params.get('limit') or 500), 2000)
+            season_id = request.query_params.get('season')
+            season_id = int(season_id) if season_id else None
+        except (TypeError, ValueError):
+            return Response({'error': 'since, limit and season must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        if cursor_expired(since):
+            return Response({'error': 'Cursor expired', 'cursor': current_cursor()}, status=status.HTTP_410_GONE)
+
+        changed_ids, deleted, cursor, has_more = changes_since(since, season_id, limit)
+        matches = Match.objects.select_related('home_team', 'away_team', 'season').filter(id__in=changed_ids)
+        if season_id is not None:
+            matches = matches.filter(season_id=season_id)
+        matches = sparse_only(matches, MatchSerializer, request, self.sparse_required_fields)
+        changed = MatchSerializer(matches.order_by('matchday', 'match_date', 'id'), many=True, context=self.get_serializer_context()).data
+        return Response({'cursor': cursor, 'changed': changed, 'deleted': deleted, 'has_more': has_more})
+
     # extra: endpoint to mark a match result
     @action(detail=True, methods=['post'], permission_classes=[IsResultsEditor])
     def set_result(self, request, pk=None):
@@ -235,8 +432,24 @@ class MatchViewSet(viewsets.ModelViewSet):
         # to suppress automatic is_played calculation.
         match._suppress_auto_played = True
         match.save()
+        broadcast_match_update(match, 'score')
         return Response(self.get_serializer(match).data)
 
+    @action(detail=False, methods=['post'], url_path='bulk-results', permission_classes=[IsResultsEditor])
+    def bulk_results(self, request):
+        """Apply many score/period updates in one transaction.
+
+        Accepts JSON: { "results": [ {"id": 1, "home_score": 2, "away_score": 1,
+        "period": "2nd_half"}, {"id": 2, "finished": true}, ... ] }.
+        The batch is validated as a whole; if any entry is invalid nothing is
+        written and the response lists the errors per entry.
+        """
+        try:
+            matches = apply_results(request.data.get('results'), request.user)
+        except ResultsError as e:
+            return Response({'error': 'Invalid results', 'results': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'updated': len(matches), 'matches': MatchSerializer(matches, many=True, context=self.get_serializer_context()).data})
+
     @action(detail=True, methods=['post'], permission_classes=[IsResultsEditor])
     def set_period(self, request, pk=None):
         """Explicit endpoint to update the `current_period` for a match.
@@ -254,6 +467,7 @@ class MatchViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Invalid period value'}, status=status.HTTP_400_BAD_REQUEST)
         match.current_period = period
         match.save()
+        broadcast_match_update(match, 'period')
         return Response(self.get_serializer(match).data)
 
     @action(detail=True, methods=['post'], permission_classes=[IsResultsEditor])
@@ -277,9 +491,10 @@ class MatchViewSet(viewsets.ModelViewSet):
         match.manual_finished_by = user.username if (user and getattr(user, 'is_authenticated', False)) else ''
         match.is_played = True
         match.save()
+        broadcast_match_update(match, 'finished')
         return Response(self.get_serializer(match).data)
 
-class NewsViewSet(viewsets.ModelViewSet):
+class NewsViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = News.objects.all().order_by('-published_at')
     serializer_class = NewsSerializer
     permission_classes = [IsNewsUploaderOrReadOnly]
@@ -314,21 +529,13 @@ def grouped_standings(request):
     except (TypeError, ValueError):
         return Response({'error': 'invalid season id'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # compute overall standings
-    season_standings = compute_standings(sid)
+    try:
+        tiebreakers = _tiebreakers_param(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # get groups for season
-    groups = Group.objects.filter(season_id=sid).order_by('name')
-    result = []
-    for g in groups:
-        team_ids = [tg.team.id for tg in TeamGroup.objects.filter(group=g).select_related('team')]
-        # filter standings for teams in this group
-        group_rows = [row for row in season_standings if row['team_id'] in team_ids]
-        # sort using same comparator as compute_standings (already sorted overall, but ensure group order)
-        group_rows.sort(key=lambda x: (-x['points'], -x['goal_diff'], -x['goals_for'], x['team_name']))
-        result.append({'group': {'id': g.id, 'name': g.name}, 'standings': group_rows})
-
-    return Response(result)
+    name = 'grouped-standings-' + '.'.join(tiebreakers)
+    return _versioned_response(request, name, sid, lambda: grouped_standings_tables(sid, tiebreakers))
 
 
 @api_view(['GET'])